@@ -3,6 +3,8 @@ from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 from config import Config
 from datetime import timedelta
+from app.utils.cache import Cache
+from app.utils.export_jobs import ExportJobManager
 
 
 # 初始化SQLAlchemy实例
@@ -14,6 +16,12 @@ login_manager.login_view = 'auth.login'
 login_manager.login_message = '请先登录以访问此页面'
 login_manager.login_message_category = 'info'
 
+# 初始化缓存（数据概览统计等）
+cache = Cache()
+
+# 初始化后台导出任务
+export_jobs = ExportJobManager()
+
 
 
 def create_app(config_class=Config):
@@ -27,6 +35,12 @@ def create_app(config_class=Config):
     # 绑定数据库实例到Flask应用
     db.init_app(app)
 
+    # 初始化缓存后端
+    cache.init_app(app)
+
+    # 初始化后台导出任务的线程池和导出目录
+    export_jobs.init_app(app)
+
     # 用户加载函数
     @login_manager.user_loader
     def load_user(user_id):
@@ -44,6 +58,7 @@ def create_app(config_class=Config):
     from app.routes.leave import leave_bp
     from app.routes.dashboard import dashboard_bp
     from app.routes.upcoming import bp as upcoming_bp
+    from app.routes.exports import exports_bp
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(student_bp, url_prefix='/student')
@@ -52,6 +67,7 @@ def create_app(config_class=Config):
     app.register_blueprint(attendance_bp, url_prefix='/attendance')
     app.register_blueprint(leave_bp, url_prefix='/leave')
     app.register_blueprint(dashboard_bp, url_prefix='/dashboard')
+    app.register_blueprint(exports_bp, url_prefix='/exports')
 
     # 首页路由（重定向到数据概览）
     @app.route('/')
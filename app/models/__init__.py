@@ -1,6 +1,18 @@
 # 导入所有模型，方便统一引用
+from sqlalchemy import DDL, event
+
+from app import db
 from app.models.student import Student
 from app.models.course import Course
+from app.models.course_session import CourseSession
 from app.models.attendance import Attendance
+from app.models.attendance_rollup import AttendanceDailyRollup
 from app.models.leave_record import LeaveRecord
-from app.models.user import User
\ No newline at end of file
+from app.models.leave_day import LeaveDay
+from app.models.user import User
+
+# 搜索用的三元组索引依赖 pg_trgm 扩展（db.create_all 建表前创建，只在 PostgreSQL 上执行）
+event.listen(
+    db.metadata, 'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
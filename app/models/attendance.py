@@ -25,5 +25,19 @@ class Attendance(db.Model):
     attendance_note = db.Column(db.String(200), comment='考勤备注')
     create_time = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, comment='记录创建时间')
 
+    __table_args__ = (
+        # 同一学生同一课程同一天只能有一条考勤记录（批量写入依赖该约束做 ON CONFLICT）
+        db.UniqueConstraint('student_id', 'course_id', 'attendance_date', name='uq_attendance_student_course_date'),
+        # 按课程+日期查询（考勤日历、记录页、课程详情），附带状态列以便只走索引完成统计
+        db.Index('ix_attendance_course_date', 'course_id', 'attendance_date',
+                 postgresql_include=['attendance_type']),
+        # 按日期+状态统计（数据概览、趋势图）
+        db.Index('ix_attendance_date_type', 'attendance_date', 'attendance_type'),
+        # 按学生查询最近考勤（学生详情）
+        db.Index('ix_attendance_student_date', 'student_id', 'attendance_date'),
+        # 最近活动按创建时间倒序
+        db.Index('ix_attendance_create_time', 'create_time'),
+    )
+
     def __repr__(self):
         return f'<Attendance {self.attendance_id}: {self.student_id} - {self.course_id}>'
\ No newline at end of file
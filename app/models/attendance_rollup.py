@@ -0,0 +1,28 @@
+from app import db
+from datetime import datetime
+
+
+class AttendanceDailyRollup(db.Model):
+    __tablename__ = 'attendance_daily_rollup'  # 对应数据库表名
+
+    # 字段定义（按 日期+课程 汇总的考勤人数，由 attendance 表计算得到）
+    attendance_date = db.Column(db.Date, primary_key=True, comment='考勤日期')
+    course_id = db.Column(
+        db.String(20),
+        db.ForeignKey('course.course_id', ondelete='CASCADE', onupdate='CASCADE'),
+        primary_key=True,
+        comment='课程编号（外键）'
+    )
+    total = db.Column(db.Integer, nullable=False, default=0, comment='考勤记录总数')
+    present = db.Column(db.Integer, nullable=False, default=0, comment='到课人数')
+    leave = db.Column(db.Integer, nullable=False, default=0, comment='请假人数')
+    absent = db.Column(db.Integer, nullable=False, default=0, comment='旷课人数')
+    update_time = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, comment='汇总更新时间')
+
+    # 按课程汇总（课程列表到勤率）
+    __table_args__ = (
+        db.Index('ix_attendance_daily_rollup_course', 'course_id', 'attendance_date'),
+    )
+
+    def __repr__(self):
+        return f'<AttendanceDailyRollup {self.attendance_date}: {self.course_id}>'
@@ -1,4 +1,10 @@
+from sqlalchemy.orm import validates
+
 from app import db
+from app.models.course_session import CourseSession
+from app.utils.db import trigram_index
+from app.utils.schedule_helper import parse_course_time
+from app.utils.week_helper import MAX_MASK_WEEK, compile_week_range, week_in_mask
 
 
 class Course(db.Model):
@@ -12,6 +18,14 @@ class Course(db.Model):
     course_place = db.Column(db.String(50), nullable=False, comment='上课地点（如：教学楼A201）')
     semester = db.Column(db.String(20), nullable=False, comment='学期（如：2023-2024学年上）')
     week_range = db.Column(db.String(50), nullable=True, comment='上课周次（如：1-8,13,15,17 或 9-16）')
+    week_mask = db.Column(db.BigInteger, nullable=True, index=True, comment='上课周次位掩码（第n周对应第n位，空表示每周上课）')
+
+    __table_args__ = (
+        # 课程代码、课程名称、教师姓名的关键字搜索
+        trigram_index('ix_course_id_trgm', 'course_id'),
+        trigram_index('ix_course_name_trgm', 'course_name'),
+        trigram_index('ix_course_teacher_name_trgm', 'teacher_name'),
+    )
 
     # 关系映射（关联考勤记录）
     attendances = db.relationship(
@@ -21,6 +35,34 @@ class Course(db.Model):
         cascade='all, delete-orphan'  # 删除课程时级联删除关联的考勤记录
     )
 
+    # 关系映射（解析后的上课时段）
+    sessions = db.relationship(
+        'CourseSession',
+        backref='course',
+        cascade='all, delete-orphan',  # 修改上课时间时替换旧的时段
+        order_by='[CourseSession.weekday, CourseSession.start_period]'
+    )
+
+    @validates('course_time')
+    def _sync_sessions(self, key, value):
+        """设置上课时间时重新生成结构化的上课时段"""
+        self.sessions = [
+            CourseSession(weekday=weekday, start_period=start_p, end_period=end_p)
+            for weekday, start_p, end_p in parse_course_time(value)
+        ]
+        return value
+
+    @validates('week_range')
+    def _sync_week_mask(self, key, value):
+        """设置周次范围时同步更新周次位掩码"""
+        self.week_mask = compile_week_range(value)
+        return value
+
+    @property
+    def teaching_weeks_mask(self):
+        """上课周次位掩码（按周次字符串缓存），None表示每周都上课"""
+        return compile_week_range(self.week_range)
+
     def is_teaching_week(self, week_number):
         """
         判断给定周次是否在该课程的上课周次范围内
@@ -31,24 +73,26 @@ class Course(db.Model):
         Returns:
             bool: True表示该周上课，False表示该周不上课
         """
-        if not self.week_range:
-            return True  # 如果没有设置周次范围，默认每周都上课
-        
-        # 解析周次范围，支持格式：1-8,13,15,17 或 9-16
-        week_set = set()
-        parts = self.week_range.split(',')
-        
-        for part in parts:
-            part = part.strip()
-            if '-' in part:
-                # 范围格式：1-8
-                start, end = part.split('-')
-                week_set.update(range(int(start), int(end) + 1))
-            else:
-                # 单个周次：13
-                week_set.add(int(part))
-        
-        return week_number in week_set
+        # 如果没有设置周次范围，默认每周都上课
+        return week_in_mask(week_number, self.teaching_weeks_mask)
+
+    @classmethod
+    def teaching_in_week(cls, week_number):
+        """
+        SQL条件：课程在指定周次上课（基于 week_mask 列）
+
+        Args:
+            week_number: 周次（1-20）
+
+        Returns:
+            SQL表达式，可直接用于 query.filter()
+        """
+        if not week_number or not 1 <= week_number <= MAX_MASK_WEEK:
+            return cls.week_mask.is_(None)
+        return db.or_(
+            cls.week_mask.is_(None),
+            cls.week_mask.op('&')(1 << week_number) != 0
+        )
     
     def __repr__(self):
         return f'<Course {self.course_id}: {self.course_name}>'
\ No newline at end of file
@@ -0,0 +1,26 @@
+from app import db
+
+
+class CourseSession(db.Model):
+    __tablename__ = 'course_session'  # 对应数据库表名
+
+    # 字段定义（由 course.course_time 解析得到，每个上课时段一行）
+    session_id = db.Column(db.Integer, primary_key=True, autoincrement=True, comment='上课时段ID（自增主键）')
+    course_id = db.Column(
+        db.String(20),
+        db.ForeignKey('course.course_id', ondelete='CASCADE', onupdate='CASCADE'),
+        nullable=False,
+        index=True,
+        comment='课程编号（外键）'
+    )
+    weekday = db.Column(db.SmallInteger, nullable=False, comment='星期（0=周一 ... 6=周日）')
+    start_period = db.Column(db.SmallInteger, nullable=False, comment='开始节次')
+    end_period = db.Column(db.SmallInteger, nullable=False, comment='结束节次')
+
+    # 按星期查课程的索引
+    __table_args__ = (
+        db.Index('ix_course_session_weekday', 'weekday', 'start_period'),
+    )
+
+    def __repr__(self):
+        return f'<CourseSession {self.course_id}: {self.weekday} {self.start_period}-{self.end_period}>'
@@ -0,0 +1,23 @@
+from app import db
+
+
+class LeaveDay(db.Model):
+    __tablename__ = 'leave_day'  # 对应数据库表名
+
+    # 字段定义（由 leave_record 的起止日期展开，请假期间每天一行）
+    leave_date = db.Column(db.Date, primary_key=True, comment='请假日期')
+    leave_id = db.Column(
+        db.Integer,
+        db.ForeignKey('leave_record.leave_id', ondelete='CASCADE'),
+        primary_key=True,
+        comment='请假记录ID（外键）'
+    )
+    student_id = db.Column(db.String(20), nullable=False, comment='学生学号（冗余，便于按日期直接查人）')
+
+    # 按请假记录维护（修改、删除请假时按 leave_id 删除旧行）
+    __table_args__ = (
+        db.Index('ix_leave_day_leave_id', 'leave_id'),
+    )
+
+    def __repr__(self):
+        return f'<LeaveDay {self.leave_date}: {self.leave_id}>'
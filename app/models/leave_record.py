@@ -23,6 +23,8 @@ class LeaveRecord(db.Model):
     # 检查约束（结束日期 >= 开始日期，对应class.sql的ck_leave_date）
     __table_args__ = (
         db.CheckConstraint('leave_end_date >= leave_start_date', name='ck_leave_date'),
+        # 请假记录列表按提交时间倒序游标分页（请假ID保证排序唯一）
+        db.Index('ix_leave_record_create_time', 'create_time', 'leave_id'),
     )
 
     def __repr__(self):
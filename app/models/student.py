@@ -1,4 +1,5 @@
 from app import db
+from app.utils.db import trigram_index
 from datetime import datetime
 
 
@@ -12,6 +13,15 @@ class Student(db.Model):
     phone = db.Column(db.String(20), nullable=False, comment='联系电话')
     create_time = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, comment='创建时间')
 
+    __table_args__ = (
+        # 学生列表按创建时间倒序游标分页（学号保证排序唯一）
+        db.Index('ix_student_create_time', 'create_time', 'student_id'),
+        # 学号、姓名、电话的关键字搜索
+        trigram_index('ix_student_id_trgm', 'student_id'),
+        trigram_index('ix_student_name_trgm', 'student_name'),
+        trigram_index('ix_student_phone_trgm', 'phone'),
+    )
+
     # 关系映射（关联考勤记录和请假记录）
     attendances = db.relationship(
         'Attendance',
@@ -1,20 +1,20 @@
 """
 考勤记录路由模块
 """
-from flask import Blueprint, render_template, request, flash, redirect, url_for, send_file
+from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required
 from datetime import datetime, timedelta, date
-from sqlalchemy import func, and_, case
 
-from app import db
+from app import db, cache
 from app.models.attendance import Attendance
+from app.models.attendance_rollup import AttendanceDailyRollup
 from app.models.student import Student
 from app.models.course import Course
-from app.utils.week_helper import get_week_number
-
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from app.utils.course_schedule import get_courses_on_date
+from app.utils.attendance_stats import get_day_summary
+from app.utils.attendance_writer import save_attendance_batch, materialize_default_roster
+from app.utils.attendance_rollup import refresh_rollups
+from app.utils.export import XlsxExport, STATUS_STYLES, YIELD_PER, format_datetime, get_export_format, send_table
 
 attendance_bp = Blueprint('attendance', __name__)
 
@@ -30,66 +30,30 @@ def index():
     except ValueError:
         current_date = date.today()
 
-    # 获取当天的所有课程
-    # 根据星期几查询课程
-    weekday_names = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
-    current_weekday = weekday_names[current_date.weekday()]
-    all_courses = Course.query.filter(
-        Course.course_time.like(f'{current_weekday}%')
-    ).order_by(Course.course_time).all()
-
-    # 根据周次过滤课程
-    current_week = get_week_number(current_date)
-    courses = []
-    if current_week:
-        for course in all_courses:
-            if course.is_teaching_week(current_week):
-                courses.append(course)
-    else:
-        # 如果不在学期范围内，显示所有课程
-        courses = all_courses
-
-    # 为每个课程获取考勤统计
+    # 获取当天的所有课程（按星期和周次查询，不在学期范围内时显示当天所有课程）
+    courses = get_courses_on_date(current_date)
+
+    # 为每个课程获取考勤统计（一次分组查询）
+    day_summary = get_day_summary([course.course_id for course in courses], current_date)
+    total_students = Student.query.count()
+
     course_stats = []
     for course in courses:
-        # 获取该课程该日期的考勤记录
-        attendance_count = Attendance.query.filter_by(
-            course_id=course.course_id,
-            attendance_date=current_date
-        ).count()
-
-        # 统计各种状态的人数
-        present = Attendance.query.filter_by(
-            course_id=course.course_id,
-            attendance_date=current_date,
-            attendance_type='到课'
-        ).count()
-
-        leave = Attendance.query.filter_by(
-            course_id=course.course_id,
-            attendance_date=current_date,
-            attendance_type='请假'
-        ).count()
-
-        absent = Attendance.query.filter_by(
-            course_id=course.course_id,
-            attendance_date=current_date,
-            attendance_type='旷课'
-        ).count()
+        counts = day_summary[course.course_id]
+        present = counts['present']
 
         # 计算到勤率
-        total_students = Student.query.count()
         attendance_rate = round((present / total_students * 100), 1) if total_students > 0 else 0
 
         course_stats.append({
             'course': course,
             'total': total_students,
-            'recorded': attendance_count,
+            'recorded': counts['recorded'],
             'present': present,
-            'leave': leave,
-            'absent': absent,
+            'leave': counts['leave'],
+            'absent': counts['absent'],
             'rate': attendance_rate,
-            'is_recorded': attendance_count > 0
+            'is_recorded': counts['recorded'] > 0
         })
 
     # 获取周一到周日的日期
@@ -123,12 +87,29 @@ def record(course_id):
     students = Student.query.order_by(Student.student_id).all()
 
     # 获取该课程该日期的考勤记录
-    attendance_records = {}
-    records = Attendance.query.filter_by(
+    records_query = Attendance.query.filter_by(
         course_id=course_id,
         attendance_date=attendance_date
-    ).all()
+    )
+    # 为还没有考勤记录的学生批量创建默认记录（到课）
+    # 每次打开都执行：请假同步可能只写入了请假学生的记录，已有记录会被 ON CONFLICT DO NOTHING 跳过
+    try:
+        had_records = records_query.first() is not None
+        created = materialize_default_roster(course_id, attendance_date)
+        if created:
+            refresh_rollups([course_id], attendance_date, attendance_date)
+            db.session.commit()
+            cache.invalidate('dashboard')
+            if had_records:
+                flash(f'已为其余 {created} 名学生补充默认考勤记录（到课）', 'success')
+            else:
+                flash('已为该课程创建默认考勤记录（所有学生到课）', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'创建默认考勤记录失败：{str(e)}', 'error')
+    records = records_query.all()
 
+    attendance_records = {}
     for record in records:
         attendance_records[record.student_id] = {
             'id': record.attendance_id,
@@ -137,27 +118,6 @@ def record(course_id):
             'note': record.attendance_note
         }
 
-    # 如果没有考勤记录，自动创建默认记录（所有学生到课）
-    if not records:
-        for student in students:
-            new_record = Attendance(
-                student_id=student.student_id,
-                course_id=course_id,
-                attendance_date=attendance_date,
-                attendance_type='到课',
-                late_minutes=0,
-                attendance_note=''
-            )
-            db.session.add(new_record)
-
-        try:
-            db.session.commit()
-            flash('已为该课程创建默认考勤记录（所有学生到课）', 'success')
-            return redirect(url_for('attendance.record', course_id=course_id, date=date_str))
-        except Exception as e:
-            db.session.rollback()
-            flash(f'创建默认考勤记录失败：{str(e)}', 'error')
-
     # 构建学生考勤数据
     student_records = []
     for student in students:
@@ -200,48 +160,17 @@ def save():
         flash('无效的日期格式', 'error')
         return redirect(url_for('attendance.index'))
 
-    # 获取所有学生
-    students = Student.query.all()
-
-    # 更新考勤记录
-    for student in students:
-        attendance_type = request.form.get(f'attendance_type_{student.student_id}', '到课')
-        late_minutes = request.form.get(f'late_minutes_{student.student_id}', 0)
-        note = request.form.get(f'note_{student.student_id}', '')
-
-        # 处理迟到时间
-        try:
-            late_minutes = int(late_minutes) if late_minutes else 0
-        except ValueError:
-            late_minutes = 0
-
-        # 查找现有记录
-        record = Attendance.query.filter_by(
-            student_id=student.student_id,
-            course_id=course_id,
-            attendance_date=attendance_date
-        ).first()
-
-        if record:
-            # 更新现有记录
-            record.attendance_type = attendance_type
-            record.late_minutes = late_minutes
-            record.attendance_note = note
-        else:
-            # 创建新记录
-            new_record = Attendance(
-                student_id=student.student_id,
-                course_id=course_id,
-                attendance_date=attendance_date,
-                attendance_type=attendance_type,
-                late_minutes=late_minutes,
-                attendance_note=note
-            )
-            db.session.add(new_record)
-
+    # 批量比对并写入有变化的考勤记录
     try:
+        result = save_attendance_batch(course_id, attendance_date, request.form)
+        refresh_rollups([course_id], attendance_date, attendance_date)
         db.session.commit()
-        flash('考勤记录保存成功', 'success')
+        cache.invalidate('dashboard')
+        flash(
+            f"考勤记录保存成功：新增 {result['inserted']} 条，更新 {result['updated']} 条，"
+            f"用时 {result['elapsed_ms']} 毫秒",
+            'success'
+        )
     except Exception as e:
         db.session.rollback()
         flash(f'保存失败：{str(e)}', 'error')
@@ -252,7 +181,12 @@ def save():
 @attendance_bp.route('/export_day')
 @login_required
 def export_day():
-    """导出当天的考勤记录"""
+    """导出当天的考勤记录（format=xlsx/csv/columnar）"""
+    fmt = get_export_format(request.args)
+    if fmt is None:
+        flash('不支持的导出格式', 'error')
+        return redirect(url_for('attendance.index'))
+
     # 获取日期参数
     date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
     try:
@@ -261,73 +195,21 @@ def export_day():
         flash('无效的日期格式', 'error')
         return redirect(url_for('attendance.index'))
 
-    # 获取当天的所有课程
-    # 根据星期几查询课程
-    weekday_names = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
-    export_weekday = weekday_names[export_date.weekday()]
-    all_courses = Course.query.filter(
-        Course.course_time.like(f'{export_weekday}%')
-    ).order_by(Course.course_time).all()
-
-    # 根据周次过滤课程
-    export_week = get_week_number(export_date)
-    courses = []
-    if export_week:
-        for course in all_courses:
-            if course.is_teaching_week(export_week):
-                courses.append(course)
-    else:
-        courses = all_courses
+    # 获取当天的所有课程（按星期和周次查询）
+    courses = get_courses_on_date(export_date)
 
     if not courses:
         flash('该日期没有课程', 'warning')
         return redirect(url_for('attendance.index'))
 
-    # 创建工作簿
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"{export_date.strftime('%Y-%m-%d')}考勤"
-
-    # 定义样式
-    header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    header_font = Font(bold=True, color='FFFFFF', size=11)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    center_alignment = Alignment(horizontal='center', vertical='center')
-
-    # 写入标题
-    ws.merge_cells('A1:F1')
-    ws['A1'] = f"{export_date.strftime('%Y年%m月%d日')} 课程考勤记录"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = center_alignment
-
-    # 写入表头
-    headers = ['课程名称', '上课时间', '上课地点', '应到人数', '实到人数', '到勤率']
-    ws.append([''])  # 空行
-    ws.append(headers)
-
-    header_row = ws.max_row
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=header_row, column=col_num)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_alignment
-        cell.border = border
-
-    # 写入课程数据
+    # 计算课程数据
     total_students = Student.query.count()
+    day_summary = get_day_summary([course.course_id for course in courses], export_date)
 
+    rows = []
     for course in courses:
         # 获取该课程的考勤统计
-        present_count = Attendance.query.filter_by(
-            course_id=course.course_id,
-            attendance_date=export_date,
-            attendance_type='到课'
-        ).count()
+        present_count = day_summary[course.course_id]['present']
 
         attendance_rate = round((present_count / total_students * 100), 1) if total_students > 0 else 0
 
@@ -335,49 +217,38 @@ def export_day():
         time_parts = course.course_time.split()
         time_str = time_parts[1] if len(time_parts) > 1 else ''
 
-        row_data = [
+        rows.append([
             course.course_name,
             time_str,
             course.course_place,
             total_students,
             present_count,
             f"{attendance_rate}%"
-        ]
-        ws.append(row_data)
-
-        # 设置边框和对齐
-        for col_num in range(1, len(headers) + 1):
-            cell = ws.cell(row=ws.max_row, column=col_num)
-            cell.border = border
-            cell.alignment = center_alignment
-
-    # 设置列宽
-    ws.column_dimensions['A'].width = 25
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 20
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 12
-    ws.column_dimensions['F'].width = 12
-
-    # 保存到内存
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    filename = f"{export_date.strftime('%Y%m%d')}_考勤记录.xlsx"
-
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+        ])
+
+    columns = [('课程名称', 25), ('上课时间', 15), ('上课地点', 20),
+               ('应到人数', 12), ('实到人数', 12), ('到勤率', 12)]
+    filename_stem = f"{export_date.strftime('%Y%m%d')}_考勤记录"
+    if fmt != 'xlsx':
+        return send_table(fmt, filename_stem, [header for header, _ in columns], rows)
+
+    export = XlsxExport(f"{export_date.strftime('%Y-%m-%d')}考勤", columns)
+    export.title(f"{export_date.strftime('%Y年%m月%d日')} 课程考勤记录")
+    export.blank()
+    export.header()
+    export.rows(rows)
+    return export.send(f'{filename_stem}.xlsx')
 
 
 @attendance_bp.route('/export_week')
 @login_required
 def export_week():
-    """导出当周的考勤记录"""
+    """导出当周的考勤记录（format=xlsx/csv/columnar）"""
+    fmt = get_export_format(request.args)
+    if fmt is None:
+        flash('不支持的导出格式', 'error')
+        return redirect(url_for('attendance.index'))
+
     # 获取日期参数
     date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
     try:
@@ -390,147 +261,148 @@ def export_week():
     week_start = current_date - timedelta(days=current_date.weekday())
     week_end = week_start + timedelta(days=6)
 
-    # 创建工作簿
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "周考勤统计"
-
-    # 定义样式
-    header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    header_font = Font(bold=True, color='FFFFFF', size=11)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    center_alignment = Alignment(horizontal='center', vertical='center')
-
-    # 写入标题
-    ws.merge_cells('A1:G1')
-    ws['A1'] = f"{week_start.strftime('%Y年%m月%d日')} - {week_end.strftime('%Y年%m月%d日')} 课程考勤统计"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = center_alignment
-
-    # 遍历一周的每一天
-    current_row = 3
+    # 遍历一周的每一天，按天汇总课程数据
     total_students = Student.query.count()
+    weekdays = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+    sections = []  # [(日期, 星期, 课程数据行)]
 
     for day_offset in range(7):
         current_day = week_start + timedelta(days=day_offset)
 
-        # 获取当天的课程
-        # 根据星期几查询课程
-        weekdays = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
-        current_weekday = weekdays[current_day.weekday()]
-        all_courses = Course.query.filter(
-            Course.course_time.like(f'{current_weekday}%')
-        ).order_by(Course.course_time).all()
-
-        # 根据周次过滤课程
-        day_week = get_week_number(current_day)
-        courses = []
-        if day_week:
-            for course in all_courses:
-                if course.is_teaching_week(day_week):
-                    courses.append(course)
-        else:
-            courses = all_courses
+        # 获取当天的课程（按星期和周次查询）
+        courses = get_courses_on_date(current_day)
 
         if not courses:
             continue
 
-        # 写入日期标题
-        ws.merge_cells(f'A{current_row}:G{current_row}')
-        date_cell = ws.cell(row=current_row, column=1)
-        date_cell.value = f"{current_day.strftime('%Y年%m月%d日')} {current_weekday}"
-        date_cell.font = Font(bold=True, size=12)
-        date_cell.fill = PatternFill(start_color='D9E1F2', end_color='D9E1F2', fill_type='solid')
-        date_cell.alignment = center_alignment
-        current_row += 1
-
-        # 写入表头
-        headers = ['课程名称', '上课时间', '上课地点', '应到', '实到', '请假', '旷课']
-        ws.append(headers)
-
-        header_row = current_row
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=header_row, column=col_num)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_alignment
-            cell.border = border
-        current_row += 1
-
-        # 写入课程数据
+        day_summary = get_day_summary([course.course_id for course in courses], current_day)
+        rows = []
         for course in courses:
             # 获取该课程的考勤统计
-            present = Attendance.query.filter_by(
-                course_id=course.course_id,
-                attendance_date=current_day,
-                attendance_type='到课'
-            ).count()
-
-            leave = Attendance.query.filter_by(
-                course_id=course.course_id,
-                attendance_date=current_day,
-                attendance_type='请假'
-            ).count()
-
-            absent = Attendance.query.filter_by(
-                course_id=course.course_id,
-                attendance_date=current_day,
-                attendance_type='旷课'
-            ).count()
+            counts = day_summary[course.course_id]
 
             # 提取上课时间
             time_parts = course.course_time.split()
             time_str = time_parts[1] if len(time_parts) > 1 else ''
 
-            row_data = [
+            rows.append([
                 course.course_name,
                 time_str,
                 course.course_place,
                 total_students,
-                present,
-                leave,
-                absent
-            ]
-            ws.append(row_data)
+                counts['present'],
+                counts['leave'],
+                counts['absent']
+            ])
+        sections.append((current_day, weekdays[current_day.weekday()], rows))
+
+    columns = [('课程名称', 25), ('上课时间', 15), ('上课地点', 20),
+               ('应到', 10), ('实到', 10), ('请假', 10), ('旷课', 10)]
+    filename_stem = f"{week_start.strftime('%Y%m%d')}-{week_end.strftime('%Y%m%d')}_周考勤统计"
+    if fmt != 'xlsx':
+        # 表格格式没有分节标题，每行带上日期
+        return send_table(
+            fmt, filename_stem,
+            ['日期'] + [header for header, _ in columns],
+            ([day] + row for day, _, rows in sections for row in rows)
+        )
+
+    export = XlsxExport("周考勤统计", columns)
+    export.title(f"{week_start.strftime('%Y年%m月%d日')} - {week_end.strftime('%Y年%m月%d日')} 课程考勤统计")
+    export.blank()
+
+    for current_day, current_weekday, rows in sections:
+        # 写入日期标题、表头和课程数据
+        export.title(f"{current_day.strftime('%Y年%m月%d日')} {current_weekday}", style='export_section')
+        export.header()
+        export.rows(rows)
+        # 空行
+        export.blank()
 
-            # 设置边框和对齐
-            for col_num in range(1, len(headers) + 1):
-                cell = ws.cell(row=current_row, column=col_num)
-                cell.border = border
-                cell.alignment = center_alignment
+    return export.send(f'{filename_stem}.xlsx')
 
-            current_row += 1
 
-        # 空行
-        current_row += 1
-
-    # 设置列宽
-    ws.column_dimensions['A'].width = 25
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 20
-    ws.column_dimensions['D'].width = 10
-    ws.column_dimensions['E'].width = 10
-    ws.column_dimensions['F'].width = 10
-    ws.column_dimensions['G'].width = 10
-
-    # 保存到内存
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    filename = f"{week_start.strftime('%Y%m%d')}-{week_end.strftime('%Y%m%d')}_周考勤统计.xlsx"
-
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+@attendance_bp.route('/export_records')
+@login_required
+def export_records():
+    """
+    导出考勤明细（每个学生每次课一行，format=xlsx/csv/columnar）
+
+    筛选条件与历史考勤页面相同（start_date/end_date/course_id，均可为空），
+    不带条件时导出整张考勤表，供数据仓库定期拉取。
+    """
+    fmt = get_export_format(request.args)
+    if fmt is None:
+        flash('不支持的导出格式', 'error')
+        return redirect(url_for('attendance.history'))
+
+    filters = _parse_history_filters(request.args)
+    query = db.session.query(
+        Attendance.attendance_date,
+        Attendance.course_id,
+        Course.course_name,
+        Attendance.student_id,
+        Student.student_name,
+        Attendance.attendance_type,
+        Attendance.late_minutes,
+        Attendance.attendance_note,
+        Attendance.create_time
+    ).join(Course, Attendance.course_id == Course.course_id)\
+     .join(Student, Attendance.student_id == Student.student_id)
+    query = _apply_history_filters(query, Attendance.attendance_date, Attendance.course_id, filters)
+    rows = query.order_by(Attendance.attendance_date, Attendance.course_id, Attendance.student_id)\
+        .execution_options(yield_per=YIELD_PER)
+
+    columns = [('考勤日期', 12), ('课程编号', 12), ('课程名称', 25), ('学号', 15), ('姓名', 12),
+               ('考勤状态', 10), ('迟到分钟', 10), ('备注', 30), ('记录时间', 20)]
+    filename_stem = f"考勤明细_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if fmt != 'xlsx':
+        return send_table(fmt, filename_stem, [header for header, _ in columns], rows)
+
+    export = XlsxExport("考勤明细", columns)
+    export.header()
+    for row in rows:
+        export.row([
+            row.attendance_date.strftime('%Y-%m-%d'),
+            row.course_id,
+            row.course_name,
+            row.student_id,
+            row.student_name,
+            row.attendance_type,
+            row.late_minutes or 0,
+            row.attendance_note or '',
+            format_datetime(row.create_time)
+        ], style='export_text', styles={5: STATUS_STYLES.get(row.attendance_type, 'export_text')})
+    return export.send(f'{filename_stem}.xlsx')
+
+
+def _parse_history_filters(args):
+    """
+    解析历史考勤页面的筛选参数（无效日期按未填写处理）
+
+    Returns:
+        dict: {'start_date', 'end_date', 'course_id'}
+    """
+    filters = {'start_date': None, 'end_date': None, 'course_id': args.get('course_id', '')}
+    for key in ('start_date', 'end_date'):
+        value = args.get(key, '')
+        if value:
+            try:
+                filters[key] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                pass
+    return filters
+
+
+def _apply_history_filters(query, date_column, course_column, filters):
+    """把历史考勤筛选条件应用到查询上（列表页面和明细导出共用）"""
+    if filters['start_date']:
+        query = query.filter(date_column >= filters['start_date'])
+    if filters['end_date']:
+        query = query.filter(date_column <= filters['end_date'])
+    if filters['course_id']:
+        query = query.filter(course_column == filters['course_id'])
+    return query
 
 
 @attendance_bp.route('/history')
@@ -542,38 +414,21 @@ def history():
     end_date_str = request.args.get('end_date', '')
     course_id = request.args.get('course_id', '')
 
-    # 构建查询
+    # 构建查询（读取考勤日汇总表，每行即一个 日期+课程）
     query = db.session.query(
-        Attendance.attendance_date,
+        AttendanceDailyRollup.attendance_date,
         Course.course_name,
         Course.course_id,
-        func.count(Attendance.attendance_id).label('total'),
-        func.sum(case((Attendance.attendance_type == '到课', 1), else_=0)).label('present'),
-        func.sum(case((Attendance.attendance_type == '请假', 1), else_=0)).label('leave'),
-        func.sum(case((Attendance.attendance_type == '旷课', 1), else_=0)).label('absent')
-    ).join(Course).group_by(
-        Attendance.attendance_date,
-        Course.course_name,
-        Course.course_id
-    ).order_by(Attendance.attendance_date.desc())
+        AttendanceDailyRollup.total,
+        AttendanceDailyRollup.present,
+        AttendanceDailyRollup.leave,
+        AttendanceDailyRollup.absent
+    ).join(Course).order_by(AttendanceDailyRollup.attendance_date.desc(), Course.course_name)
 
     # 应用过滤条件
-    if start_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(Attendance.attendance_date >= start_date)
-        except ValueError:
-            pass
-
-    if end_date_str:
-        try:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(Attendance.attendance_date <= end_date)
-        except ValueError:
-            pass
-
-    if course_id:
-        query = query.filter(Course.course_id == course_id)
+    query = _apply_history_filters(
+        query, AttendanceDailyRollup.attendance_date, Course.course_id, _parse_history_filters(request.args)
+    )
 
     # 分页
     page = request.args.get('page', 1, type=int)
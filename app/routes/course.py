@@ -1,14 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required
-from app import db
+from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import joinedload
+from app import db, cache, export_jobs
 from app.models import Course, Attendance, Student
+from app.utils.ics_import import import_courses
+from app.utils.listing import keyset_paginate, search_filter
+from app.utils.lookups import get_semesters
+from app.utils.attendance_stats import course_totals_subquery, get_course_rates, get_status_breakdown
+from app.utils.week_helper import get_week_number, get_week_date_range
 from werkzeug.utils import secure_filename
-from icalendar import Calendar
 from datetime import datetime, date, timedelta
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
-from io import BytesIO
-import re
+from app.utils.export import (
+    XlsxExport, STATUS_STYLES, YIELD_PER, format_datetime, get_export_format, send_table, write_table, export_filename
+)
 
 # 创建课程管理蓝图
 course_bp = Blueprint('course', __name__)
@@ -21,96 +26,53 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def _format_week_range(weeks):
-    """
-    将周次列表转换为范围字符串
-    
-    Args:
-        weeks: 周次列表（已排序）
-        
-    Returns:
-        str: 周次范围字符串（如：1-8,13,15,17 或 9-16）
-    """
-    if not weeks:
-        return None
-    
-    ranges = []
-    start = weeks[0]
-    end = weeks[0]
-    
-    for i in range(1, len(weeks)):
-        if weeks[i] == end + 1:
-            end = weeks[i]
-        else:
-            if start == end:
-                ranges.append(str(start))
-            else:
-                ranges.append(f"{start}-{end}")
-            start = weeks[i]
-            end = weeks[i]
-    
-    # 处理最后一个范围
-    if start == end:
-        ranges.append(str(start))
-    else:
-        ranges.append(f"{start}-{end}")
-    
-    return ','.join(ranges)
-
-
 @course_bp.route('/')
 @login_required
 def index():
     """课程列表页面"""
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '', type=str)
     semester = request.args.get('semester', '', type=str)
+    sort = request.args.get('sort', '', type=str)
     
     # 构建查询
     query = Course.query
     
     # 搜索条件
     if search:
-        query = query.filter(
-            (Course.course_id.contains(search)) |
-            (Course.course_name.contains(search)) |
-            (Course.teacher_name.contains(search))
-        )
+        query = query.filter(search_filter([Course.course_id, Course.course_name, Course.teacher_name], search))
     
     # 学期筛选
     if semester:
         query = query.filter(Course.semester == semester)
     
-    # 分页查询
-    pagination = query.order_by(Course.course_id).paginate(
-        page=page,
-        per_page=10,
-        error_out=False
+    # 排序：默认按课程代码；sort=rate 按到勤率从高到低（在SQL中排序后再分页）
+    if sort == 'rate':
+        totals = course_totals_subquery()
+        query = query.outerjoin(totals, totals.c.course_id == Course.course_id)
+        keys = [(func.coalesce(totals.c.rate, 0), True), (Course.course_id, False)]
+    else:
+        keys = [(Course.course_id, False)]
+    
+    # 游标分页
+    pagination = keyset_paginate(
+        query,
+        keys,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=10
     )
     
     courses = pagination.items
     
-    # 为每个课程计算到勤率
+    # 当前页课程的到勤率（一次分组查询）
+    rates = get_course_rates([course.course_id for course in courses])
     for course in courses:
-        total_attendances = Attendance.query.filter_by(course_id=course.course_id).count()
-        if total_attendances > 0:
-            normal_attendances = Attendance.query.filter_by(
-                course_id=course.course_id,
-                attendance_type='正常'
-            ).count()
-            course.attendance_rate = round((normal_attendances / total_attendances) * 100, 1)
-        else:
-            course.attendance_rate = 0
-        course.total_records = total_attendances
-    
-    # 获取所有学期选项
-    semesters = db.session.query(Course.semester)\
-        .distinct()\
-        .filter(Course.semester.isnot(None))\
-        .order_by(Course.semester.desc())\
-        .all()
-    semesters = [s[0] for s in semesters]
+        course.attendance_rate = rates[course.course_id]['rate']
+        course.total_records = rates[course.course_id]['total']
+    
+    # 所有学期选项（缓存）
+    semesters = get_semesters()
     
     return render_template(
         'course/index.html',
@@ -118,6 +80,7 @@ def index():
         pagination=pagination,
         search=search,
         semester=semester,
+        sort=sort,
         semesters=semesters
     )
 
@@ -143,179 +106,222 @@ def import_ics():
             return redirect(url_for('course.import_ics'))
         
         try:
-            # 解析ICS文件
-            cal = Calendar.from_ical(file.read())
-            
-            # 用于存储课程信息的字典（按课程代码分组）
-            courses_dict = {}
-            
-            # 遍历所有事件
-            for component in cal.walk():
-                if component.name == "VEVENT":
-                    summary = str(component.get('summary'))
-                    description = str(component.get('description', ''))
-                    location = str(component.get('location', ''))
-                    dtstart = component.get('dtstart').dt
-                    dtend = component.get('dtend').dt
-                    
-                    # 从描述中提取课程代码和教师
-                    course_code_match = re.search(r'课程代码:\s*(\w+)', description)
-                    teacher_match = re.search(r'教师:\s*([^\s]+)', description)
-                    week_match = re.search(r'周次:\s*(\d+)', description)
-                    
-                    if course_code_match:
-                        course_code = course_code_match.group(1)
-                        teacher_name = teacher_match.group(1) if teacher_match else '未知'
-                        week_number = int(week_match.group(1)) if week_match else None
-                        
-                        # 提取课程名称（移除必修/选修标识）
-                        course_name = re.sub(r'[（(](必修课|选修课|限选课)[）)]', '', summary).strip()
-                        
-                        # 提取上课时间信息
-                        if isinstance(dtstart, datetime):
-                            weekday_names = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
-                            weekday = weekday_names[dtstart.weekday()]
-                            start_time = dtstart.strftime('%H:%M')
-                            end_time = dtend.strftime('%H:%M')
-                            course_time = f"{weekday} {start_time}-{end_time}"
-                        else:
-                            course_time = "待定"
-                        
-                        # 为每个"课程代码+上课时间"创建唯一标识
-                        # 这样一周多次上课的课程会创建多条记录
-                        # 格式：课程代码-星期-时间（如：CS101-1-0800）
-                        weekday_num = dtstart.weekday() + 1 if isinstance(dtstart, datetime) else 0
-                        time_code = start_time.replace(':', '') if isinstance(dtstart, datetime) else '0000'
-                        unique_key = f"{course_code}-{weekday_num}-{time_code}"
-                        
-                        # 如果该课程+时间组合不存在，则添加
-                        if unique_key not in courses_dict:
-                            courses_dict[unique_key] = {
-                                'course_id': unique_key,  # 使用唯一标识作为ID
-                                'course_name': course_name,
-                                'teacher_name': teacher_name,
-                                'course_time': course_time,
-                                'course_place': location,
-                                'semester': '2025-2026学年第一学期',  # 从文件名或描述中提取
-                                'weeks': set()  # 用于收集所有周次
-                            }
-                        
-                        # 收集周次信息
-                        if week_number:
-                            courses_dict[unique_key]['weeks'].add(week_number)
-            
-            # 处理周次信息，转换为week_range字符串
-            for course_data in courses_dict.values():
-                weeks = sorted(course_data.pop('weeks', set()))
-                if weeks:
-                    # 将周次列表转换为范围字符串
-                    week_range = _format_week_range(weeks)
-                    course_data['week_range'] = week_range
-                else:
-                    course_data['week_range'] = None
-            
-            # 导入数据库
-            success_count = 0
-            update_count = 0
-            
-            for course_data in courses_dict.values():
-                existing_course = Course.query.filter_by(course_id=course_data['course_id']).first()
-                
-                if existing_course:
-                    # 更新现有课程
-                    existing_course.course_name = course_data['course_name']
-                    existing_course.teacher_name = course_data['teacher_name']
-                    existing_course.course_time = course_data['course_time']
-                    existing_course.course_place = course_data['course_place']
-                    existing_course.semester = course_data['semester']
-                    existing_course.week_range = course_data['week_range']
-                    update_count += 1
-                else:
-                    # 创建新课程
-                    course = Course(**course_data)
-                    db.session.add(course)
-                    success_count += 1
-            
+            # 逐个事件解析，批量写入课程和上课时段（同一事务）
+            report = import_courses(file.stream)
             db.session.commit()
-            
-            if update_count > 0:
-                flash(f'导入成功！新增 {success_count} 门课程，更新 {update_count} 门课程', 'success')
-            else:
-                flash(f'导入成功！共导入 {success_count} 门课程', 'success')
-            
-            return redirect(url_for('course.index'))
-            
+            cache.invalidate('dashboard', 'lookups')
         except Exception as e:
             db.session.rollback()
             flash(f'导入失败：{str(e)}', 'error')
             return redirect(url_for('course.import_ics'))
+        
+        if not report.courses:
+            flash(f'没有可导入的课程（共 {report.event_count} 个事件，跳过 {len(report.skipped)} 个）', 'warning')
+        elif report.skipped or report.unparsed_count:
+            flash(f'导入完成！新增 {report.created_count} 门课程，更新 {report.updated_count} 门课程，'
+                  f'跳过 {len(report.skipped)} 个事件，{report.unparsed_count} 门课程的上课时间未能解析', 'warning')
+        else:
+            flash(f'导入成功！新增 {report.created_count} 门课程，更新 {report.updated_count} 门课程', 'success')
+        return render_template('course/import.html', report=report)
     
     return render_template('course/import.html')
 
 
+# 课程详情页每页显示的考勤记录数
+DETAIL_PAGE_SIZE = 50
+
+
 @course_bp.route('/detail/<course_id>')
 @login_required
 def detail(course_id):
-    """课程详情和考勤统计"""
+    """
+    课程详情和考勤统计
+
+    考勤记录按 (考勤日期倒序, 学号) 键集分页（after_date/after_student 为上一页最后一条），
+    可按日期（date）或周次（week）筛选；view=matrix 时显示 学生×上课日期 矩阵。
+    """
     course = Course.query.get_or_404(course_id)
     
-    # 获取日期筛选参数
+    # 获取筛选参数
     filter_date = request.args.get('date', '', type=str)
-    
-    # 基础查询
-    attendance_query = Attendance.query.filter_by(course_id=course_id)
-    
-    # 日期筛选
+    week = request.args.get('week', type=int)
+    view = request.args.get('view', 'list', type=str)
+    after_date_str = request.args.get('after_date', '', type=str)
+    after_student = request.args.get('after_student', '', type=str)
+    
+    # 获取所有考勤日期（用于日期和周次筛选）
+    attendance_dates = [
+        row[0] for row in db.session.query(Attendance.attendance_date)
+        .filter_by(course_id=course_id)
+        .distinct()
+        .order_by(Attendance.attendance_date.desc())
+    ]
+    attendance_weeks = sorted({w for w in map(get_week_number, attendance_dates) if w}, reverse=True)
+    
+    # 确定日期窗口：指定日期 > 指定周次 > 全部日期（矩阵视图默认最近有记录的一周）
+    start_date = end_date = None
     if filter_date:
         try:
-            target_date = datetime.strptime(filter_date, '%Y-%m-%d').date()
-            attendance_query = attendance_query.filter(Attendance.attendance_date == target_date)
+            start_date = end_date = datetime.strptime(filter_date, '%Y-%m-%d').date()
         except ValueError:
-            pass
-    
-    # 获取考勤记录
-    attendances = attendance_query.order_by(Attendance.attendance_date.desc(), Attendance.student_id).all()
-    
-    # 统计信息
-    total_records = Attendance.query.filter_by(course_id=course_id).count()
-    
-    stats = {
-        'total': total_records,
-        'normal': Attendance.query.filter_by(course_id=course_id, attendance_type='正常').count(),
-        'late': Attendance.query.filter_by(course_id=course_id, attendance_type='迟到').count(),
-        'early_leave': Attendance.query.filter_by(course_id=course_id, attendance_type='早退').count(),
-        'absent': Attendance.query.filter_by(course_id=course_id, attendance_type='缺席').count(),
-        'leave': Attendance.query.filter_by(course_id=course_id, attendance_type='请假').count(),
-    }
-    
-    # 计算出勤率
-    if total_records > 0:
-        stats['attendance_rate'] = round((stats['normal'] / total_records) * 100, 1)
+            filter_date = ''
+    if start_date is None and view == 'matrix' and not week and attendance_weeks:
+        week = attendance_weeks[0]
+    if start_date is None and week:
+        start_date, end_date = get_week_date_range(week)
+    
+    # 考勤记录只取页面需要的列（元组，不创建ORM对象）
+    query = db.session.query(
+        Attendance.student_id,
+        Student.student_name,
+        Attendance.attendance_date,
+        Attendance.attendance_type,
+        Attendance.late_minutes,
+        Attendance.attendance_note
+    ).join(Student, Attendance.student_id == Student.student_id)\
+     .filter(Attendance.course_id == course_id)
+    if start_date is not None:
+        query = query.filter(Attendance.attendance_date.between(start_date, end_date))
+    
+    attendances = []
+    matrix = None
+    next_cursor = None
+    if view == 'matrix':
+        matrix = _build_attendance_matrix(query.order_by(Attendance.student_id, Attendance.attendance_date))
     else:
-        stats['attendance_rate'] = 0
-    
-    # 获取所有考勤日期（用于日期筛选）
-    attendance_dates = db.session.query(Attendance.attendance_date)\
-        .filter_by(course_id=course_id)\
-        .distinct()\
-        .order_by(Attendance.attendance_date.desc())\
-        .all()
-    attendance_dates = [d[0] for d in attendance_dates]
+        # 键集分页：取上一页最后一条之后的记录
+        if after_date_str and after_student:
+            try:
+                after_date = datetime.strptime(after_date_str, '%Y-%m-%d').date()
+                query = query.filter(or_(
+                    Attendance.attendance_date < after_date,
+                    and_(Attendance.attendance_date == after_date, Attendance.student_id > after_student)
+                ))
+            except ValueError:
+                pass
+        attendances = query.order_by(Attendance.attendance_date.desc(), Attendance.student_id)\
+            .limit(DETAIL_PAGE_SIZE + 1).all()
+        if len(attendances) > DETAIL_PAGE_SIZE:
+            attendances = attendances[:DETAIL_PAGE_SIZE]
+            last = attendances[-1]
+            next_cursor = {'after_date': last.attendance_date.strftime('%Y-%m-%d'), 'after_student': last.student_id}
+    
+    # 统计信息（按状态一次分组统计）
+    stats = get_status_breakdown(course_id=course_id)
     
     return render_template(
         'course/detail.html',
         course=course,
         attendances=attendances,
+        matrix=matrix,
+        view=view,
+        next_cursor=next_cursor,
+        is_first_page=not (after_date_str and after_student),
         stats=stats,
         filter_date=filter_date,
-        attendance_dates=attendance_dates
+        week=week,
+        attendance_dates=attendance_dates,
+        attendance_weeks=attendance_weeks
+    )
+
+
+def _build_attendance_matrix(rows):
+    """
+    把 (学号, 姓名, 日期, 状态, ...) 元组透视为 学生×上课日期 矩阵
+
+    Args:
+        rows: 按学号、日期排序的考勤元组
+
+    Returns:
+        dict: {'dates': [日期, ...], 'students': [(学号, 姓名, [状态或None, ...]), ...]}
+    """
+    cells = {}
+    names = {}
+    dates = set()
+    for row in rows:
+        names[row.student_id] = row.student_name
+        dates.add(row.attendance_date)
+        cells[(row.student_id, row.attendance_date)] = row.attendance_type
+
+    dates = sorted(dates)
+    students = [
+        (student_id, name, [cells.get((student_id, d)) for d in dates])
+        for student_id, name in names.items()
+    ]
+    return {'dates': dates, 'students': students}
+
+
+# 课程考勤导出的列（表头, Excel列宽）
+ATTENDANCE_EXPORT_COLUMNS = [
+    ("学号", 15), ("姓名", 12), ("考勤日期", 15), ("考勤状态", 12),
+    ("迟到分钟", 12), ("备注", 30), ("记录时间", 20)
+]
+
+
+def _course_attendance_query(course_id, target_date=None):
+    """课程考勤导出查询（只取导出需要的列，姓名随查询一起联表取出）"""
+    query = db.session.query(
+        Attendance.student_id,
+        Student.student_name,
+        Attendance.attendance_date,
+        Attendance.attendance_type,
+        Attendance.late_minutes,
+        Attendance.attendance_note,
+        Attendance.create_time
+    ).join(Student, Attendance.student_id == Student.student_id)\
+     .filter(Attendance.course_id == course_id)
+    if target_date:
+        query = query.filter(Attendance.attendance_date == target_date)
+    return query
+
+
+def _course_attendance_xlsx(course, rows):
+    """生成课程考勤Excel"""
+    export = XlsxExport("考勤记录", ATTENDANCE_EXPORT_COLUMNS)
+    export.title(f"《{course.course_name}》考勤记录")
+    export.title(
+        f"教师：{course.teacher_name}  |  上课时间：{course.course_time}  |  地点：{course.course_place}",
+        style='export_info'
     )
+    export.blank()
+    export.header()
+    
+    for row in rows:
+        # 考勤状态单元格按状态着色
+        export.row([
+            row.student_id,
+            row.student_name,
+            row.attendance_date.strftime('%Y-%m-%d'),
+            row.attendance_type,
+            row.late_minutes or 0,
+            row.attendance_note or '-',
+            format_datetime(row.create_time)
+        ], style='export_text', styles={3: STATUS_STYLES.get(row.attendance_type, 'export_text')})
+    return export
+
+
+def _render_course_attendance(job, output):
+    """后台导出任务：课程全部考勤记录"""
+    course = Course.query.get(job.params['course_id'])
+    query = _course_attendance_query(course.course_id)
+    job.total = query.count()
+    rows = query.order_by(Attendance.attendance_date, Attendance.student_id)\
+        .execution_options(yield_per=YIELD_PER)
+    rows = job.track(rows)
+    if job.params['format'] != 'xlsx':
+        write_table(job.params['format'], output, [header for header, _ in ATTENDANCE_EXPORT_COLUMNS], rows)
+    else:
+        _course_attendance_xlsx(course, rows).save(output)
 
 
 @course_bp.route('/export_attendance')
 @login_required
 def export_attendance():
-    """导出课程考勤数据"""
+    """
+    导出课程考勤数据（format=xlsx/csv/columnar）
+
+    指定日期时直接下载；不指定日期时导出整个学期的记录，数据量大，提交为后台导出任务。
+    """
     course_id = request.args.get('course_id', '', type=str)
     filter_date = request.args.get('date', '', type=str)
     
@@ -325,106 +331,43 @@ def export_attendance():
     
     course = Course.query.get_or_404(course_id)
     
-    # 构建查询
-    query = Attendance.query.filter_by(course_id=course_id)
+    fmt = get_export_format(request.args)
+    if fmt is None:
+        flash('不支持的导出格式', 'error')
+        return redirect(url_for('course.detail', course_id=course_id))
     
     # 日期筛选
+    target_date = None
     filename_suffix = ''
     if filter_date:
         try:
             target_date = datetime.strptime(filter_date, '%Y-%m-%d').date()
-            query = query.filter(Attendance.attendance_date == target_date)
             filename_suffix = f'_{filter_date}'
         except ValueError:
             pass
     
-    attendances = query.order_by(Attendance.attendance_date, Attendance.student_id).all()
-    
-    if not attendances:
+    query = _course_attendance_query(course_id, target_date)
+    if not db.session.query(query.exists()).scalar():
         flash('没有考勤数据可导出！', 'warning')
         return redirect(url_for('course.detail', course_id=course_id))
     
-    # 创建Excel工作簿
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "考勤记录"
-    
-    # 设置表头样式
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # 写入课程信息
-    ws.merge_cells('A1:G1')
-    title_cell = ws['A1']
-    title_cell.value = f"《{course.course_name}》考勤记录"
-    title_cell.font = Font(bold=True, size=14)
-    title_cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    ws.merge_cells('A2:G2')
-    info_cell = ws['A2']
-    info_cell.value = f"教师：{course.teacher_name}  |  上课时间：{course.course_time}  |  地点：{course.course_place}"
-    info_cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # 写入表头
-    headers = ["学号", "姓名", "考勤日期", "考勤状态", "迟到分钟", "备注", "记录时间"]
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col_num)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-    
-    # 设置列宽
-    ws.column_dimensions['A'].width = 15  # 学号
-    ws.column_dimensions['B'].width = 12  # 姓名
-    ws.column_dimensions['C'].width = 15  # 考勤日期
-    ws.column_dimensions['D'].width = 12  # 考勤状态
-    ws.column_dimensions['E'].width = 12  # 迟到分钟
-    ws.column_dimensions['F'].width = 30  # 备注
-    ws.column_dimensions['G'].width = 20  # 记录时间
-    
-    # 写入数据
-    data_alignment = Alignment(horizontal="left", vertical="center")
-    for row_num, attendance in enumerate(attendances, 5):
-        ws.cell(row=row_num, column=1).value = attendance.student_id
-        ws.cell(row=row_num, column=2).value = attendance.student.student_name
-        ws.cell(row=row_num, column=3).value = attendance.attendance_date.strftime('%Y-%m-%d')
-        
-        # 考勤状态单元格添加颜色
-        status_cell = ws.cell(row=row_num, column=4)
-        status_cell.value = attendance.attendance_type
-        if attendance.attendance_type == '正常':
-            status_cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-        elif attendance.attendance_type == '迟到':
-            status_cell.fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-        elif attendance.attendance_type == '缺席':
-            status_cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        
-        ws.cell(row=row_num, column=5).value = attendance.late_minutes if attendance.late_minutes else 0
-        ws.cell(row=row_num, column=6).value = attendance.attendance_note or '-'
-        ws.cell(row=row_num, column=7).value = attendance.create_time.strftime('%Y-%m-%d %H:%M:%S') if attendance.create_time else '-'
-        
-        # 设置数据行对齐
-        for col_num in range(1, 8):
-            ws.cell(row=row_num, column=col_num).alignment = data_alignment
-    
     # 生成文件名
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'{course.course_name}_考勤记录{filename_suffix}_{timestamp}.xlsx'
-    
-    # 保存到内存
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    # 返回文件
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    filename_stem = f'{course.course_name}_考勤记录{filename_suffix}_{timestamp}'
+    
+    # 整个学期的导出交给后台任务
+    if target_date is None:
+        job = export_jobs.submit(
+            'course_attendance', {'course_id': course_id, 'format': fmt},
+            _render_course_attendance, *export_filename(fmt, filename_stem)
+        )
+        return redirect(url_for('exports.status', job_id=job.id))
+    
+    rows = query.order_by(Attendance.attendance_date, Attendance.student_id)\
+        .execution_options(yield_per=YIELD_PER)
+    if fmt != 'xlsx':
+        return send_table(fmt, filename_stem, [header for header, _ in ATTENDANCE_EXPORT_COLUMNS], rows)
+    return _course_attendance_xlsx(course, rows).send(f'{filename_stem}.xlsx')
 
 
 @course_bp.route('/delete/<course_id>', methods=['POST'])
@@ -437,6 +380,7 @@ def delete(course_id):
     try:
         db.session.delete(course)
         db.session.commit()
+        cache.invalidate('dashboard', 'lookups')
         flash(f'课程《{course_name}》删除成功！', 'success')
     except Exception as e:
         db.session.rollback()
@@ -451,8 +395,11 @@ def today_attendance():
     """查看今日所有课程考勤"""
     today = date.today()
     
-    # 获取今日所有考勤记录
-    attendances = Attendance.query.filter_by(attendance_date=today)\
+    # 获取今日所有考勤记录（学生和课程随查询一起联表取出）
+    attendances = Attendance.query.options(
+        joinedload(Attendance.student),
+        joinedload(Attendance.course)
+    ).filter_by(attendance_date=today)\
         .order_by(Attendance.course_id, Attendance.student_id)\
         .all()
     
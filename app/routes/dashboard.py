@@ -1,20 +1,27 @@
 """
 数据概览路由模块
 """
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, request
 from flask_login import login_required
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, literal, cast, null, union_all, Integer, String
 
-from app import db
+from app import db, cache
 from app.models.student import Student
 from app.models.course import Course
 from app.models.attendance import Attendance
+from app.models.attendance_rollup import AttendanceDailyRollup
 from app.models.leave_record import LeaveRecord
-from app.utils.week_helper import get_current_week, get_week_number
+from app.utils.week_helper import FIRST_WEEK_START, get_current_week, get_week_number
+from app.utils.course_schedule import count_courses_by_weekday
+from app.utils.leave_days import count_leaves_on
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# 考勤趋势默认天数和最长天数
+DEFAULT_TREND_DAYS = 7
+MAX_TREND_DAYS = 366
+
 
 @dashboard_bp.route('/')
 @login_required
@@ -48,13 +55,50 @@ def api_stats():
 @dashboard_bp.route('/api/charts')
 @login_required
 def api_charts():
-    """API接口：获取图表数据"""
-    chart_data = get_chart_data()
+    """API接口：获取图表数据（days=7/30/semester 指定考勤趋势的时间窗口）"""
+    start_date, end_date = get_trend_window(request.args.get('days', DEFAULT_TREND_DAYS))
+    chart_data = get_chart_data((end_date - start_date).days + 1)
     return jsonify(chart_data)
 
 
+@dashboard_bp.route('/api/activities')
+@login_required
+def api_activities():
+    """API接口：分页获取活动流（before/before_type/before_id 为上一页最后一条活动）"""
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    before = request.args.get('before', '')
+    before_kind = request.args.get('before_type') or None
+    before_id = request.args.get('before_id', type=int)
+
+    try:
+        before = datetime.fromisoformat(before) if before else None
+    except ValueError:
+        return jsonify({'error': '无效的时间格式'}), 400
+    if before_kind not in (None, 'attendance', 'leave') or (before_kind and before_id is None):
+        return jsonify({'error': '无效的分页游标'}), 400
+
+    activities = get_recent_activities(limit, before, before_kind, before_id)
+    for activity in activities:
+        activity['time'] = activity['time'].isoformat() if activity['time'] else None
+
+    next_cursor = None
+    if len(activities) == limit:
+        last = activities[-1]
+        next_cursor = {'before': last['time'], 'before_type': last['type'], 'before_id': last['id']}
+
+    return jsonify({'activities': activities, 'next': next_cursor})
+
+
+@dashboard_bp.route('/api/cache')
+@login_required
+def api_cache():
+    """API接口：获取统计缓存的命中情况"""
+    return jsonify(cache.stats())
+
+
+@cache.memoize('dashboard')
 def get_basic_stats():
-    """获取基础统计数据"""
+    """获取基础统计数据（带缓存，考勤/请假/学生/课程写操作后失效）"""
     today = date.today()
     current_week = get_current_week()
 
@@ -64,35 +108,27 @@ def get_basic_stats():
     # 课程统计
     total_courses = Course.query.count()
 
-    # 今日考勤统计
-    today_attendance = Attendance.query.filter_by(attendance_date=today).count()
-    today_present = Attendance.query.filter_by(
-        attendance_date=today,
-        attendance_type='到课'
-    ).count()
-    today_absent = Attendance.query.filter_by(
-        attendance_date=today,
-        attendance_type='旷课'
-    ).count()
-    today_leave = Attendance.query.filter_by(
-        attendance_date=today,
-        attendance_type='请假'
-    ).count()
+    # 今日考勤统计（读取考勤日汇总表）
+    today_attendance, today_present, today_absent, today_leave = db.session.query(
+        func.coalesce(func.sum(AttendanceDailyRollup.total), 0),
+        func.coalesce(func.sum(AttendanceDailyRollup.present), 0),
+        func.coalesce(func.sum(AttendanceDailyRollup.absent), 0),
+        func.coalesce(func.sum(AttendanceDailyRollup.leave), 0)
+    ).filter(AttendanceDailyRollup.attendance_date == today).one()
 
     # 本周考勤统计
     week_start = today - timedelta(days=today.weekday())
     week_end = week_start + timedelta(days=6)
 
-    week_attendance = Attendance.query.filter(
-        Attendance.attendance_date >= week_start,
-        Attendance.attendance_date <= week_end
-    ).count()
+    week_attendance = db.session.query(
+        func.coalesce(func.sum(AttendanceDailyRollup.total), 0)
+    ).filter(
+        AttendanceDailyRollup.attendance_date >= week_start,
+        AttendanceDailyRollup.attendance_date <= week_end
+    ).scalar()
 
-    # 请假统计
-    active_leaves = LeaveRecord.query.filter(
-        LeaveRecord.leave_start_date <= today,
-        LeaveRecord.leave_end_date >= today
-    ).count()
+    # 请假统计（今天处于请假中的记录，按请假日索引表查找）
+    active_leaves = count_leaves_on(today)
 
     total_leaves = LeaveRecord.query.count()
 
@@ -142,26 +178,56 @@ def get_basic_stats():
     }
 
 
-def get_chart_data():
-    """获取图表数据"""
+def get_trend_window(days):
+    """
+    解析考勤趋势的时间窗口
+
+    Args:
+        days: 天数（如 7、30），或 'semester' 表示从学期第一周到今天
+
+    Returns:
+        tuple: (start_date, end_date)，最长 MAX_TREND_DAYS 天
+    """
     today = date.today()
+    if days == 'semester' and FIRST_WEEK_START <= today:
+        start_date = FIRST_WEEK_START
+    else:
+        try:
+            days = int(days)
+        except (TypeError, ValueError):
+            days = DEFAULT_TREND_DAYS
+        start_date = today - timedelta(days=min(max(days, 1), MAX_TREND_DAYS) - 1)
+
+    start_date = max(start_date, today - timedelta(days=MAX_TREND_DAYS - 1))
+    return start_date, today
+
+
+def get_attendance_trend(start_date, end_date):
+    """
+    获取时间窗口内每天的考勤趋势（一次分组查询，缺失的日期补0）
+
+    Args:
+        start_date: 开始日期（含）
+        end_date: 结束日期（含）
+
+    Returns:
+        list: [{'date', 'present', 'absent', 'leave'}]，按日期升序
+    """
+    trend_rows = db.session.query(
+        AttendanceDailyRollup.attendance_date,
+        func.sum(AttendanceDailyRollup.present),
+        func.sum(AttendanceDailyRollup.absent),
+        func.sum(AttendanceDailyRollup.leave)
+    ).filter(
+        AttendanceDailyRollup.attendance_date >= start_date,
+        AttendanceDailyRollup.attendance_date <= end_date
+    ).group_by(AttendanceDailyRollup.attendance_date).all()
+    trend_by_date = {row[0]: row[1:] for row in trend_rows}
 
-    # 最近7天考勤趋势
     attendance_trend = []
-    for i in range(6, -1, -1):
-        chart_date = today - timedelta(days=i)
-        present = Attendance.query.filter_by(
-            attendance_date=chart_date,
-            attendance_type='到课'
-        ).count()
-        absent = Attendance.query.filter_by(
-            attendance_date=chart_date,
-            attendance_type='旷课'
-        ).count()
-        leave_count = Attendance.query.filter_by(
-            attendance_date=chart_date,
-            attendance_type='请假'
-        ).count()
+    for i in range((end_date - start_date).days + 1):
+        chart_date = start_date + timedelta(days=i)
+        present, absent, leave_count = trend_by_date.get(chart_date, (0, 0, 0))
 
         attendance_trend.append({
             'date': chart_date.strftime('%m-%d'),
@@ -170,6 +236,15 @@ def get_chart_data():
             'leave': leave_count
         })
 
+    return attendance_trend
+
+
+@cache.memoize('dashboard')
+def get_chart_data(days=DEFAULT_TREND_DAYS):
+    """获取图表数据（带缓存，考勤/请假/学生/课程写操作后失效）"""
+    # 考勤趋势（默认最近7天）
+    attendance_trend = get_attendance_trend(*get_trend_window(days))
+
     # 请假类型分布
     leave_type_stats = db.session.query(
         LeaveRecord.leave_type,
@@ -185,15 +260,12 @@ def get_chart_data():
     week_courses = []
     weekday_names = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
 
-    for i in range(7):
-        weekday = weekday_names[i]
-        course_count = Course.query.filter(
-            Course.course_time.like(f'{weekday}%')
-        ).count()
+    weekday_counts = count_courses_by_weekday()
 
+    for i in range(7):
         week_courses.append({
-            'day': weekday,
-            'count': course_count
+            'day': weekday_names[i],
+            'count': weekday_counts.get(i, 0)
         })
 
     # 学生政治面貌分布
@@ -215,41 +287,93 @@ def get_chart_data():
     }
 
 
-def get_recent_activities():
-    """获取最近活动"""
-    activities = []
-
-    # 最近考勤记录
-    recent_attendances = Attendance.query.order_by(
-        Attendance.create_time.desc()
-    ).limit(5).all()
-
-    for attendance in recent_attendances:
-        activities.append({
-            'type': 'attendance',
-            'time': attendance.create_time,
-            'title': f"{attendance.student.student_name} 的考勤记录",
-            'description': f"{attendance.course.course_name} - {attendance.attendance_type}",
-            'icon': 'check-square-o',
-            'color': 'green' if attendance.attendance_type == '到课' else 'red'
-        })
+def _page_activity_branch(stmt, kind, time_column, id_column, before, before_kind, before_id, limit):
+    """
+    为活动流中的一种记录加上游标条件、倒序排序和条数限制
+
+    游标为 (时间, 类型, ID)，同一时间批量写入的多条记录也能逐页取完
+    """
+    if before is not None:
+        if before_kind is None or kind > before_kind:
+            stmt = stmt.where(time_column < before)
+        elif kind < before_kind:
+            stmt = stmt.where(time_column <= before)
+        else:
+            stmt = stmt.where(or_(
+                time_column < before,
+                and_(time_column == before, id_column < before_id)
+            ))
+    return stmt.order_by(time_column.desc(), id_column.desc()).limit(limit).subquery()
+
+
+def get_recent_activities(limit=10, before=None, before_kind=None, before_id=None):
+    """
+    获取最近活动（考勤和请假记录一次 UNION ALL 查询，在SQL中排序和分页）
+
+    Args:
+        limit: 返回条数
+        before: 游标时间，只返回该时间之前的活动（None表示从最新开始）
+        before_kind: 游标记录类型（attendance/leave），与 before_id 一起区分同一时间的多条记录
+        before_id: 游标记录ID
+
+    Returns:
+        list: 活动列表，按时间倒序
+    """
+    attendance_feed = _page_activity_branch(
+        db.select(
+            literal('attendance').label('kind'),
+            Attendance.attendance_id.label('id'),
+            Attendance.create_time.label('time'),
+            Student.student_name.label('student_name'),
+            Course.course_name.label('subject'),
+            Attendance.attendance_type.label('status'),
+            cast(null(), Integer).label('days')
+        ).join(Student, Attendance.student_id == Student.student_id)
+         .join(Course, Attendance.course_id == Course.course_id),
+        'attendance', Attendance.create_time, Attendance.attendance_id,
+        before, before_kind, before_id, limit
+    )
 
-    # 最近请假记录
-    recent_leaves = LeaveRecord.query.order_by(
-        LeaveRecord.create_time.desc()
-    ).limit(5).all()
-
-    for leave in recent_leaves:
-        activities.append({
-            'type': 'leave',
-            'time': leave.create_time,
-            'title': f"{leave.student.student_name} 的请假申请",
-            'description': f"{leave.leave_type} - {leave.leave_days}天",
-            'icon': 'calendar-o',
-            'color': 'blue'
-        })
+    leave_feed = _page_activity_branch(
+        db.select(
+            literal('leave').label('kind'),
+            LeaveRecord.leave_id.label('id'),
+            LeaveRecord.create_time.label('time'),
+            Student.student_name.label('student_name'),
+            LeaveRecord.leave_type.label('subject'),
+            cast(null(), String).label('status'),
+            LeaveRecord.leave_days.label('days')
+        ).join(Student, LeaveRecord.student_id == Student.student_id),
+        'leave', LeaveRecord.create_time, LeaveRecord.leave_id,
+        before, before_kind, before_id, limit
+    )
 
-    # 按时间排序
-    activities.sort(key=lambda x: x['time'], reverse=True)
+    feed = union_all(db.select(attendance_feed), db.select(leave_feed)).subquery()
+    rows = db.session.execute(
+        db.select(feed).order_by(feed.c.time.desc(), feed.c.kind.desc(), feed.c.id.desc()).limit(limit)
+    ).all()
 
-    return activities[:10]  # 返回最近10条
+    activities = []
+    for row in rows:
+        if row.kind == 'attendance':
+            activities.append({
+                'type': 'attendance',
+                'id': row.id,
+                'time': row.time,
+                'title': f"{row.student_name} 的考勤记录",
+                'description': f"{row.subject} - {row.status}",
+                'icon': 'check-square-o',
+                'color': 'green' if row.status == '到课' else 'red'
+            })
+        else:
+            activities.append({
+                'type': 'leave',
+                'id': row.id,
+                'time': row.time,
+                'title': f"{row.student_name} 的请假申请",
+                'description': f"{row.subject} - {row.days}天",
+                'icon': 'calendar-o',
+                'color': 'blue'
+            })
+
+    return activities
@@ -0,0 +1,52 @@
+"""
+后台导出任务路由模块
+"""
+from flask import Blueprint, render_template, jsonify, send_file, abort
+from flask_login import login_required
+
+from app import export_jobs
+from app.utils.export_jobs import ExportJob
+
+exports_bp = Blueprint('exports', __name__)
+
+# 任务进度页面的标题和说明：{任务类型: (标题, 说明)}
+JOB_PAGE_TEXTS = {
+    'student_import': ('导入学生', '文件正在后台导入，完成后显示导入结果，有失败行时可下载错误明细'),
+}
+DEFAULT_PAGE_TEXT = ('导出任务', '数据量较大，文件正在后台生成，完成后可在此页面下载')
+
+
+@exports_bp.route('/<job_id>')
+@login_required
+def status(job_id):
+    """后台任务进度页面（完成后提供下载链接）"""
+    job = export_jobs.get(job_id)
+    if job is None:
+        abort(404)
+    title, description = JOB_PAGE_TEXTS.get(job.kind, DEFAULT_PAGE_TEXT)
+    return render_template('exports/status.html', job=job, title=title, description=description)
+
+
+@exports_bp.route('/<job_id>/status')
+@login_required
+def api_status(job_id):
+    """API接口：导出任务进度"""
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': '导出任务不存在或已过期'}), 404
+    return jsonify(job.to_dict())
+
+
+@exports_bp.route('/<job_id>/download')
+@login_required
+def download(job_id):
+    """下载已完成的导出文件"""
+    job = export_jobs.get(job_id)
+    if job is None or job.status != ExportJob.DONE:
+        abort(404)
+    return send_file(
+        job.path,
+        mimetype=job.mimetype,
+        as_attachment=True,
+        download_name=job.filename
+    )
@@ -1,44 +1,39 @@
 """
 请假管理路由模块
 """
-from flask import Blueprint, render_template, request, flash, redirect, url_for, send_file
+from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, and_, or_
 
-from app import db
+from app import db, cache, export_jobs
 from app.models.leave_record import LeaveRecord
 from app.models.student import Student
-
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from app.utils.leave_days import leaves_overlapping, refresh_leave_days
+from app.utils.leave_reconcile import reconcile_leaves
+from app.utils.listing import keyset_paginate, search_filter
+from app.utils.lookups import get_leave_types
+from app.utils.leave_stats import leave_statistics, semester_range
+from app.utils.export import (
+    XlsxExport, YIELD_PER, format_datetime, get_export_format, send_table, write_table, export_filename
+)
 
 leave_bp = Blueprint('leave', __name__)
 
-@leave_bp.route('/')
-@login_required
-def index():
-    """请假记录列表"""
-    # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    search = request.args.get('search', '', type=str)
-    leave_type = request.args.get('leave_type', '', type=str)
-    start_date = request.args.get('start_date', '', type=str)
-    end_date = request.args.get('end_date', '', type=str)
-    
-    # 构建查询
-    query = LeaveRecord.query.join(Student)
-    
+
+def _filter_leave_records(query, search, leave_type, start_date, end_date):
+    """
+    应用请假记录列表的筛选条件（列表页面和导出共用，query 需已联表 Student）
+
+    Args:
+        query: 查询对象
+        search: 学号或姓名关键字
+        leave_type: 请假类型
+        start_date: 开始日期字符串（YYYY-MM-DD，无效时忽略）
+        end_date: 结束日期字符串（YYYY-MM-DD，无效时忽略）
+    """
     # 搜索条件（学号或姓名）
     if search:
-        search_pattern = f'%{search}%'
-        query = query.filter(
-            or_(
-                Student.student_id.like(search_pattern),
-                Student.student_name.like(search_pattern)
-            )
-        )
+        query = query.filter(search_filter([Student.student_id, Student.student_name], search))
     
     # 请假类型筛选
     if leave_type:
@@ -59,17 +54,34 @@ def index():
         except ValueError:
             pass
     
-    # 按创建时间倒序排列
-    query = query.order_by(LeaveRecord.create_time.desc())
+    return query
+
+
+@leave_bp.route('/')
+@login_required
+def index():
+    """请假记录列表"""
+    # 获取查询参数
+    search = request.args.get('search', '', type=str)
+    leave_type = request.args.get('leave_type', '', type=str)
+    start_date = request.args.get('start_date', '', type=str)
+    end_date = request.args.get('end_date', '', type=str)
     
-    # 分页
-    per_page = 15
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # 构建查询
+    query = _filter_leave_records(LeaveRecord.query.join(Student), search, leave_type, start_date, end_date)
+    
+    # 按创建时间倒序游标分页
+    pagination = keyset_paginate(
+        query,
+        [(LeaveRecord.create_time, True), (LeaveRecord.leave_id, True)],
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=15
+    )
     records = pagination.items
     
-    # 获取所有请假类型（用于筛选下拉框）
-    leave_types = db.session.query(LeaveRecord.leave_type).distinct().all()
-    leave_types = [t[0] for t in leave_types]
+    # 所有请假类型（用于筛选下拉框，缓存）
+    leave_types = get_leave_types()
     
     return render_template(
         'leave/index.html',
@@ -83,6 +95,22 @@ def index():
     )
 
 
+def _sync_leave(leave_id, *scopes):
+    """
+    请假记录变更后更新请假日索引，并重新同步受影响的请假考勤
+
+    Args:
+        leave_id: 请假记录ID
+        scopes: 受影响的 (学号, 开始日期, 结束日期)，修改时包括修改前和修改后
+    """
+    refresh_leave_days([leave_id])
+    reconcile_leaves(
+        min(start for _, start, _ in scopes),
+        max(end for _, _, end in scopes),
+        {student_id for student_id, _, _ in scopes}
+    )
+
+
 @leave_bp.route('/add', methods=['GET', 'POST'])
 @login_required
 def add():
@@ -133,7 +161,10 @@ def add():
         
         try:
             db.session.add(leave_record)
+            db.session.flush()
+            _sync_leave(leave_record.leave_id, (student_id, start_date, end_date))
             db.session.commit()
+            cache.invalidate('dashboard', 'lookups')
             flash('请假记录添加成功', 'success')
             return redirect(url_for('leave.index'))
         except Exception as e:
@@ -186,7 +217,8 @@ def edit(leave_id):
             flash('日期格式错误', 'error')
             return redirect(url_for('leave.edit', leave_id=leave_id))
         
-        # 更新记录
+        # 更新记录（记下原来的学生和日期，原范围内的请假考勤也要重新同步）
+        old_scope = (record.student_id, record.leave_start_date, record.leave_end_date)
         record.student_id = student_id
         record.leave_type = leave_type
         record.leave_start_date = start_date
@@ -195,7 +227,10 @@ def edit(leave_id):
         record.leave_reason = leave_reason
         
         try:
+            db.session.flush()
+            _sync_leave(leave_id, old_scope, (student_id, start_date, end_date))
             db.session.commit()
+            cache.invalidate('dashboard', 'lookups')
             flash('请假记录更新成功', 'success')
             return redirect(url_for('leave.index'))
         except Exception as e:
@@ -213,10 +248,14 @@ def edit(leave_id):
 def delete(leave_id):
     """删除请假记录"""
     record = LeaveRecord.query.get_or_404(leave_id)
+    scope = (record.student_id, record.leave_start_date, record.leave_end_date)
     
     try:
         db.session.delete(record)
+        db.session.flush()
+        _sync_leave(leave_id, scope)
         db.session.commit()
+        cache.invalidate('dashboard', 'lookups')
         flash('请假记录删除成功', 'success')
     except Exception as e:
         db.session.rollback()
@@ -250,182 +289,116 @@ def statistics():
             flash('日期格式错误', 'error')
             return redirect(url_for('leave.statistics'))
     
-    # 构建基础查询
-    base_query = LeaveRecord.query.filter(
-        LeaveRecord.leave_start_date <= end_date,
-        LeaveRecord.leave_end_date >= start_date
-    )
-    
-    # 总体统计
-    total_count = base_query.count()
-    total_days = db.session.query(func.sum(LeaveRecord.leave_days)).filter(
-        LeaveRecord.leave_start_date <= end_date,
-        LeaveRecord.leave_end_date >= start_date
-    ).scalar() or 0
-    
-    # 按请假类型统计
-    type_stats = db.session.query(
-        LeaveRecord.leave_type,
-        func.count(LeaveRecord.leave_id).label('count'),
-        func.sum(LeaveRecord.leave_days).label('days')
-    ).filter(
-        LeaveRecord.leave_start_date <= end_date,
-        LeaveRecord.leave_end_date >= start_date
-    ).group_by(LeaveRecord.leave_type).all()
-    
-    # 按学生统计（请假次数最多的前10名）
-    student_stats = db.session.query(
-        Student.student_id,
-        Student.student_name,
-        func.count(LeaveRecord.leave_id).label('count'),
-        func.sum(LeaveRecord.leave_days).label('days')
-    ).join(LeaveRecord).filter(
-        LeaveRecord.leave_start_date <= end_date,
-        LeaveRecord.leave_end_date >= start_date
-    ).group_by(
-        Student.student_id,
-        Student.student_name
-    ).order_by(func.count(LeaveRecord.leave_id).desc()).limit(10).all()
+    # 总数、类型、学生排行和按周/按月统计在一条语句中汇总
+    stats = leave_statistics(start_date, end_date)
     
     # 最近的请假记录
-    recent_records = base_query.order_by(LeaveRecord.create_time.desc()).limit(10).all()
+    recent_records = LeaveRecord.query.filter(leaves_overlapping(start_date, end_date))\
+        .order_by(LeaveRecord.create_time.desc()).limit(10).all()
     
+    semester_start, semester_end = semester_range()
     return render_template(
         'leave/statistics.html',
         start_date=start_date,
         end_date=end_date,
-        total_count=total_count,
-        total_days=total_days,
-        type_stats=type_stats,
-        student_stats=student_stats,
-        recent_records=recent_records
+        semester_start=semester_start,
+        semester_end=semester_end,
+        recent_records=recent_records,
+        **stats
     )
 
 
+# 请假记录导出的列（表头, Excel列宽）
+LEAVE_EXPORT_COLUMNS = [
+    ('学号', 15), ('姓名', 12), ('请假类型', 12), ('开始日期', 15),
+    ('结束日期', 15), ('请假天数', 12), ('请假原因', 30), ('提交时间', 18)
+]
+
+
+def _leave_export_query(search='', leave_type='', start_date='', end_date=''):
+    """请假记录导出查询（只取导出需要的列，学生信息随查询一起联表取出）"""
+    query = db.session.query(
+        Student.student_id,
+        Student.student_name,
+        LeaveRecord.leave_type,
+        LeaveRecord.leave_start_date,
+        LeaveRecord.leave_end_date,
+        LeaveRecord.leave_days,
+        LeaveRecord.leave_reason,
+        LeaveRecord.create_time
+    ).select_from(LeaveRecord).join(Student, LeaveRecord.student_id == Student.student_id)
+    return _filter_leave_records(query, search, leave_type, start_date, end_date)
+
+
+def _leave_export_xlsx(rows):
+    """生成请假记录Excel"""
+    export = XlsxExport("请假记录", LEAVE_EXPORT_COLUMNS)
+    export.title("请假记录导出")
+    export.blank()
+    export.header()
+    export.rows((
+        (
+            row.student_id,
+            row.student_name,
+            row.leave_type,
+            row.leave_start_date.strftime('%Y-%m-%d'),
+            row.leave_end_date.strftime('%Y-%m-%d'),
+            row.leave_days,
+            row.leave_reason,
+            format_datetime(row.create_time, '%Y-%m-%d %H:%M')
+        )
+        for row in rows
+    ), styles={6: 'export_text', 7: 'export_text'})  # 前6列居中
+    return export
+
+
+def _render_leave_export(job, output):
+    """后台导出任务：全部请假记录"""
+    query = _leave_export_query()
+    job.total = query.count()
+    rows = job.track(query.order_by(LeaveRecord.create_time.desc()).execution_options(yield_per=YIELD_PER))
+    if job.params['format'] != 'xlsx':
+        write_table(job.params['format'], output, [header for header, _ in LEAVE_EXPORT_COLUMNS], rows)
+    else:
+        _leave_export_xlsx(rows).save(output)
+
+
 @leave_bp.route('/export')
 @login_required
 def export():
-    """导出请假记录"""
+    """
+    导出请假记录（format=xlsx/csv/columnar）
+
+    带筛选条件时直接下载；不带任何条件时导出全部记录，提交为后台导出任务。
+    """
+    fmt = get_export_format(request.args)
+    if fmt is None:
+        flash('不支持的导出格式', 'error')
+        return redirect(url_for('leave.index'))
+    
     # 获取筛选参数
     search = request.args.get('search', '', type=str)
     leave_type = request.args.get('leave_type', '', type=str)
     start_date_str = request.args.get('start_date', '', type=str)
     end_date_str = request.args.get('end_date', '', type=str)
     
-    # 构建查询
-    query = LeaveRecord.query.join(Student)
-    
-    if search:
-        search_pattern = f'%{search}%'
-        query = query.filter(
-            or_(
-                Student.student_id.like(search_pattern),
-                Student.student_name.like(search_pattern)
-            )
-        )
-    
-    if leave_type:
-        query = query.filter(LeaveRecord.leave_type == leave_type)
-    
-    if start_date_str:
-        try:
-            start = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(LeaveRecord.leave_start_date >= start)
-        except ValueError:
-            pass
-    
-    if end_date_str:
-        try:
-            end = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(LeaveRecord.leave_end_date <= end)
-        except ValueError:
-            pass
-    
-    records = query.order_by(LeaveRecord.create_time.desc()).all()
-    
-    if not records:
+    query = _leave_export_query(search, leave_type, start_date_str, end_date_str)
+    if not db.session.query(query.exists()).scalar():
         flash('没有符合条件的请假记录', 'warning')
         return redirect(url_for('leave.index'))
     
-    # 创建工作簿
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "请假记录"
-    
-    # 定义样式
-    header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    header_font = Font(bold=True, color='FFFFFF', size=11)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    center_alignment = Alignment(horizontal='center', vertical='center')
-    
-    # 写入标题
-    ws.merge_cells('A1:H1')
-    ws['A1'] = "请假记录导出"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = center_alignment
-    
-    # 写入表头
-    headers = ['学号', '姓名', '请假类型', '开始日期', '结束日期', '请假天数', '请假原因', '提交时间']
-    ws.append([''])  # 空行
-    ws.append(headers)
-    
-    header_row = ws.max_row
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=header_row, column=col_num)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_alignment
-        cell.border = border
-    
-    # 写入数据
-    for record in records:
-        row_data = [
-            record.student.student_id,
-            record.student.student_name,
-            record.leave_type,
-            record.leave_start_date.strftime('%Y-%m-%d'),
-            record.leave_end_date.strftime('%Y-%m-%d'),
-            record.leave_days,
-            record.leave_reason,
-            record.create_time.strftime('%Y-%m-%d %H:%M')
-        ]
-        ws.append(row_data)
-        
-        # 设置边框和对齐
-        for col_num in range(1, len(headers) + 1):
-            cell = ws.cell(row=ws.max_row, column=col_num)
-            cell.border = border
-            if col_num <= 6:  # 前6列居中
-                cell.alignment = center_alignment
-    
-    # 设置列宽
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 12
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 15
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 12
-    ws.column_dimensions['G'].width = 30
-    ws.column_dimensions['H'].width = 18
-    
-    # 保存到内存
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    # 生成文件名
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"请假记录_{timestamp}.xlsx"
+    filename_stem = f"请假记录_{timestamp}"
     
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
-
+    # 全部记录的导出交给后台任务
+    if not (search or leave_type or start_date_str or end_date_str):
+        job = export_jobs.submit(
+            'leave_records', {'format': fmt},
+            _render_leave_export, *export_filename(fmt, filename_stem)
+        )
+        return redirect(url_for('exports.status', job_id=job.id))
+    
+    rows = query.order_by(LeaveRecord.create_time.desc()).execution_options(yield_per=YIELD_PER)
+    if fmt != 'xlsx':
+        return send_table(fmt, filename_stem, [header for header, _ in LEAVE_EXPORT_COLUMNS], rows)
+    return _leave_export_xlsx(rows).send(f'{filename_stem}.xlsx')
@@ -1,12 +1,18 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required
-from app import db
-from app.models import Student
+from sqlalchemy.orm import joinedload
+from app import db, cache, export_jobs
+from app.models import Student, LeaveRecord
+from app.utils.attendance_rollup import refresh_rollups, get_student_rollup_scope
+from app.utils.attendance_stats import get_status_breakdown
+from app.utils.leave_days import refresh_leave_days
+from app.utils.listing import keyset_paginate, search_filter
+from app.utils.lookups import get_political_statuses
+from app.utils.student_import import ERROR_COLUMNS, import_student_rows
+from app.utils.export import XlsxExport, XLSX_MIMETYPE, YIELD_PER, format_datetime, get_export_format, send_table
 from werkzeug.utils import secure_filename
 import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
 import os
-from io import BytesIO
 from datetime import datetime
 
 # 创建学生管理蓝图
@@ -20,46 +26,42 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _filter_students(query, search, political_status):
+    """应用学生列表的筛选条件（列表页面和导出共用）"""
+    # 搜索条件
+    if search:
+        query = query.filter(search_filter([Student.student_id, Student.student_name, Student.phone], search))
+    
+    # 政治面貌筛选
+    if political_status:
+        query = query.filter(Student.political_status == political_status)
+    return query
+
+
 @student_bp.route('/')
 @login_required
 def index():
     """学生列表页面"""
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '', type=str)
     political_status = request.args.get('political_status', '', type=str)
     
     # 构建查询
-    query = Student.query
-    
-    # 搜索条件
-    if search:
-        query = query.filter(
-            (Student.student_id.contains(search)) |
-            (Student.student_name.contains(search)) |
-            (Student.phone.contains(search))
-        )
-    
-    # 政治面貌筛选
-    if political_status:
-        query = query.filter(Student.political_status == political_status)
+    query = _filter_students(Student.query, search, political_status)
     
-    # 分页查询
-    pagination = query.order_by(Student.create_time.desc()).paginate(
-        page=page,
-        per_page=10,
-        error_out=False
+    # 游标分页（按创建时间倒序）
+    pagination = keyset_paginate(
+        query,
+        [(Student.create_time, True), (Student.student_id, True)],
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=10
     )
     
     students = pagination.items
     
-    # 获取所有政治面貌选项（用于筛选下拉框）
-    political_statuses = db.session.query(Student.political_status)\
-        .distinct()\
-        .filter(Student.political_status.isnot(None))\
-        .order_by(Student.political_status)\
-        .all()
-    political_statuses = [ps[0] for ps in political_statuses]
+    # 所有政治面貌选项（用于筛选下拉框，缓存）
+    political_statuses = get_political_statuses()
     
     return render_template(
         'student/index.html',
@@ -111,6 +113,7 @@ def add():
         try:
             db.session.add(student)
             db.session.commit()
+            cache.invalidate('dashboard', 'lookups')
             flash(f'学生 {student_name} 添加成功！', 'success')
             return redirect(url_for('student.index'))
         except Exception as e:
@@ -148,6 +151,7 @@ def edit(student_id):
         
         try:
             db.session.commit()
+            cache.invalidate('dashboard', 'lookups')
             flash(f'学生 {student_name} 信息更新成功！', 'success')
             return redirect(url_for('student.index'))
         except Exception as e:
@@ -166,8 +170,16 @@ def delete(student_id):
     student_name = student.student_name
     
     try:
+        # 记录该学生考勤涉及的汇总范围和请假记录，删除后重新汇总、清除请假日
+        rollup_scope = get_student_rollup_scope(student_id)
+        leave_ids = [leave_id for leave_id, in student.leave_records.with_entities(LeaveRecord.leave_id)]
         db.session.delete(student)
+        db.session.flush()
+        if rollup_scope:
+            refresh_rollups(**rollup_scope)
+        refresh_leave_days(leave_ids)
         db.session.commit()
+        cache.invalidate('dashboard', 'lookups')
         flash(f'学生 {student_name} 删除成功！', 'success')
     except Exception as e:
         db.session.rollback()
@@ -176,6 +188,40 @@ def delete(student_id):
     return redirect(url_for('student.index'))
 
 
+def _run_student_import(job, output):
+    """后台任务：导入学生名单，生成的文件为错误明细表"""
+    path = job.params['path']
+    try:
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            if sheet.max_row:
+                job.total = max(sheet.max_row - 1, 0)
+            
+            errors = XlsxExport('导入错误', ERROR_COLUMNS)
+            errors.header()
+            # 从第2行开始读取（第1行是表头）
+            rows = job.track(enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2))
+            summary = import_student_rows(rows, errors)
+        finally:
+            workbook.close()
+        
+        db.session.commit()
+        cache.invalidate('dashboard', 'lookups')
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    
+    errors.save(output)
+    message = f'导入完成！新增 {summary["created"]} 条，更新 {summary["updated"]} 条'
+    if summary['errors']:
+        message += f'，失败 {summary["errors"]} 条，失败原因见错误明细'
+    job.result = dict(summary, message=message)
+
+
 @student_bp.route('/import', methods=['GET', 'POST'])
 @login_required
 def import_excel():
@@ -198,86 +244,14 @@ def import_excel():
             flash('仅支持 .xlsx 或 .xls 格式的Excel文件！', 'error')
             return redirect(url_for('student.import_excel'))
         
-        try:
-            # 读取Excel文件
-            wb = openpyxl.load_workbook(file)
-            ws = wb.active
-            
-            success_count = 0
-            error_count = 0
-            error_messages = []
-            
-            # 从第2行开始读取（第1行是表头）
-            for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                # 跳过空行
-                if not any(row):
-                    continue
-                
-                # 确保至少有4列数据
-                if len(row) < 4:
-                    error_messages.append(f'第 {row_num} 行：数据列数不足')
-                    error_count += 1
-                    continue
-                
-                student_id = str(row[0]).strip() if row[0] else ''
-                student_name = str(row[1]).strip() if row[1] else ''
-                political_status = str(row[2]).strip() if row[2] else ''
-                phone = str(row[3]).strip() if row[3] else ''
-                
-                # 数据验证
-                if not student_id:
-                    error_messages.append(f'第 {row_num} 行：学号为空')
-                    error_count += 1
-                    continue
-                
-                if not student_name:
-                    error_messages.append(f'第 {row_num} 行：姓名为空')
-                    error_count += 1
-                    continue
-                
-                if not phone:
-                    error_messages.append(f'第 {row_num} 行：联系电话为空')
-                    error_count += 1
-                    continue
-                
-                # 检查学号是否已存在
-                existing_student = Student.query.filter_by(student_id=student_id).first()
-                if existing_student:
-                    # 更新现有学生信息
-                    existing_student.student_name = student_name
-                    existing_student.political_status = political_status if political_status else None
-                    existing_student.phone = phone
-                    success_count += 1
-                else:
-                    # 创建新学生
-                    student = Student(
-                        student_id=student_id,
-                        student_name=student_name,
-                        political_status=political_status if political_status else None,
-                        phone=phone
-                    )
-                    db.session.add(student)
-                    success_count += 1
-            
-            # 提交数据库更改
-            db.session.commit()
-            
-            # 显示导入结果
-            if error_count > 0:
-                flash(f'导入完成！成功 {success_count} 条，失败 {error_count} 条', 'warning')
-                for msg in error_messages[:5]:  # 只显示前5条错误
-                    flash(msg, 'error')
-                if len(error_messages) > 5:
-                    flash(f'...还有 {len(error_messages) - 5} 条错误未显示', 'error')
-            else:
-                flash(f'导入成功！共导入 {success_count} 条学生记录', 'success')
-            
-            return redirect(url_for('student.index'))
-            
-        except Exception as e:
-            db.session.rollback()
-            flash(f'导入失败：{str(e)}', 'error')
-            return redirect(url_for('student.import_excel'))
+        # 文件交给后台任务逐行导入，页面显示进度，完成后可下载错误明细
+        path = export_jobs.save_upload(file, '.' + file.filename.rsplit('.', 1)[1].lower())
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        job = export_jobs.submit(
+            'student_import', {'path': path}, _run_student_import,
+            f'学生导入错误明细_{timestamp}.xlsx', XLSX_MIMETYPE
+        )
+        return redirect(url_for('exports.status', job_id=job.id))
     
     return render_template('student/import.html')
 
@@ -285,101 +259,54 @@ def import_excel():
 @student_bp.route('/export')
 @login_required
 def export():
-    """导出学生名单为Excel文件"""
+    """导出学生名单（format=xlsx/csv/columnar）"""
+    fmt = get_export_format(request.args)
+    if fmt is None:
+        flash('不支持的导出格式', 'error')
+        return redirect(url_for('student.index'))
+    
     # 获取查询参数（与列表页面相同）
     search = request.args.get('search', '', type=str)
     political_status = request.args.get('political_status', '', type=str)
     
     # 构建查询（与列表页面相同的筛选逻辑）
-    query = Student.query
+    query = _filter_students(Student.query, search, political_status)
     
-    # 搜索条件
-    if search:
-        query = query.filter(
-            (Student.student_id.contains(search)) |
-            (Student.student_name.contains(search)) |
-            (Student.phone.contains(search))
-        )
+    # 只取导出需要的列，按批从游标读取（不分页）
+    rows = query.with_entities(
+        Student.student_id,
+        Student.student_name,
+        Student.political_status,
+        Student.phone,
+        Student.create_time
+    ).order_by(Student.student_id).execution_options(yield_per=YIELD_PER)
     
-    # 政治面貌筛选
-    if political_status:
-        query = query.filter(Student.political_status == political_status)
-    
-    # 获取所有符合条件的学生（不分页）
-    students = query.order_by(Student.student_id).all()
-    
-    # 创建Excel工作簿
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "学生名单"
-    
-    # 设置表头样式
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # 写入表头
-    headers = ["学号", "姓名", "政治面貌", "联系电话", "创建时间"]
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-    
-    # 设置列宽
-    ws.column_dimensions['A'].width = 15  # 学号
-    ws.column_dimensions['B'].width = 12  # 姓名
-    ws.column_dimensions['C'].width = 12  # 政治面貌
-    ws.column_dimensions['D'].width = 15  # 联系电话
-    ws.column_dimensions['E'].width = 20  # 创建时间
-    
-    # 写入数据
-    data_alignment = Alignment(horizontal="left", vertical="center")
-    for row_num, student in enumerate(students, 2):
-        ws.cell(row=row_num, column=1).value = student.student_id
-        ws.cell(row=row_num, column=2).value = student.student_name
-        ws.cell(row=row_num, column=3).value = student.political_status or '-'
-        ws.cell(row=row_num, column=4).value = student.phone
-        ws.cell(row=row_num, column=5).value = student.create_time.strftime('%Y-%m-%d %H:%M:%S') if student.create_time else '-'
-        
-        # 设置数据行对齐
-        for col_num in range(1, 6):
-            ws.cell(row=row_num, column=col_num).alignment = data_alignment
-    
-    # 生成文件名
+    columns = [("学号", 15), ("姓名", 12), ("政治面貌", 12), ("联系电话", 15), ("创建时间", 20)]
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'学生名单_{timestamp}.xlsx'
+    filename_stem = f'学生名单_{timestamp}'
+    if fmt != 'xlsx':
+        return send_table(fmt, filename_stem, [header for header, _ in columns], rows)
     
-    # 保存到内存
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    # 返回文件
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    # 流式写入Excel
+    export = XlsxExport("学生名单", columns)
+    export.header()
+    export.rows((
+        (row.student_id, row.student_name, row.political_status or '-', row.phone, format_datetime(row.create_time))
+        for row in rows
+    ), style='export_text')
+    return export.send(f'{filename_stem}.xlsx')
 
 
 @student_bp.route('/detail/<student_id>')
 @login_required
 def detail(student_id):
     """查看学生详情"""
-    from app.models import Attendance, LeaveRecord
+    from app.models import Attendance
     
     student = Student.query.get_or_404(student_id)
     
-    # 获取考勤统计
-    attendance_stats = {
-        'total': student.attendances.count(),
-        'normal': student.attendances.filter_by(attendance_type='正常').count(),
-        'late': student.attendances.filter_by(attendance_type='迟到').count(),
-        'absent': student.attendances.filter_by(attendance_type='缺席').count(),
-    }
+    # 获取考勤统计（按状态一次分组统计）
+    attendance_stats = get_status_breakdown(student_id=student_id)
     
     # 获取请假统计
     leave_stats = {
@@ -387,7 +314,8 @@ def detail(student_id):
     }
     
     # 获取最近的考勤记录（最多5条）
-    recent_attendances = Attendance.query.filter_by(student_id=student_id)\
+    recent_attendances = Attendance.query.options(joinedload(Attendance.course))\
+        .filter_by(student_id=student_id)\
         .order_by(Attendance.attendance_date.desc())\
         .limit(5)\
         .all()
@@ -1,37 +1,17 @@
 # app/routes/upcoming.py
 from flask import Blueprint, render_template, request
 from flask_login import login_required
-from datetime import datetime, date, time, timedelta
-import re
+from sqlalchemy.orm import selectinload
+from datetime import datetime, date, timedelta
 
-from app import db
 from app.models import Course
 from app.utils.week_helper import FIRST_WEEK_START, get_week_number, get_week_date_range
+from app.utils.schedule_helper import DEFAULT_PERIOD_TIMES
+from app.utils.lookups import get_semesters
 
 bp = Blueprint('upcoming', __name__, url_prefix='')
 
-# --- 节次时间定义 (保持不变) ---
-# --- 节次时间定义 (更新后) ---
-DEFAULT_PERIOD_TIMES = {
-    1: (time(8, 0),  time(8, 45)),
-    2: (time(8, 55), time(9, 40)),
-    3: (time(10, 0), time(10, 45)),
-    4: (time(10, 55), time(11, 40)),
-    5: (time(12, 20), time(13, 5)),   # ✅ 新增：中午第一节
-    6: (time(13, 10), time(13, 50)),  # ✅ 新增：中午第二节
-    7: (time(14, 0),  time(14, 45)),
-    8: (time(14, 55), time(15, 40)),
-    9: (time(16, 0),  time(16, 45)),
-    10: (time(16, 55), time(17, 40)),
-    11: (time(19, 0), time(19, 45)),
-    12: (time(19, 55), time(20, 40)),
-}
-
-
-# --- 星期映射 (保持不变) ---
-CN_WEEKDAY_MAP = {
-    '一': 0, '二': 1, '三': 2, '四': 3, '五': 4, '六': 5, '日': 6, '天': 6
-}
+# --- 节次时间定义、星期映射及上课时间解析见 app/utils/schedule_helper.py ---
 DAY_HEADERS = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
 
 # --- 【新】定义课表的 "行" ---
@@ -47,171 +27,6 @@ PERIOD_ROW_SLOTS = [
 
 
 # --- 辅助函数 ---
-def parse_course_time(course_time_str):
-    """
-    解析课程时间字符串，支持多种格式：
-    - "周一3-4节"
-    - "周一 3-4节"
-    - "周一3,4节"
-    - "周一 08:00-09:40" (需要转换为节次)
-    """
-    if not course_time_str:
-        return []
-    
-    results = []
-    s = course_time_str.strip()
-    
-    # 支持多种分隔符分割多个时间段
-    parts = re.split(r'[;,/]|，', s)
-    
-    for part in parts:
-        part = part.strip()
-        if not part:
-            continue
-        
-        # 优先匹配模式2: 周X + 时间格式 (如: 周一 08:00-09:40, 周二 08:20-09:50)
-        # 这个格式更精确，应该优先匹配
-        pattern2 = re.compile(r'周([一二三四五六日天])\s+(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})')
-        m2 = pattern2.search(part)
-        if m2:
-            cn_week = m2.group(1)
-            start_h = int(m2.group(2))
-            start_m = int(m2.group(3))
-            end_h = int(m2.group(4))
-            end_m = int(m2.group(5))
-            
-            weekday = CN_WEEKDAY_MAP.get(cn_week)
-            if weekday is not None:
-                # 将时间转换为节次
-                start_period = time_to_period(start_h, start_m)
-                end_period = time_to_period(end_h, end_m)
-                
-                # 如果开始节次和结束节次都找到了，添加到结果中
-                if start_period and end_period:
-                    # 确保开始节次 <= 结束节次
-                    if start_period <= end_period:
-                        results.append((weekday, start_period, end_period))
-                    else:
-                        # 如果开始节次 > 结束节次，可能是时间解析错误，使用开始节次作为结束节次
-                        results.append((weekday, start_period, start_period))
-                elif start_period:
-                    # 如果只找到了开始节次，使用开始节次作为结束节次
-                    results.append((weekday, start_period, start_period))
-                elif end_period:
-                    # 如果只找到了结束节次，使用结束节次作为开始节次
-                    results.append((weekday, end_period, end_period))
-            continue
-        
-        # 模式1: 周X + 节次格式 (如: 周一3-4节, 周一 3-4节, 周一3,4节, 周一第3-4节)
-        # 注意：这个模式不应该匹配包含冒号的时间格式
-        # 修改正则表达式，确保不匹配时间格式（不包含冒号）
-        if ':' not in part:  # 如果包含冒号，说明是时间格式，跳过模式1
-            pattern1 = re.compile(r'周([一二三四五六日天])\s*(?:第)?\s*([0-9]{1,2}(?:-[0-9]{1,2})?|[0-9]{1,2}\s*[,-]\s*[0-9]{1,2})\s*(?:节|节课)?')
-            m1 = pattern1.search(part)
-            if m1:
-                cn_week = m1.group(1)
-                period_part = m1.group(2).replace(' ', '').replace('，', ',')
-                weekday = CN_WEEKDAY_MAP.get(cn_week)
-                if weekday is not None:
-                    try:
-                        # 处理 "3-4" 或 "3,4" 格式
-                        if '-' in period_part:
-                            period_parts = period_part.split('-')
-                            start_p = int(period_parts[0])
-                            end_p = int(period_parts[1])
-                        elif ',' in period_part:
-                            periods = [int(p.strip()) for p in period_part.split(',') if p.strip().isdigit()]
-                            if periods:
-                                start_p = min(periods)
-                                end_p = max(periods)
-                            else:
-                                continue
-                        else:
-                            start_p = end_p = int(period_part)
-                        
-                        # 验证节次范围（1-12）
-                        if 1 <= start_p <= 12 and 1 <= end_p <= 12 and start_p <= end_p:
-                            results.append((weekday, start_p, end_p))
-                    except (ValueError, IndexError):
-                        continue
-    
-    return results
-
-
-def time_to_period(hour, minute):
-    """
-    将时间转换为节次
-    返回节次数，如果不在任何节次范围内返回None
-    
-    改进逻辑：
-    1. 如果时间在节次的时间范围内，直接返回该节次
-    2. 如果时间在节次开始时间前后15分钟内，返回该节次
-    3. 如果时间超过节次结束时间，但在下一个节次开始之前（间隔内），返回当前节次
-    4. 对于边界情况，优先匹配时间上最接近的节次
-    """
-    try:
-        t = time(hour, minute)
-    except ValueError:
-        return None
-    
-    t_seconds = t.hour * 3600 + t.minute * 60
-    
-    # 按节次顺序检查（1-12）
-    sorted_periods = sorted(DEFAULT_PERIOD_TIMES.items())
-    
-    for i, (period, (start_time, end_time)) in enumerate(sorted_periods):
-        start_seconds = start_time.hour * 3600 + start_time.minute * 60
-        end_seconds = end_time.hour * 3600 + end_time.minute * 60
-        
-        # 情况1: 时间在节次的时间范围内
-        if start_seconds <= t_seconds <= end_seconds:
-            return period
-        
-        # 情况2: 时间在节次开始时间前后15分钟内（允许提前或延后）
-        if abs(t_seconds - start_seconds) <= 900:  # 15分钟 = 900秒
-            return period
-        
-        # 情况3: 时间超过节次结束时间，但在下一个节次开始之前
-        # 计算到下一个节次开始的时间
-        if i < len(sorted_periods) - 1:
-            next_period, (next_start_time, _) = sorted_periods[i + 1]
-            next_start_seconds = next_start_time.hour * 3600 + next_start_time.minute * 60
-            
-            # 如果时间在结束时间和下一个节次开始之间
-            if end_seconds < t_seconds < next_start_seconds:
-                # 计算距离结束时间和下一个开始时间的距离
-                diff_to_end = t_seconds - end_seconds
-                diff_to_next_start = next_start_seconds - t_seconds
-                
-                # 如果更接近当前节次的结束时间（在间隔的前半段），返回当前节次
-                # 否则返回下一个节次
-                if diff_to_end <= diff_to_next_start:
-                    return period
-                else:
-                    return next_period
-        else:
-            # 最后一个节次，如果时间超过结束时间但在合理范围内（20分钟内）
-            if t_seconds > end_seconds and (t_seconds - end_seconds) <= 1200:
-                return period
-    
-    # 如果没有精确匹配，找最接近的节次（按开始时间）
-    best_match = None
-    min_diff = float('inf')
-    
-    for period, (start_time, _) in sorted_periods:
-        start_seconds = start_time.hour * 3600 + start_time.minute * 60
-        diff = abs(t_seconds - start_seconds)
-        if diff < min_diff:
-            min_diff = diff
-            best_match = period
-    
-    # 只有在1小时内才返回，否则返回None
-    if min_diff <= 3600:
-        return best_match
-    
-    return None
-
-
 def get_week_label_for_date(d: date):
     """
     获取指定日期所在的周次和该周的日期范围（周一到周日）
@@ -269,20 +84,14 @@ def upcoming_week_page():
     
     week_label = f"第{week_no}周 ({week_start.strftime('%m/%d')} ~ {week_end.strftime('%m/%d')})"
     
-    # 获取学期信息
-    all_courses = Course.query.all()
-    if all_courses:
-        # 从课程中获取学期信息
-        semesters = db.session.query(Course.semester).distinct().filter(
-            Course.semester.isnot(None)
-        ).order_by(Course.semester.desc()).all()
-        semesters = [s[0] for s in semesters]
+    # 获取学期信息（缓存的学期列表，没有课程时为空）
+    semesters = get_semesters()
+    if semesters:
         if semester_param:
             current_semester = semester_param
         else:
-            current_semester = semesters[0] if semesters else ''
+            current_semester = semesters[0]
     else:
-        semesters = []
         current_semester = ''
     
     semester_title = current_semester or "当前学期"
@@ -307,20 +116,17 @@ def upcoming_week_page():
     week_grid = {}  # key: "day-slot", value: list of courses
 
     # 获取当前周次需要显示的所有课程
-    query = Course.query
+    query = Course.query.options(selectinload(Course.sessions))
     if current_semester:
         query = query.filter(Course.semester == current_semester)
-    all_courses = query.all()
 
-    current_week_courses = []
-    for c in all_courses:
-        # 检查课程是否在当前周次上课
-        if week_no > 0 and c.is_teaching_week(week_no):
-            current_week_courses.append(c)
+    # 检查课程是否在当前周次上课（按周次位掩码在SQL中过滤）
+    current_week_courses = query.filter(Course.teaching_in_week(week_no)).all() if week_no > 0 else []
 
     # 填充网格
     for c in current_week_courses:
-        parsed_times = parse_course_time(c.course_time)
+        # 使用 course_session 中已解析好的上课时段
+        parsed_times = [(s.weekday, s.start_period, s.end_period) for s in c.sessions]
         
         if not parsed_times:
             # 如果无法解析课程时间，记录日志（仅在开发环境）
@@ -0,0 +1,94 @@
+"""
+考勤日汇总表（attendance_daily_rollup）维护
+"""
+from sqlalchemy import case, func, true
+
+from app import db
+from app.models.attendance import Attendance
+from app.models.attendance_rollup import AttendanceDailyRollup
+from app.utils.db import upsert_insert
+
+
+def _count_status(status):
+    """统计某个考勤状态的人数"""
+    return func.sum(case((Attendance.attendance_type == status, 1), else_=0))
+
+
+def refresh_rollups(course_ids=None, start_date=None, end_date=None):
+    """
+    按 attendance 表重新计算指定范围内的日汇总
+
+    先删除范围内的汇总行，再用一条 INSERT ... SELECT ... GROUP BY 写回，
+    范围内已没有考勤记录的 日期+课程 也会被清除。调用方负责提交事务。
+
+    Args:
+        course_ids: 课程编号列表，None表示全部课程
+        start_date: 开始日期（含），None表示不限
+        end_date: 结束日期（含），None表示不限
+    """
+    rollup_filters = []
+    source_filters = []
+    if course_ids is not None:
+        course_ids = list(course_ids)
+        if not course_ids:
+            return
+        rollup_filters.append(AttendanceDailyRollup.course_id.in_(course_ids))
+        source_filters.append(Attendance.course_id.in_(course_ids))
+    if start_date:
+        rollup_filters.append(AttendanceDailyRollup.attendance_date >= start_date)
+        source_filters.append(Attendance.attendance_date >= start_date)
+    if end_date:
+        rollup_filters.append(AttendanceDailyRollup.attendance_date <= end_date)
+        source_filters.append(Attendance.attendance_date <= end_date)
+
+    db.session.query(AttendanceDailyRollup).filter(*rollup_filters).delete(synchronize_session=False)
+
+    aggregated = db.select(
+        Attendance.attendance_date,
+        Attendance.course_id,
+        func.count(Attendance.attendance_id),
+        _count_status('到课'),
+        _count_status('请假'),
+        _count_status('旷课'),
+        func.current_timestamp()
+    ).where(true(), *source_filters).group_by(
+        Attendance.attendance_date,
+        Attendance.course_id
+    )
+
+    stmt = upsert_insert(AttendanceDailyRollup.__table__).from_select(
+        ['attendance_date', 'course_id', 'total', 'present', 'leave', 'absent', 'update_time'],
+        aggregated
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['attendance_date', 'course_id'],
+        set_={
+            'total': stmt.excluded.total,
+            'present': stmt.excluded.present,
+            'leave': stmt.excluded.leave,
+            'absent': stmt.excluded.absent,
+            'update_time': stmt.excluded.update_time
+        }
+    )
+    db.session.execute(stmt)
+
+
+def get_student_rollup_scope(student_id):
+    """
+    获取某学生考勤记录涉及的汇总范围（删除学生前调用，删除后据此重新汇总）
+
+    Args:
+        student_id: 学生学号
+
+    Returns:
+        dict: refresh_rollups 的关键字参数；学生没有考勤记录时返回None
+    """
+    course_ids = [row[0] for row in db.session.query(Attendance.course_id)
+                  .filter(Attendance.student_id == student_id).distinct()]
+    if not course_ids:
+        return None
+    start_date, end_date = db.session.query(
+        func.min(Attendance.attendance_date),
+        func.max(Attendance.attendance_date)
+    ).filter(Attendance.student_id == student_id).one()
+    return {'course_ids': course_ids, 'start_date': start_date, 'end_date': end_date}
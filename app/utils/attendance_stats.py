@@ -0,0 +1,153 @@
+"""
+考勤统计辅助函数
+"""
+from sqlalchemy import func
+
+from app import db
+from app.models.attendance import Attendance
+from app.models.attendance_rollup import AttendanceDailyRollup
+
+
+# 考勤记录页实际写入的状态 -> 统计字段名
+STATUS_KEYS = {
+    '到课': 'present',
+    '请假': 'leave',
+    '旷课': 'absent',
+}
+
+
+def _empty_counts():
+    """返回一份全部为0的计数字典"""
+    counts = {'recorded': 0}
+    for key in STATUS_KEYS.values():
+        counts[key] = 0
+    return counts
+
+
+def get_day_summary(course_ids, target_date):
+    """
+    统计指定日期多门课程的考勤人数（一次 GROUP BY 查询）
+
+    Args:
+        course_ids: 课程编号列表
+        target_date: 考勤日期（date对象）
+
+    Returns:
+        dict: {course_id: {'recorded', 'present', 'leave', 'absent'}}，
+              没有考勤记录的课程计数均为0
+    """
+    summary = {course_id: _empty_counts() for course_id in course_ids}
+    if not summary:
+        return summary
+
+    rows = db.session.query(
+        Attendance.course_id,
+        Attendance.attendance_type,
+        func.count(Attendance.attendance_id)
+    ).filter(
+        Attendance.attendance_date == target_date,
+        Attendance.course_id.in_(list(summary))
+    ).group_by(
+        Attendance.course_id,
+        Attendance.attendance_type
+    ).all()
+
+    for course_id, attendance_type, count in rows:
+        counts = summary[course_id]
+        counts['recorded'] += count
+        key = STATUS_KEYS.get(attendance_type)
+        if key:
+            counts[key] += count
+
+    return summary
+
+
+def get_status_breakdown(course_id=None, student_id=None, start_date=None, end_date=None):
+    """
+    按考勤状态统计记录数（一次 GROUP BY attendance_type 查询）
+
+    条件可任意组合，都为空时统计全部考勤记录。
+
+    Args:
+        course_id: 课程编号
+        student_id: 学号
+        start_date: 开始日期（包含）
+        end_date: 结束日期（包含）
+
+    Returns:
+        dict: {'total', 'present', 'leave', 'absent', 'other', 'by_type', 'attendance_rate'}
+              other 为不在 STATUS_KEYS 中的历史状态条数，by_type 为 {状态: 条数}
+    """
+    query = db.session.query(
+        Attendance.attendance_type,
+        func.count(Attendance.attendance_id)
+    )
+    if course_id is not None:
+        query = query.filter(Attendance.course_id == course_id)
+    if student_id is not None:
+        query = query.filter(Attendance.student_id == student_id)
+    if start_date is not None:
+        query = query.filter(Attendance.attendance_date >= start_date)
+    if end_date is not None:
+        query = query.filter(Attendance.attendance_date <= end_date)
+
+    by_type = dict(query.group_by(Attendance.attendance_type).all())
+
+    breakdown = {'total': sum(by_type.values()), 'other': 0, 'by_type': by_type}
+    for key in STATUS_KEYS.values():
+        breakdown[key] = 0
+    for attendance_type, count in by_type.items():
+        key = STATUS_KEYS.get(attendance_type, 'other')
+        breakdown[key] += count
+
+    breakdown['attendance_rate'] = (
+        round(breakdown['present'] / breakdown['total'] * 100, 1) if breakdown['total'] else 0
+    )
+    return breakdown
+
+
+def course_totals_subquery(course_ids=None):
+    """
+    按课程汇总考勤记录数和到课人次的子查询（读取考勤日汇总表）
+
+    Args:
+        course_ids: 只汇总这些课程（None表示全部课程）
+
+    Returns:
+        Subquery: 列 course_id, total, present, rate（到勤率百分比，没有记录时为0）
+    """
+    total = func.sum(AttendanceDailyRollup.total)
+    present = func.sum(AttendanceDailyRollup.present)
+    query = db.session.query(
+        AttendanceDailyRollup.course_id,
+        total.label('total'),
+        present.label('present'),
+        func.coalesce(present * 100.0 / func.nullif(total, 0), 0).label('rate')
+    ).group_by(AttendanceDailyRollup.course_id)
+    if course_ids is not None:
+        query = query.filter(AttendanceDailyRollup.course_id.in_(list(course_ids)))
+    return query.subquery()
+
+
+def get_course_rates(course_ids):
+    """
+    统计多门课程的考勤记录数和到勤率（一次 GROUP BY 查询）
+
+    Args:
+        course_ids: 课程编号列表
+
+    Returns:
+        dict: {course_id: {'total', 'present', 'rate'}}，没有考勤记录的课程均为0
+    """
+    rates = {course_id: {'total': 0, 'present': 0, 'rate': 0} for course_id in course_ids}
+    if not rates:
+        return rates
+
+    totals = course_totals_subquery(rates)
+    for row in db.session.query(totals).all():
+        rates[row.course_id] = {
+            'total': int(row.total),
+            'present': int(row.present),
+            'rate': round(float(row.rate), 1)
+        }
+    return rates
@@ -0,0 +1,132 @@
+"""
+考勤记录批量写入
+"""
+import time
+from datetime import datetime
+
+from sqlalchemy import Date, DateTime, Integer, String, literal, true
+
+from app import db
+from app.models.attendance import Attendance
+from app.models.student import Student
+from app.utils.db import upsert_insert
+
+
+# 考勤记录的唯一键（与 uq_attendance_student_course_date 约束一致）
+ATTENDANCE_KEY = ('student_id', 'course_id', 'attendance_date')
+
+
+def save_attendance_batch(course_id, attendance_date, form):
+    """
+    批量保存某课程某日期的考勤记录
+
+    一次查询取出全部学生和已有记录，与提交的表单比对后，
+    只把有变化的行用一条 INSERT ... ON CONFLICT DO UPDATE 批量写入。
+    调用方负责提交事务。
+
+    Args:
+        course_id: 课程编号
+        attendance_date: 考勤日期（date对象）
+        form: 提交的表单（attendance_type_/late_minutes_/note_ + 学号）
+
+    Returns:
+        dict: {'inserted': 新增条数, 'updated': 更新条数, 'elapsed_ms': 耗时毫秒}
+    """
+    started = time.perf_counter()
+
+    student_ids = [row[0] for row in db.session.query(Student.student_id).all()]
+
+    # 预取该课程该日期已有的考勤记录
+    existing = {
+        row.student_id: (row.attendance_type, row.late_minutes or 0, row.attendance_note or '')
+        for row in db.session.query(
+            Attendance.student_id,
+            Attendance.attendance_type,
+            Attendance.late_minutes,
+            Attendance.attendance_note
+        ).filter(
+            Attendance.course_id == course_id,
+            Attendance.attendance_date == attendance_date
+        )
+    }
+
+    changed_rows = []
+    inserted = 0
+    for student_id in student_ids:
+        attendance_type = form.get(f'attendance_type_{student_id}', '到课')
+        late_minutes = form.get(f'late_minutes_{student_id}', 0)
+        note = form.get(f'note_{student_id}', '')
+
+        # 处理迟到时间
+        try:
+            late_minutes = int(late_minutes) if late_minutes else 0
+        except ValueError:
+            late_minutes = 0
+
+        submitted = (attendance_type, late_minutes, note)
+        if student_id in existing:
+            if existing[student_id] == submitted:
+                continue
+        else:
+            inserted += 1
+
+        changed_rows.append({
+            'student_id': student_id,
+            'course_id': course_id,
+            'attendance_date': attendance_date,
+            'attendance_type': attendance_type,
+            'late_minutes': late_minutes,
+            'attendance_note': note
+        })
+
+    if changed_rows:
+        stmt = upsert_insert(Attendance.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ATTENDANCE_KEY),
+            set_={
+                'attendance_type': stmt.excluded.attendance_type,
+                'late_minutes': stmt.excluded.late_minutes,
+                'attendance_note': stmt.excluded.attendance_note
+            }
+        )
+        db.session.execute(stmt, changed_rows)
+
+    return {
+        'inserted': inserted,
+        'updated': len(changed_rows) - inserted,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def materialize_default_roster(course_id, attendance_date):
+    """
+    为某课程某日期的全部学生批量创建默认“到课”记录
+
+    使用一条 INSERT ... SELECT FROM student ... ON CONFLICT DO NOTHING，
+    已存在的记录会被跳过，两位教师同时打开同一课程也不会产生重复记录。
+    调用方负责提交事务。
+
+    Args:
+        course_id: 课程编号
+        attendance_date: 考勤日期（date对象）
+
+    Returns:
+        int: 实际新增的记录条数
+    """
+    roster = db.select(
+        Student.student_id,
+        literal(course_id, String),
+        literal(attendance_date, Date),
+        literal('到课', String),
+        literal(0, Integer),
+        literal('', String),
+        literal(datetime.utcnow(), DateTime(timezone=True))  # 与模型默认值一致
+    ).where(true())  # SQLite 要求 INSERT ... SELECT 带 WHERE 才能解析 ON CONFLICT
+
+    stmt = upsert_insert(Attendance.__table__).from_select(
+        ['student_id', 'course_id', 'attendance_date', 'attendance_type',
+         'late_minutes', 'attendance_note', 'create_time'],
+        roster
+    ).on_conflict_do_nothing(index_elements=list(ATTENDANCE_KEY))
+
+    return db.session.execute(stmt).rowcount
@@ -0,0 +1,166 @@
+"""
+缓存辅助模块
+
+提供带TTL的缓存，按命名空间（如 dashboard）整体失效，并统计命中/未命中次数。
+默认使用进程内缓存；配置 CACHE_BACKEND='redis' 时使用共享缓存（需要安装 redis 包），
+多进程部署时写操作的失效才能对所有进程生效。
+"""
+import pickle
+import threading
+import time
+from functools import wraps
+
+
+class MemoryBackend:
+    """进程内缓存后端（默认后端，也可作为共享缓存的本地替身）"""
+
+    def __init__(self, max_entries=1024):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def get(self, key):
+        """返回 (是否命中, 值)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False, None
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            if len(self._data) > self.max_entries:
+                self._evict()
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        """先清理过期项，仍超出上限时按写入顺序淘汰最旧的项"""
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._data.items() if expires_at < now]:
+            del self._data[key]
+        while len(self._data) > self.max_entries:
+            del self._data[next(iter(self._data))]
+
+
+class RedisBackend:
+    """共享缓存后端（Redis）"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis 需要先安装 redis 包：pip install redis')
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(key)
+        if raw is None:
+            return False, None
+        return True, pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._client.set(key, pickle.dumps(value), px=max(int(ttl * 1000), 1))
+
+    def delete_prefix(self, prefix):
+        keys = list(self._client.scan_iter(match=f'{prefix}*'))
+        if keys:
+            self._client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix(Cache.KEY_PREFIX)
+
+
+class Cache:
+    """缓存扩展（用法与 db、login_manager 相同：先创建实例，再 init_app）"""
+
+    KEY_PREFIX = 'attendance:'
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.default_ttl = 30
+        self.ttls = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """根据应用配置选择缓存后端"""
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        if backend == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        elif backend == 'memory':
+            self.backend = MemoryBackend()
+        else:
+            raise ValueError(f'不支持的缓存后端：{backend}')
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 30)
+        self.ttls = dict(app.config.get('CACHE_TTLS', {}))
+        app.extensions['cache'] = self
+
+    def memoize(self, namespace, ttl=None):
+        """
+        缓存函数返回值的装饰器，缓存键由 命名空间+函数名+参数 组成
+
+        Args:
+            namespace: 命名空间，invalidate(namespace) 时整体失效
+            ttl: 过期秒数；配置 CACHE_TTLS['命名空间:函数名'] 优先
+        """
+        def decorator(func):
+            name = f'{namespace}:{func.__name__}'
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                key = f'{self.KEY_PREFIX}{name}:{args!r}:{sorted(kwargs.items())!r}'
+                found, value = self.backend.get(key)
+                self._record(namespace, found)
+                if found:
+                    return value
+                value = func(*args, **kwargs)
+                self.backend.set(key, value, self.ttls.get(name, ttl or self.default_ttl))
+                return value
+
+            return wrapper
+        return decorator
+
+    def invalidate(self, *namespaces):
+        """使一个或多个命名空间下的全部缓存失效（在写操作提交后调用）"""
+        for namespace in namespaces:
+            self.backend.delete_prefix(f'{self.KEY_PREFIX}{namespace}:')
+
+    def clear(self):
+        """清空全部缓存"""
+        self.backend.clear()
+
+    def stats(self):
+        """
+        获取命中统计
+
+        Returns:
+            dict: {'backend', 'namespaces': {命名空间: {'hits', 'misses', 'hit_rate'}}}
+        """
+        with self._lock:
+            namespaces = {
+                namespace: {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': round(hits / (hits + misses) * 100, 1) if hits + misses else 0
+                }
+                for namespace, (hits, misses) in self._stats.items()
+            }
+        return {'backend': type(self.backend).__name__, 'namespaces': namespaces}
+
+    def _record(self, namespace, hit):
+        with self._lock:
+            hits, misses = self._stats.get(namespace, (0, 0))
+            self._stats[namespace] = (hits + 1, misses) if hit else (hits, misses + 1)
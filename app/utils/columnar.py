@@ -0,0 +1,162 @@
+"""
+列式二进制导出格式（仅依赖标准库）
+
+文件结构与 Parquet 类似，便于数据仓库按列读取：
+
+    MAGIC
+    行组1：列1数据块 列2数据块 ...（每个数据块为 zlib 压缩的 JSON 数组）
+    行组2：...
+    元数据（JSON：列名、列类型、各行组的行数和每个数据块的偏移/长度）
+    元数据长度（4字节，大端）
+    MAGIC
+
+元数据写在文件末尾，写入方可以边查询边输出，无需预先知道总行数和列类型。
+"""
+import json
+import struct
+import zlib
+from datetime import date, datetime
+
+
+MAGIC = b'ATCOL1\x00\x00'
+FORMAT_VERSION = 1
+
+# 每个行组的行数
+ROW_GROUP_SIZE = 10000
+
+
+def _value_type(value):
+    """推断单个值的列类型"""
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, datetime):
+        return 'datetime'
+    if isinstance(value, date):
+        return 'date'
+    return 'str'
+
+
+def _encode(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+_DECODERS = {
+    'date': date.fromisoformat,
+    'datetime': datetime.fromisoformat,
+}
+
+
+def write_columnar(columns, rows, row_group_size=ROW_GROUP_SIZE):
+    """
+    把行数据编码为列式格式，逐块产出字节（可直接作为流式响应体）
+
+    Args:
+        columns: 列名列表
+        rows: 可迭代的行（每行为与 columns 等长的序列）
+        row_group_size: 每个行组的行数
+
+    Yields:
+        bytes: 文件内容片段
+    """
+    types = [None] * len(columns)
+    row_groups = []
+    offset = len(MAGIC)
+    yield MAGIC
+
+    def flush(buffer):
+        nonlocal offset
+        chunks = []
+        for col, values in enumerate(buffer):
+            # 列类型取第一个非空值的类型；同一列出现不同类型时按字符串保存
+            for value in values:
+                if value is not None:
+                    value_type = _value_type(value)
+                    if types[col] is None:
+                        types[col] = value_type
+                    elif types[col] != value_type:
+                        types[col] = 'str'
+            block = zlib.compress(
+                json.dumps([_encode(v) for v in values], ensure_ascii=False, default=str).encode('utf-8')
+            )
+            chunks.append([offset, len(block)])
+            offset += len(block)
+            yield block
+        row_groups.append({'rows': len(buffer[0]) if buffer else 0, 'chunks': chunks})
+
+    buffer = [[] for _ in columns]
+    count = 0
+    for row in rows:
+        for col, value in enumerate(row):
+            buffer[col].append(value)
+        count += 1
+        if count == row_group_size:
+            yield from flush(buffer)
+            buffer = [[] for _ in columns]
+            count = 0
+    if count:
+        yield from flush(buffer)
+
+    footer = json.dumps({
+        'version': FORMAT_VERSION,
+        'columns': list(columns),
+        'types': [t or 'str' for t in types],
+        'row_groups': row_groups
+    }, ensure_ascii=False).encode('utf-8')
+    yield footer
+    yield struct.pack('>I', len(footer))
+    yield MAGIC
+
+
+def read_columnar_metadata(fileobj):
+    """
+    读取列式文件的元数据
+
+    Args:
+        fileobj: 以二进制方式打开、可 seek 的文件对象
+
+    Returns:
+        dict: {'version', 'columns', 'types', 'row_groups'}
+    """
+    fileobj.seek(0)
+    if fileobj.read(len(MAGIC)) != MAGIC:
+        raise ValueError('不是有效的列式导出文件')
+    fileobj.seek(-(len(MAGIC) + 4), 2)
+    footer_length = struct.unpack('>I', fileobj.read(4))[0]
+    if fileobj.read(len(MAGIC)) != MAGIC:
+        raise ValueError('列式导出文件不完整')
+    fileobj.seek(-(len(MAGIC) + 4 + footer_length), 2)
+    return json.loads(fileobj.read(footer_length).decode('utf-8'))
+
+
+def read_columnar(fileobj, columns=None):
+    """
+    按列读取列式文件
+
+    Args:
+        fileobj: 以二进制方式打开、可 seek 的文件对象
+        columns: 需要读取的列名列表（None表示全部列），未选中的列不会被解压
+
+    Returns:
+        dict: {列名: 值列表}
+    """
+    meta = read_columnar_metadata(fileobj)
+    wanted = meta['columns'] if columns is None else columns
+    result = {}
+    for name in wanted:
+        col = meta['columns'].index(name)
+        decode = _DECODERS.get(meta['types'][col])
+        values = []
+        for group in meta['row_groups']:
+            offset, length = group['chunks'][col]
+            fileobj.seek(offset)
+            values.extend(json.loads(zlib.decompress(fileobj.read(length)).decode('utf-8')))
+        if decode:
+            values = [decode(v) if v is not None else None for v in values]
+        result[name] = values
+    return result
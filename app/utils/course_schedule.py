@@ -0,0 +1,124 @@
+"""
+课程排课查询辅助函数（基于 course_session 表）
+"""
+from sqlalchemy import and_, case, func, or_, select, union_all
+
+from app import db
+from app.models.course import Course
+from app.models.course_session import CourseSession
+from app.utils.schedule_helper import CN_WEEKDAY_MAP, parse_course_time
+from app.utils.week_helper import get_week_number
+
+
+def rebuild_course_sessions(course_ids=None):
+    """
+    根据 course_time 重新生成上课时段（用于回填和批量导入）
+    调用方负责提交事务。
+
+    Args:
+        course_ids: 需要重建的课程编号列表，None表示全部课程
+
+    Returns:
+        int: 写入的上课时段条数
+    """
+    course_query = db.session.query(Course.course_id, Course.course_time)
+    delete_query = db.session.query(CourseSession)
+    if course_ids is not None:
+        course_ids = list(course_ids)
+        if not course_ids:
+            return 0
+        course_query = course_query.filter(Course.course_id.in_(course_ids))
+        delete_query = delete_query.filter(CourseSession.course_id.in_(course_ids))
+
+    rows = [
+        {
+            'course_id': course_id,
+            'weekday': weekday,
+            'start_period': start_p,
+            'end_period': end_p
+        }
+        for course_id, course_time in course_query
+        for weekday, start_p, end_p in parse_course_time(course_time)
+    ]
+
+    delete_query.delete(synchronize_session=False)
+    if rows:
+        db.session.execute(CourseSession.__table__.insert(), rows)
+    return len(rows)
+
+
+def find_unparsed_courses():
+    """
+    查找 course_time 无法解析为上课时段的课程（没有 course_session 行）
+
+    Returns:
+        list: [(课程编号, 上课时间)]
+    """
+    return db.session.query(Course.course_id, Course.course_time)\
+        .filter(~Course.sessions.any())\
+        .order_by(Course.course_id).all()
+
+
+def get_courses_on_date(target_date):
+    """
+    获取指定日期上课的课程（按星期索引查询，并按周次过滤）
+
+    Args:
+        target_date: 日期（date对象）
+
+    Returns:
+        list: 课程列表，按当天最早节次排序（上课时间无法解析的课程排在最后）；
+              不在学期范围内时不按周次过滤
+    """
+    first_session = db.session.query(
+        CourseSession.course_id,
+        func.min(CourseSession.start_period).label('start_period')
+    ).filter(
+        CourseSession.weekday == target_date.weekday()
+    ).group_by(CourseSession.course_id).subquery()
+
+    # course_time 无法解析为上课时段的课程没有 course_session 行，
+    # 按原来的规则（course_time 以“周X”开头）匹配，排在有节次的课程之后
+    weekday_prefixes = [f'周{name}' for name, weekday in CN_WEEKDAY_MAP.items() if weekday == target_date.weekday()]
+    unparsed = and_(
+        ~Course.sessions.any(),
+        or_(*[Course.course_time.like(f'{prefix}%') for prefix in weekday_prefixes])
+    )
+    query = Course.query.outerjoin(first_session, Course.course_id == first_session.c.course_id)\
+        .filter(or_(first_session.c.course_id.isnot(None), unparsed))
+
+    week_number = get_week_number(target_date)
+    if week_number:
+        query = query.filter(Course.teaching_in_week(week_number))
+
+    return query.order_by(
+        first_session.c.start_period.is_(None),
+        first_session.c.start_period,
+        Course.course_time
+    ).all()
+
+
+def count_courses_by_weekday():
+    """
+    统计每个星期几有课的课程数量（一次分组查询）
+
+    course_time 无法解析为上课时段的课程与 get_courses_on_date 一致，
+    按 course_time 开头的“周X”计入对应的星期。
+
+    Returns:
+        dict: {weekday(0-6): 课程数}
+    """
+    unparsed_weekday = case(
+        *[(Course.course_time.like(f'周{name}%'), weekday) for name, weekday in CN_WEEKDAY_MAP.items()]
+    )
+    course_days = union_all(
+        select(CourseSession.weekday.label('weekday'), CourseSession.course_id.label('course_id')),
+        select(unparsed_weekday.label('weekday'), Course.course_id.label('course_id'))
+        .where(~Course.sessions.any())
+    ).subquery('course_days')
+
+    rows = db.session.query(
+        course_days.c.weekday,
+        func.count(func.distinct(course_days.c.course_id))
+    ).filter(course_days.c.weekday.isnot(None)).group_by(course_days.c.weekday).all()
+    return {weekday: count for weekday, count in rows}
@@ -0,0 +1,42 @@
+"""
+数据库辅助函数
+"""
+from app import db
+
+
+def upsert_insert(table):
+    """
+    返回当前数据库方言下支持 ON CONFLICT 的 INSERT 构造
+
+    Args:
+        table: 目标表（Table对象或模型类）
+
+    Returns:
+        Insert: 可调用 on_conflict_do_update / on_conflict_do_nothing 的插入语句
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f'不支持的数据库类型：{dialect}')
+    return insert(table)
+
+
+def trigram_index(name, column):
+    """
+    pg_trgm 三元组 GIN 索引，用于加速 ILIKE '%关键字%' 搜索（只在 PostgreSQL 上创建）
+
+    Args:
+        name: 索引名
+        column: 列名
+
+    Returns:
+        Index: 放入模型的 __table_args__
+    """
+    return db.Index(
+        name, column,
+        postgresql_using='gin',
+        postgresql_ops={column: 'gin_trgm_ops'}
+    ).ddl_if(dialect='postgresql')
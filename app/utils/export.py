@@ -0,0 +1,246 @@
+"""
+导出辅助模块
+
+支持三种导出格式（由导出路由的 format 参数选择）：
+- xlsx：基于 openpyxl 只写模式（write_only）逐行写入，样式使用共享的命名样式，
+  不为每个单元格创建样式对象；工作簿先写入临时文件再发送
+- csv：边查询边输出的分块响应（UTF-8 带BOM，Excel可直接打开）
+- columnar：列式二进制格式（见 app/utils/columnar.py），便于数据仓库按列读取
+行数据直接从数据库游标（yield_per）读取，导出占用的内存与数据行数无关。
+"""
+import csv
+import io
+import tempfile
+from urllib.parse import quote
+
+from flask import Response, send_file, stream_with_context
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, Font, Alignment, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
+
+from app.utils.columnar import write_columnar
+
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# 从数据库游标每批读取的行数
+YIELD_PER = 1000
+
+# 支持的导出格式：{格式: (扩展名, MIME类型)}
+EXPORT_FORMATS = {
+    'xlsx': ('xlsx', XLSX_MIMETYPE),
+    'csv': ('csv', 'text/csv; charset=utf-8'),
+    'columnar': ('colz', 'application/octet-stream'),
+}
+
+# CSV 每次输出的行数
+CSV_CHUNK_ROWS = 500
+
+_THIN = Side(style='thin')
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_CENTER = Alignment(horizontal='center', vertical='center')
+_LEFT = Alignment(horizontal='left', vertical='center')
+
+
+def _named_style(name, **attrs):
+    style = NamedStyle(name=name)
+    for key, value in attrs.items():
+        setattr(style, key, value)
+    return style
+
+
+def _solid(color):
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+# 所有导出共用的命名样式
+NAMED_STYLES = [
+    _named_style('export_title', font=Font(bold=True, size=14), alignment=_CENTER),
+    _named_style('export_info', alignment=_CENTER),
+    _named_style('export_section', font=Font(bold=True, size=12), fill=_solid('D9E1F2'), alignment=_CENTER),
+    _named_style('export_header', font=Font(bold=True, color='FFFFFF', size=11), fill=_solid('4472C4'),
+                 alignment=_CENTER, border=_BORDER),
+    _named_style('export_cell', alignment=_CENTER, border=_BORDER),
+    _named_style('export_text', alignment=_LEFT, border=_BORDER),
+    _named_style('export_present', fill=_solid('C6EFCE'), alignment=_CENTER, border=_BORDER),
+    _named_style('export_leave', fill=_solid('FFEB9C'), alignment=_CENTER, border=_BORDER),
+    _named_style('export_absent', fill=_solid('FFC7CE'), alignment=_CENTER, border=_BORDER),
+]
+
+# 考勤状态对应的单元格样式
+STATUS_STYLES = {'到课': 'export_present', '请假': 'export_leave', '旷课': 'export_absent'}
+
+
+class XlsxExport:
+    """
+    流式Excel导出（单个工作表）
+
+    用法：
+        export = XlsxExport('学生名单', [('学号', 15), ('姓名', 12)])
+        export.header()
+        export.rows(query.execution_options(yield_per=YIELD_PER))
+        return export.send('学生名单.xlsx')
+    """
+
+    def __init__(self, sheet_title, columns):
+        """
+        Args:
+            sheet_title: 工作表名称
+            columns: [(表头, 列宽), ...]
+        """
+        self.workbook = Workbook(write_only=True)
+        for style in NAMED_STYLES:
+            self.workbook.add_named_style(style)
+
+        self.sheet = self.workbook.create_sheet(sheet_title)
+        self.headers = [header for header, _ in columns]
+        for col_num, (_, width) in enumerate(columns, 1):
+            self.sheet.column_dimensions[get_column_letter(col_num)].width = width
+        self.row_count = 0
+
+    def _cell(self, value, style):
+        cell = WriteOnlyCell(self.sheet, value=value)
+        if style:
+            cell.style = style
+        return cell
+
+    def title(self, text, style='export_title'):
+        """写入一行横跨全部列的标题（合并单元格）"""
+        self.row_count += 1
+        self.sheet.append([self._cell(text, style)])
+        self.sheet.merged_cells.add(
+            f'A{self.row_count}:{get_column_letter(len(self.headers))}{self.row_count}'
+        )
+
+    def blank(self):
+        """写入空行"""
+        self.row_count += 1
+        self.sheet.append([])
+
+    def header(self):
+        """写入表头行"""
+        self.row(self.headers, style='export_header')
+
+    def row(self, values, style='export_cell', styles=None):
+        """
+        写入一行数据
+
+        Args:
+            values: 单元格值列表
+            style: 默认样式名
+            styles: {列序号(从0开始): 样式名}，覆盖个别列的样式
+        """
+        styles = styles or {}
+        self.row_count += 1
+        self.sheet.append([
+            self._cell(value, styles.get(col, style)) for col, value in enumerate(values)
+        ])
+
+    def rows(self, iterable, style='export_cell', styles=None):
+        """逐行写入可迭代对象中的全部数据，返回写入行数"""
+        written = 0
+        for values in iterable:
+            self.row(values, style, styles)
+            written += 1
+        return written
+
+    def save(self, output):
+        """写入以二进制方式打开的文件对象"""
+        self.workbook.save(output)
+
+    def send(self, filename):
+        """保存到临时文件并作为附件返回（文件在响应结束后自动删除）"""
+        output = tempfile.TemporaryFile()
+        self.save(output)
+        output.seek(0)
+        return send_file(
+            output,
+            mimetype=XLSX_MIMETYPE,
+            as_attachment=True,
+            download_name=filename
+        )
+
+
+def format_datetime(value, fmt='%Y-%m-%d %H:%M:%S'):
+    """格式化可能为空的时间"""
+    return value.strftime(fmt) if value else '-'
+
+
+def get_export_format(args):
+    """
+    读取导出格式参数
+
+    Args:
+        args: 请求参数（request.args）
+
+    Returns:
+        str: 格式名；不支持的格式返回 None
+    """
+    fmt = args.get('format', 'xlsx', type=str).lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+def _csv_chunks(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM，Excel 打开时按 UTF-8 识别中文
+    writer.writerow(headers)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_table(fmt, headers, rows):
+    """
+    把表格数据编码为 CSV 或列式格式，逐块产出字节
+
+    Args:
+        fmt: 'csv' 或 'columnar'
+        headers: 列名列表
+        rows: 可迭代的行
+
+    Yields:
+        bytes: 文件内容片段
+    """
+    if fmt == 'csv':
+        return _csv_chunks(headers, rows)
+    if fmt == 'columnar':
+        return write_columnar(headers, rows)
+    raise ValueError(f'不支持流式输出的导出格式：{fmt}')
+
+
+def write_table(fmt, output, headers, rows):
+    """把 CSV 或列式格式的表格数据写入以二进制方式打开的文件对象"""
+    for chunk in iter_table(fmt, headers, rows):
+        output.write(chunk)
+
+
+def export_filename(fmt, filename_stem):
+    """返回带扩展名的导出文件名和MIME类型"""
+    extension, mimetype = EXPORT_FORMATS[fmt]
+    return f'{filename_stem}.{extension}', mimetype
+
+
+def send_table(fmt, filename_stem, headers, rows):
+    """
+    以流式响应返回 CSV 或列式格式的表格数据
+
+    Args:
+        fmt: 'csv' 或 'columnar'
+        filename_stem: 不含扩展名的文件名
+        headers: 列名列表
+        rows: 可迭代的行，在响应输出过程中逐行读取
+
+    Returns:
+        Response: 分块传输的附件响应
+    """
+    filename, mimetype = export_filename(fmt, filename_stem)
+    response = Response(stream_with_context(iter_table(fmt, headers, rows)), mimetype=mimetype)
+    # 文件名含中文，按 RFC 5987 编码
+    response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    return response
@@ -0,0 +1,201 @@
+"""
+后台导出任务
+
+大数据量的导出不在请求线程中生成：请求只提交任务并返回任务编号，
+由线程池在应用上下文中把文件写入导出目录，页面通过 /exports/<任务编号> 查看进度并下载。
+相同导出类型和筛选条件的任务按参数哈希复用，生成的文件超过 EXPORT_JOB_TTL 后自动清理。
+大文件导入也作为任务执行：上传文件先保存到同一目录，生成的文件是导入错误明细。
+任务状态保存在进程内，多进程部署时需使用粘性会话或单独的导出进程。
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class ExportJob:
+    """一个导出任务"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, kind, params, filename, mimetype, key):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.filename = filename
+        self.mimetype = mimetype
+        self.key = key
+        self.status = self.QUEUED
+        self.progress = 0  # 已写入行数
+        self.total = None  # 总行数（未知时为 None）
+        self.path = None
+        self.error = None
+        self.result = None  # 任务结果摘要（如导入统计），由生成函数设置
+        self.created_at = datetime.now()
+        self.finished_at = None
+        self.expires_at = None  # time.monotonic() 时间
+
+    @property
+    def percent(self):
+        """完成百分比（总行数未知时返回 None）"""
+        if self.status == self.DONE:
+            return 100
+        if not self.total:
+            return None
+        return min(int(self.progress * 100 / self.total), 99)
+
+    def track(self, rows):
+        """逐行转发数据，同时更新进度"""
+        for row in rows:
+            self.progress += 1
+            yield row
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'percent': self.percent,
+            'filename': self.filename,
+            'error': self.error,
+            'result': self.result,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class ExportJobManager:
+    """导出任务管理（用法与 db、cache 相同：先创建实例，再 init_app）"""
+
+    def __init__(self):
+        self.app = None
+        self.directory = None
+        self.ttl = 600
+        self._executor = None
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """根据应用配置创建导出目录和线程池"""
+        self.app = app
+        self.directory = app.config.get('EXPORT_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'attendance_exports')
+        self.ttl = app.config.get('EXPORT_JOB_TTL', 600)
+        os.makedirs(self.directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('EXPORT_JOB_WORKERS', 2),
+            thread_name_prefix='export-job'
+        )
+        self._remove_stale_files()
+        app.extensions['export_jobs'] = self
+
+    @staticmethod
+    def make_key(kind, params):
+        """根据导出类型和筛选条件计算任务哈希"""
+        raw = json.dumps({'kind': kind, 'params': params}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def submit(self, kind, params, render, filename, mimetype):
+        """
+        提交导出任务；相同参数的任务正在进行或结果未过期时直接复用
+
+        Args:
+            kind: 导出类型（如 course_attendance）
+            params: 筛选条件（可JSON序列化的dict）
+            render: 生成函数 render(job, output)，output 为以二进制写方式打开的文件
+            filename: 下载文件名
+            mimetype: 下载文件的MIME类型
+
+        Returns:
+            ExportJob: 新建或复用的任务
+        """
+        self.cleanup()
+        key = self.make_key(kind, params)
+        with self._lock:
+            job = self._jobs.get(self._by_key.get(key))
+            if job and job.status != ExportJob.FAILED:
+                return job
+
+            job = ExportJob(kind, params, filename, mimetype, key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._executor.submit(self._run, job, render)
+        return job
+
+    def save_upload(self, file, suffix=''):
+        """
+        把上传文件保存到任务目录，供后台任务读取（任务结束后由生成函数删除）
+
+        Args:
+            file: werkzeug FileStorage
+            suffix: 文件扩展名（如 .xlsx）
+
+        Returns:
+            str: 保存后的文件路径
+        """
+        path = os.path.join(self.directory, f'upload_{uuid.uuid4().hex}{suffix}')
+        file.save(path)
+        return path
+
+    def get(self, job_id):
+        """获取任务（不存在或已过期返回 None）"""
+        self.cleanup()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cleanup(self):
+        """删除过期任务及其文件"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.expires_at is not None and job.expires_at < now]
+            for job in expired:
+                del self._jobs[job.id]
+                if self._by_key.get(job.key) == job.id:
+                    del self._by_key[job.key]
+        for job in expired:
+            self._remove_file(job.path)
+
+    def _run(self, job, render):
+        job.status = ExportJob.RUNNING
+        path = os.path.join(self.directory, f'{job.id}.part')
+        try:
+            with self.app.app_context():
+                with open(path, 'wb') as output:
+                    render(job, output)
+            job.path = os.path.join(self.directory, job.id)
+            os.replace(path, job.path)
+            job.status = ExportJob.DONE
+        except Exception as e:
+            self._remove_file(path)
+            job.status = ExportJob.FAILED
+            job.error = str(e)
+            self.app.logger.exception('导出任务 %s 失败', job.id)
+        finally:
+            job.finished_at = datetime.now()
+            job.expires_at = time.monotonic() + self.ttl
+
+    def _remove_stale_files(self):
+        """清理上次运行遗留的过期文件"""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                self._remove_file(path)
+
+    @staticmethod
+    def _remove_file(path):
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
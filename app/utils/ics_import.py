@@ -0,0 +1,329 @@
+"""
+ICS课程导入
+
+导入按流水线进行：
+1. 逐行读取上传文件，按 BEGIN:VEVENT / END:VEVENT 切出单个事件，
+   只解析导入用到的属性，不把整个日历解析成一棵组件树
+2. 按“课程代码+星期+开始时间”合并事件，收集周次
+3. 一次 IN 查询取出已存在的课程编号，区分新增和更新
+4. 分批 INSERT ... ON CONFLICT DO UPDATE 写入课程，并重建上课时段
+全部写入在同一个事务中完成，由调用方提交或回滚。
+"""
+import re
+from datetime import datetime
+
+from icalendar.parser import Contentline
+from icalendar.prop import vDDDTypes
+
+from app import db
+from app.models import Course
+from app.utils.course_schedule import rebuild_course_sessions
+from app.utils.db import upsert_insert
+from app.utils.schedule_helper import clean_course_name, parse_course_time, parse_event_description
+from app.utils.week_helper import compile_week_range
+
+
+# 导入课程的默认学期
+DEFAULT_SEMESTER = '2025-2026学年第一学期'
+
+# 每条 INSERT 语句写入的课程数
+UPSERT_BATCH_SIZE = 500
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+_PROPERTY_NAME_RE = re.compile(r'[A-Z0-9-]+')
+_TEXT_ESCAPE_RE = re.compile(r'\\(.)')
+_TEXT_UNESCAPES = {'n': '\n', 'N': '\n'}
+
+# 导入需要的事件属性，其余属性不解析
+EVENT_PROPERTIES = {'SUMMARY', 'DESCRIPTION', 'LOCATION', 'DTSTART', 'DTEND'}
+
+
+class ImportReport:
+    """导入结果：每门课程一行，外加被跳过的事件"""
+
+    def __init__(self):
+        self.event_count = 0
+        self.courses = []  # [{'course_id', 'course_name', 'course_time', 'week_range', 'events', 'action', 'parsed'}]
+        self.skipped = []  # [{'line', 'summary', 'reason'}]
+
+    @property
+    def created_count(self):
+        return sum(1 for row in self.courses if row['action'] == 'created')
+
+    @property
+    def updated_count(self):
+        return sum(1 for row in self.courses if row['action'] == 'updated')
+
+    @property
+    def unparsed_count(self):
+        """上课时间无法解析为节次的课程数（不会出现在课表中）"""
+        return sum(1 for row in self.courses if not row['parsed'])
+
+
+def _unfold(stream):
+    """
+    逐行读取并合并折行（以空格或制表符开头的行是上一行的续行）
+
+    Yields:
+        tuple: (逻辑行起始行号, 逻辑行文本)
+    """
+    current = None
+    start_line = 0
+    for line_number, line in enumerate(stream, 1):
+        line = line.rstrip(b'\r\n')
+        if line[:1] in (b' ', b'\t') and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield start_line, current.decode('utf-8', 'replace')
+        current = line
+        start_line = line_number
+    if current:
+        yield start_line, current.decode('utf-8', 'replace')
+
+
+def iter_vevents(stream):
+    """
+    从二进制文件流中逐个读取 VEVENT，只解析导入需要的属性
+
+    VEVENT 内嵌的组件（如 VALARM）中的属性会被忽略。
+
+    Args:
+        stream: 以二进制方式打开的文件对象（可逐行迭代）
+
+    Yields:
+        tuple: (事件起始行号, {属性名: 原始内容行})
+    """
+    props = None
+    depth = 0
+    start_line = 0
+    for line_number, line in _unfold(stream):
+        upper = line.upper()
+        if props is None:
+            if upper == 'BEGIN:VEVENT':
+                props = {}
+                depth = 0
+                start_line = line_number
+            continue
+        if upper.startswith('BEGIN:'):
+            depth += 1
+        elif upper == 'END:VEVENT' and depth == 0:
+            yield start_line, props
+            props = None
+        elif upper.startswith('END:'):
+            depth -= 1
+        elif depth == 0:
+            name = _PROPERTY_NAME_RE.match(upper)
+            if name and name.group(0) in EVENT_PROPERTIES:
+                props[name.group(0)] = line
+
+
+def _format_week_range(weeks):
+    """
+    将周次列表转换为范围字符串
+
+    Args:
+        weeks: 周次列表（已排序）
+
+    Returns:
+        str: 周次范围字符串（如：1-8,13,15,17 或 9-16）
+    """
+    if not weeks:
+        return None
+
+    ranges = []
+    start = end = weeks[0]
+    for week in weeks[1:]:
+        if week == end + 1:
+            end = week
+            continue
+        ranges.append(str(start) if start == end else f'{start}-{end}')
+        start = end = week
+    ranges.append(str(start) if start == end else f'{start}-{end}')
+    return ','.join(ranges)
+
+
+def _unescape_text(value):
+    """还原 TEXT 类型值中的转义字符（\\n、\\,、\\;、\\\\）"""
+    if '\\' not in value:
+        return value
+    return _TEXT_ESCAPE_RE.sub(lambda m: _TEXT_UNESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def _property(props, name):
+    """
+    解析单个属性，返回 (参数, 值)；属性不存在时返回 (None, None)
+
+    参数中没有引号时直接按冒号、分号拆分；带引号的参数（值里可能含冒号）交给 icalendar 解析。
+    """
+    line = props.get(name)
+    if line is None:
+        return None, None
+    head, _, value = line.partition(':')
+    if '"' in head:
+        _, params, value = Contentline(line).parts()
+        return params, value
+    params = {}
+    for param in head.split(';')[1:]:
+        key, _, param_value = param.partition('=')
+        params[key.upper()] = param_value
+    return params, _unescape_text(value)
+
+
+def _datetime_property(props, name):
+    params, value = _property(props, name)
+    if value is None:
+        return None
+    return vDDDTypes.from_ical(value, timezone=params.get('TZID'))
+
+
+def parse_event(props):
+    """
+    从单个事件中提取课程信息
+
+    Args:
+        props: iter_vevents 产出的 {属性名: 原始内容行}
+
+    Returns:
+        dict: {'course_id', 'course_name', 'teacher_name', 'course_time', 'course_place', 'week'}
+
+    Raises:
+        ValueError: 事件缺少课程代码或开始时间，或属性格式错误
+    """
+    summary = _property(props, 'SUMMARY')[1] or ''
+    description = _property(props, 'DESCRIPTION')[1] or ''
+    location = _property(props, 'LOCATION')[1] or ''
+
+    # 从描述中提取课程代码、教师和周次
+    course_code, teacher_name, week = parse_event_description(description)
+    if not course_code:
+        raise ValueError('描述中没有课程代码')
+    dtstart = _datetime_property(props, 'DTSTART')
+    if dtstart is None:
+        raise ValueError('缺少开始时间')
+    dtend = _datetime_property(props, 'DTEND')
+
+    # 为每个"课程代码+上课时间"创建唯一标识，一周多次上课的课程会创建多条记录
+    # 格式：课程代码-星期-时间（如：CS101-1-0800）
+    if isinstance(dtstart, datetime):
+        start_time = dtstart.strftime('%H:%M')
+        end_time = dtend.strftime('%H:%M') if isinstance(dtend, datetime) else start_time
+        course_time = f"{WEEKDAY_NAMES[dtstart.weekday()]} {start_time}-{end_time}"
+        course_id = f"{course_code}-{dtstart.weekday() + 1}-{start_time.replace(':', '')}"
+    else:
+        course_time = '待定'
+        course_id = f"{course_code}-0-0000"
+
+    return {
+        'course_id': course_id,
+        'course_name': clean_course_name(summary),  # 移除必修/选修标识
+        'teacher_name': teacher_name or '未知',
+        'course_time': course_time,
+        'course_place': location,
+        'week': week
+    }
+
+
+def collect_courses(stream, report, semester=DEFAULT_SEMESTER):
+    """
+    读取全部事件并按课程编号合并
+
+    Args:
+        stream: 以二进制方式打开的ICS文件
+        report: ImportReport，记录事件数和被跳过的事件
+        semester: 写入课程的学期
+
+    Returns:
+        dict: {课程编号: 课程字段dict}，周次已转换为 week_range/week_mask
+    """
+    courses = {}
+    weeks = {}
+    event_counts = {}
+    for line_number, props in iter_vevents(stream):
+        report.event_count += 1
+        try:
+            data = parse_event(props)
+        except ValueError as e:
+            summary = props.get('SUMMARY', '').partition(':')[2]
+            report.skipped.append({'line': line_number, 'summary': summary, 'reason': str(e)})
+            continue
+
+        course_id = data['course_id']
+        week = data.pop('week')
+        if course_id not in courses:
+            data['semester'] = semester
+            courses[course_id] = data
+            weeks[course_id] = set()
+            event_counts[course_id] = 0
+        event_counts[course_id] += 1
+        if week:
+            weeks[course_id].add(week)
+
+    for course_id, data in courses.items():
+        data['week_range'] = _format_week_range(sorted(weeks[course_id]))
+        data['week_mask'] = compile_week_range(data['week_range'])
+        data['events'] = event_counts[course_id]
+    return courses
+
+
+def existing_course_ids(course_ids):
+    """一次查询返回已存在的课程编号集合"""
+    if not course_ids:
+        return set()
+    rows = db.session.query(Course.course_id).filter(Course.course_id.in_(list(course_ids)))
+    return {course_id for course_id, in rows}
+
+
+def upsert_courses(courses):
+    """
+    分批写入课程（已存在则更新），并重建这些课程的上课时段
+
+    批量写入不经过 Course 的 validates 钩子，week_mask 已在 collect_courses 中计算，
+    上课时段由 rebuild_course_sessions 统一生成。调用方负责提交事务。
+
+    Args:
+        courses: [课程字段dict]，包含 Course 的全部必填列和 week_mask
+    """
+    columns = [column.name for column in Course.__table__.columns]
+    rows = [{column: course.get(column) for column in columns} for course in courses]
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = upsert_insert(Course.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Course.__table__.c.course_id],
+            set_={column: stmt.excluded[column] for column in columns if column != 'course_id'}
+        )
+        db.session.execute(stmt, rows[start:start + UPSERT_BATCH_SIZE])
+    rebuild_course_sessions([row['course_id'] for row in rows])
+
+
+def import_courses(stream, semester=DEFAULT_SEMESTER):
+    """
+    从ICS文件导入课程（不提交事务）
+
+    Args:
+        stream: 以二进制方式打开的ICS文件
+        semester: 写入课程的学期
+
+    Returns:
+        ImportReport: 每门课程的新增/更新结果和被跳过的事件
+    """
+    report = ImportReport()
+    courses = collect_courses(stream, report, semester)
+    existing = existing_course_ids(courses.keys())
+
+    for course_id, data in courses.items():
+        report.courses.append({
+            'course_id': course_id,
+            'course_name': data['course_name'],
+            'course_time': data['course_time'],
+            'week_range': data['week_range'],
+            'events': data['events'],
+            'action': 'updated' if course_id in existing else 'created',
+            'parsed': bool(parse_course_time(data['course_time']))
+        })
+
+    upsert_courses(courses.values())
+    # 会话中可能已加载过旧的课程对象，写入后使其失效
+    db.session.expire_all()
+    return report
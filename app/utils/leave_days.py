@@ -0,0 +1,101 @@
+"""
+请假日索引表（leave_day）维护和查询
+
+请假记录按起止日期展开为每天一行，以 (请假日期, 请假记录ID) 为主键：
+- “某天谁在请假”按主键前缀等值查找，耗时与请假历史的长短无关
+- 日期区间重叠查询变为请假日期上的范围查找，再按请假记录去重
+"""
+from datetime import timedelta
+
+from sqlalchemy import func
+
+from app import db
+from app.models.leave_day import LeaveDay
+from app.models.leave_record import LeaveRecord
+
+
+# 每条 INSERT 语句写入的行数
+INSERT_BATCH_SIZE = 5000
+
+
+def _expand(leaves):
+    """把 (请假ID, 学号, 开始日期, 结束日期) 展开为 leave_day 行"""
+    for leave_id, student_id, start_date, end_date in leaves:
+        day = start_date
+        while day <= end_date:
+            yield {'leave_date': day, 'leave_id': leave_id, 'student_id': student_id}
+            day += timedelta(days=1)
+
+
+def refresh_leave_days(leave_ids=None):
+    """
+    按 leave_record 重新生成指定请假记录的请假日
+
+    先删除这些请假记录的旧行，再按当前的起止日期写回；已删除的请假记录只会被清除。
+    调用方负责提交事务。
+
+    Args:
+        leave_ids: 请假记录ID列表，None表示全部重建
+
+    Returns:
+        int: 写入的请假日行数
+    """
+    delete_query = db.session.query(LeaveDay)
+    source = db.session.query(
+        LeaveRecord.leave_id,
+        LeaveRecord.student_id,
+        LeaveRecord.leave_start_date,
+        LeaveRecord.leave_end_date
+    )
+    if leave_ids is not None:
+        leave_ids = list(leave_ids)
+        if not leave_ids:
+            return 0
+        delete_query = delete_query.filter(LeaveDay.leave_id.in_(leave_ids))
+        source = source.filter(LeaveRecord.leave_id.in_(leave_ids))
+    delete_query.delete(synchronize_session=False)
+
+    written = 0
+    batch = []
+    for row in _expand(source.execution_options(yield_per=INSERT_BATCH_SIZE)):
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            db.session.execute(LeaveDay.__table__.insert(), batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(LeaveDay.__table__.insert(), batch)
+        written += len(batch)
+    return written
+
+
+def count_leaves_on(target_date):
+    """
+    统计某天处于请假中的请假记录数
+
+    Args:
+        target_date: 日期（date对象）
+
+    Returns:
+        int: 请假记录数
+    """
+    return db.session.query(func.count()).select_from(LeaveDay)\
+        .filter(LeaveDay.leave_date == target_date).scalar()
+
+
+def leaves_overlapping(start_date, end_date):
+    """
+    SQL条件：请假区间与 [start_date, end_date] 有重叠（基于 leave_day 表）
+
+    Args:
+        start_date: 开始日期（含）
+        end_date: 结束日期（含）
+
+    Returns:
+        SQL表达式，可直接用于 LeaveRecord 查询的 filter()
+    """
+    leave_ids = db.select(LeaveDay.leave_id).where(
+        LeaveDay.leave_date >= start_date,
+        LeaveDay.leave_date <= end_date
+    )
+    return LeaveRecord.leave_id.in_(leave_ids)
@@ -0,0 +1,210 @@
+"""
+请假记录同步到考勤
+
+请假日（leave_day）× 当天上课的课程（course_session 星期 + course.week_mask 周次）
+即为受影响的 (学生, 课程, 日期)，用一条 INSERT ... SELECT ... ON CONFLICT DO UPDATE
+只为请假的学生写入“请假”考勤，其他学生的考勤不变，
+默认的到课记录仍在打开考勤页面时补齐（见 materialize_default_roster）。
+已有的记录只有仍为默认状态（到课、未迟到、无备注）时才改为请假，教师已标记的状态和备注不会被覆盖。
+自动写入的记录用备注区分来源：
+- AUTO_LEAVE_NOTE：同步时新插入的记录，撤销时删除
+- AUTO_LEAVE_REPLACED_NOTE：同步前已有的默认到课记录，撤销时恢复为到课
+请假修改或删除时，先撤销范围内自动写入的请假考勤，再重新写入。
+请假记录没有审批状态，所有请假记录都视为已批准。
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import BigInteger, Date, DateTime, Integer, String, and_, cast, func, literal, or_, select, true, union_all
+
+from app import db
+from app.models.attendance import Attendance
+from app.models.course import Course
+from app.models.course_session import CourseSession
+from app.models.leave_day import LeaveDay
+from app.utils.attendance_rollup import refresh_rollups
+from app.utils.attendance_writer import ATTENDANCE_KEY
+from app.utils.db import upsert_insert
+from app.utils.week_helper import MAX_MASK_WEEK, get_week_number
+
+
+# 自动写入的请假考勤的备注（新插入的记录）
+AUTO_LEAVE_NOTE = '请假记录自动同步'
+
+# 自动改为请假的考勤的备注（原为默认的到课记录）
+AUTO_LEAVE_REPLACED_NOTE = '请假记录自动同步（原为到课）'
+
+# INSERT ... SELECT 写入的考勤列
+INSERT_COLUMNS = [
+    'student_id', 'course_id', 'attendance_date', 'attendance_type',
+    'late_minutes', 'attendance_note', 'create_time'
+]
+
+# 每条语句处理的最长天数（日历按字面量传入，较长的范围分段处理）
+RECONCILE_WINDOW_DAYS = 31
+
+
+def _calendar(start_date, end_date):
+    """
+    日期范围内每天的星期和周次位（作为子查询传入SQL，不依赖数据库的日期函数）
+
+    week_bit 为 None 表示不在学期范围内（与 get_courses_on_date 一致，不按周次过滤）；
+    为 0 表示周次超出位掩码范围（只有每周上课的课程）。
+    week_bit 显式 CAST：整段都在学期外时该列全为 NULL，PostgreSQL 会推断为 text，无法与 week_mask 做 & 运算。
+    """
+    days = []
+    day = start_date
+    while day <= end_date:
+        week_number = get_week_number(day)
+        if not week_number:
+            week_bit = None
+        elif 1 <= week_number <= MAX_MASK_WEEK:
+            week_bit = 1 << week_number
+        else:
+            week_bit = 0
+        days.append(select(
+            literal(day, Date).label('day'),
+            literal(day.weekday(), Integer).label('weekday'),
+            cast(literal(week_bit), BigInteger).label('week_bit')
+        ))
+        day += timedelta(days=1)
+    return union_all(*days).subquery('leave_calendar')
+
+
+def _window(start_date, end_date):
+    """把日期范围切分为不超过 RECONCILE_WINDOW_DAYS 天的若干段"""
+    while start_date <= end_date:
+        window_end = min(start_date + timedelta(days=RECONCILE_WINDOW_DAYS - 1), end_date)
+        yield start_date, window_end
+        start_date = window_end + timedelta(days=1)
+
+
+def _leave_sessions(calendar, student_ids=None):
+    """请假学生在日期范围内要上的课：(student_id, course_id, day)，同一天多次课、多条请假已去重"""
+    sessions = select(
+        LeaveDay.student_id,
+        CourseSession.course_id,
+        calendar.c.day
+    ).select_from(LeaveDay).join(
+        calendar, LeaveDay.leave_date == calendar.c.day
+    ).join(
+        CourseSession, CourseSession.weekday == calendar.c.weekday
+    ).join(
+        Course, Course.course_id == CourseSession.course_id
+    ).where(
+        or_(
+            calendar.c.week_bit.is_(None),
+            Course.week_mask.is_(None),
+            Course.week_mask.op('&')(calendar.c.week_bit) != 0
+        )
+    ).distinct()
+    if student_ids is not None:
+        sessions = sessions.where(LeaveDay.student_id.in_(list(student_ids)))
+    return sessions
+
+
+def _is_default(table):
+    """考勤记录仍为默认状态（到课、未迟到、无备注）"""
+    return and_(
+        table.c.attendance_type == '到课',
+        func.coalesce(table.c.late_minutes, 0) == 0,
+        func.coalesce(table.c.attendance_note, '') == ''
+    )
+
+
+def apply_leaves(start_date, end_date, student_ids=None):
+    """
+    把日期范围内的请假写成“请假”考勤
+
+    没有考勤记录的直接写入请假（备注 AUTO_LEAVE_NOTE），已有的记录仍为默认状态时改为请假
+    （备注 AUTO_LEAVE_REPLACED_NOTE），一条 INSERT ... SELECT 完成。
+
+    Args:
+        start_date: 开始日期（含）
+        end_date: 结束日期（含）
+        student_ids: 只处理这些学生，None表示全部学生
+
+    Returns:
+        int: 写入或改为请假的考勤条数
+    """
+    sessions = _leave_sessions(_calendar(start_date, end_date), student_ids).subquery('leave_session')
+
+    leaves = select(
+        sessions.c.student_id,
+        sessions.c.course_id,
+        sessions.c.day,
+        literal('请假', String),
+        literal(0, Integer),
+        literal(AUTO_LEAVE_NOTE, String),
+        literal(datetime.utcnow(), DateTime(timezone=True))
+    ).where(true())
+    table = Attendance.__table__
+    stmt = upsert_insert(table).from_select(INSERT_COLUMNS, leaves)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(ATTENDANCE_KEY),
+        set_={
+            'attendance_type': stmt.excluded.attendance_type,
+            'late_minutes': stmt.excluded.late_minutes,
+            # 记下原为到课，撤销时恢复而不是删除
+            'attendance_note': AUTO_LEAVE_REPLACED_NOTE
+        },
+        # 只覆盖默认的到课记录，教师标记过的状态和备注保持不变
+        where=_is_default(table)
+    )
+    return db.session.execute(stmt).rowcount
+
+
+def revert_auto_leaves(start_date, end_date, student_ids=None):
+    """
+    撤销日期范围内自动写入的请假考勤
+
+    同步时新插入的记录直接删除；原为默认到课的记录恢复为到课。
+
+    Returns:
+        int: 删除和恢复的考勤条数
+    """
+    def auto_leaves(note):
+        query = db.session.query(Attendance).filter(
+            Attendance.attendance_date >= start_date,
+            Attendance.attendance_date <= end_date,
+            Attendance.attendance_type == '请假',
+            Attendance.attendance_note == note
+        )
+        if student_ids is not None:
+            query = query.filter(Attendance.student_id.in_(list(student_ids)))
+        return query
+
+    deleted = auto_leaves(AUTO_LEAVE_NOTE).delete(synchronize_session=False)
+    restored = auto_leaves(AUTO_LEAVE_REPLACED_NOTE).update({
+        Attendance.attendance_type: '到课',
+        Attendance.late_minutes: 0,
+        Attendance.attendance_note: ''
+    }, synchronize_session=False)
+    return deleted + restored
+
+
+def reconcile_leaves(start_date, end_date, student_ids=None):
+    """
+    按当前的请假日重新同步日期范围内的请假考勤，并刷新考勤日汇总
+
+    请假记录修改后 leave_day 须已更新（见 refresh_leave_days）。调用方负责提交事务。
+
+    Args:
+        start_date: 开始日期（含）
+        end_date: 结束日期（含）
+        student_ids: 只处理这些学生，None表示全部学生
+
+    Returns:
+        dict: {'reverted': 撤销的自动请假考勤数, 'applied': 写入的请假考勤数}
+    """
+    result = {'reverted': 0, 'applied': 0}
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return result
+
+    for window_start, window_end in _window(start_date, end_date):
+        result['reverted'] += revert_auto_leaves(window_start, window_end, student_ids)
+        result['applied'] += apply_leaves(window_start, window_end, student_ids)
+    if any(result.values()):
+        refresh_rollups(start_date=start_date, end_date=end_date)
+    return result
@@ -0,0 +1,167 @@
+"""
+请假统计（单次查询汇总）
+
+统计区间内的请假日和请假记录先放进 CTE（matched_days：区间内的请假日；matched：与区间重叠的请假记录），
+总数、按类型、按学生前10名、每天的请假人天和每天开始的请假数用 UNION ALL 拼成一条语句，一次往返取回。
+按教学周和按月份的分布由每天的数据在 Python 中累加（周次由 week_helper 计算），
+数据库只需按请假日主键顺序分组一次，不依赖数据库的日期函数，PostgreSQL 和 SQLite 都可以执行。
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import Integer, String, cast, func, literal, null, select, union_all
+
+from app import db
+from app.models.leave_day import LeaveDay
+from app.models.leave_record import LeaveRecord
+from app.models.student import Student
+from app.utils.week_helper import get_week_date_range, get_week_number
+
+# 请假次数排行的人数
+TOP_STUDENTS = 10
+
+
+def semester_range():
+    """
+    本学期（第1周到第20周）的日期范围
+
+    Returns:
+        tuple: (start_date, end_date)
+    """
+    return get_week_date_range(1)[0], get_week_date_range(20)[1]
+
+
+def _week_buckets(start_date, end_date):
+    """区间内的教学周：[(周次, 周一, 周日)]，学期外的日期不计入任何一周"""
+    first_week = get_week_number(start_date) or (1 if start_date < get_week_date_range(1)[0] else None)
+    last_week = get_week_number(end_date) or (20 if end_date > get_week_date_range(20)[1] else None)
+    if not first_week or not last_week:
+        return []
+    return [(week,) + get_week_date_range(week) for week in range(first_week, last_week + 1)]
+
+
+def _month_buckets(start_date, end_date):
+    """区间内的月份：[('YYYY-MM', 月初, 月末)]"""
+    buckets = []
+    month_start = date(start_date.year, start_date.month, 1)
+    while month_start <= end_date:
+        next_month = date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+        buckets.append((month_start.strftime('%Y-%m'), month_start, next_month - timedelta(days=1)))
+        month_start = next_month
+    return buckets
+
+
+def _as_date(value):
+    """日期列转为字符串后的值还原为 date（SQLite 和 PostgreSQL 都是 YYYY-MM-DD）"""
+    return date.fromisoformat(value[:10])
+
+
+def leave_statistics(start_date, end_date):
+    """
+    汇总日期区间内的请假情况
+
+    总数、按类型和按学生的统计沿用原口径：与区间重叠的请假记录，天数为整条请假的天数；
+    按周和按月统计区间内每个分组的请假人次（与该分组重叠的请假记录数）和请假人天。
+
+    Args:
+        start_date: 开始日期（含）
+        end_date: 结束日期（含）
+
+    Returns:
+        dict: {
+            'total_count', 'total_days',
+            'type_stats': [{'leave_type', 'count', 'days'}]（按人次降序）,
+            'student_stats': [{'student_id', 'student_name', 'count', 'days'}]（前 TOP_STUDENTS 名）,
+            'week_stats': [{'week', 'start_date', 'end_date', 'count', 'days'}]（含无请假的周）,
+            'month_stats': [{'month', 'start_date', 'end_date', 'count', 'days'}]（含无请假的月）
+        }
+    """
+    weeks = _week_buckets(start_date, end_date)
+    months = _month_buckets(start_date, end_date)
+
+    matched_days = select(LeaveDay.leave_id, LeaveDay.leave_date).where(
+        LeaveDay.leave_date >= start_date,
+        LeaveDay.leave_date <= end_date
+    ).cte('matched_days')
+    matched = select(
+        LeaveRecord.leave_id,
+        LeaveRecord.student_id,
+        LeaveRecord.leave_type,
+        LeaveRecord.leave_days,
+        LeaveRecord.leave_start_date
+    ).where(LeaveRecord.leave_id.in_(select(matched_days.c.leave_id))).cte('matched')
+
+    def part(dim, key, label, count, days):
+        # UNION ALL 各部分的列：(分组, 键, 名称, 人次, 天数)
+        return [
+            literal(dim, String).label('dim'),
+            cast(key, String).label('key'),
+            cast(label, String).label('label'),
+            cast(count, Integer).label('count'),
+            cast(func.coalesce(days, 0), Integer).label('days')
+        ]
+
+    total_days = func.sum(matched.c.leave_days)
+    ranked = select(
+        matched.c.student_id,
+        Student.student_name,
+        func.count().label('count'),
+        total_days.label('days'),
+        func.row_number().over(
+            order_by=(func.count().desc(), total_days.desc(), matched.c.student_id)
+        ).label('rank')
+    ).join(Student, Student.student_id == matched.c.student_id).group_by(
+        matched.c.student_id, Student.student_name
+    ).subquery('ranked')
+
+    parts = [
+        select(*part('total', null(), null(), func.count(), total_days)),
+        select(*part('type', matched.c.leave_type, null(), func.count(), total_days))
+        .group_by(matched.c.leave_type),
+        select(*part('student', ranked.c.student_id, ranked.c.student_name, ranked.c.count, ranked.c.days))
+        .where(ranked.c.rank <= TOP_STUDENTS),
+        # 每天的请假人天（按 leave_day 主键顺序分组）
+        select(*part('day', matched_days.c.leave_date, null(), func.count(), func.count()))
+        .group_by(matched_days.c.leave_date),
+        # 每天开始的请假记录数（用于计算各时段的请假人次）
+        select(*part('start', matched.c.leave_start_date, null(), func.count(), null()))
+        .where(matched.c.leave_start_date > start_date)
+        .group_by(matched.c.leave_start_date)
+    ]
+
+    rows = {'total': [], 'type': [], 'student': [], 'day': [], 'start': []}
+    for row in db.session.execute(union_all(*parts)):
+        rows[row.dim].append(row)
+
+    total = rows['total'][0]
+    day_counts = {_as_date(row.key): row.count for row in rows['day']}
+    start_counts = {_as_date(row.key): row.count for row in rows['start']}
+
+    def breakdown(name, buckets):
+        # 时段内的请假人次 = 时段第一天在请假的人次 + 之后每天新开始的请假数
+        result = []
+        for key, first_day, last_day in buckets:
+            first_day, last_day = max(first_day, start_date), min(last_day, end_date)
+            count = day_counts.get(first_day, 0)
+            days = count
+            day = first_day + timedelta(days=1)
+            while day <= last_day:
+                count += start_counts.get(day, 0)
+                days += day_counts.get(day, 0)
+                day += timedelta(days=1)
+            result.append({name: key, 'start_date': first_day, 'end_date': last_day, 'count': count, 'days': days})
+        return result
+
+    return {
+        'total_count': total.count,
+        'total_days': total.days,
+        'type_stats': [
+            {'leave_type': row.key, 'count': row.count, 'days': row.days}
+            for row in sorted(rows['type'], key=lambda row: (-row.count, row.key or ''))
+        ],
+        'student_stats': [
+            {'student_id': row.key, 'student_name': row.label, 'count': row.count, 'days': row.days}
+            for row in sorted(rows['student'], key=lambda row: (-row.count, -row.days, row.key))
+        ],
+        'week_stats': breakdown('week', weeks),
+        'month_stats': breakdown('month', months)
+    }
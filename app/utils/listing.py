@@ -0,0 +1,223 @@
+"""
+列表页面的查询辅助（学生、课程、请假记录列表共用）
+
+- 关键字搜索：search_filter 生成 ILIKE '%关键字%' 条件，PostgreSQL 上由 pg_trgm 三元组 GIN 索引加速
+  （索引见各模型的 trigram_index 和 migrations/add_search_indexes.sql）
+- 游标分页（keyset）：按排序键的值定位下一页/上一页，不使用 OFFSET，翻到多深都只读一页的数据
+- 估算总数：PostgreSQL 上从 EXPLAIN 的估算行数取总数，较小时才执行精确的 COUNT(*)
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, or_, tuple_
+
+from app import db
+
+
+# 每页条数的默认值
+DEFAULT_PER_PAGE = 10
+
+# 估算行数低于该值时改用精确计数（计数代价很小，避免小结果集显示“约”）
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def search_filter(columns, search):
+    """
+    关键字搜索条件：任一列包含关键字（不区分大小写，% 和 _ 按普通字符匹配）
+
+    Args:
+        columns: 参与搜索的列
+        search: 关键字
+
+    Returns:
+        SQL条件
+    """
+    return or_(*[column.icontains(search, autoescape=True) for column in columns])
+
+
+def encode_cursor(values):
+    """把排序键的值编码为URL安全的游标字符串"""
+    items = []
+    for value in values:
+        if isinstance(value, datetime):
+            items.append({'dt': value.isoformat()})
+        elif isinstance(value, date):
+            items.append({'d': value.isoformat()})
+        elif isinstance(value, Decimal):
+            items.append({'n': str(value)})
+        else:
+            items.append(value)
+    raw = json.dumps(items, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    解析游标字符串
+
+    Args:
+        cursor: encode_cursor 生成的字符串
+        size: 排序键的个数
+
+    Returns:
+        list: 排序键的值；游标无效时返回 None
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        items = json.loads(raw.decode('utf-8'))
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    if not isinstance(items, list) or len(items) != size:
+        return None
+
+    values = []
+    try:
+        for item in items:
+            if isinstance(item, dict):
+                if 'dt' in item:
+                    item = datetime.fromisoformat(item['dt'])
+                elif 'd' in item:
+                    item = date.fromisoformat(item['d'])
+                elif 'n' in item:
+                    item = Decimal(item['n'])
+                else:
+                    return None
+            values.append(item)
+    except (ValueError, ArithmeticError, TypeError):
+        return None
+    return values
+
+
+def _seek(keys, values, reverse=False):
+    """
+    排在游标之后（reverse=True 时为之前）的行的条件
+
+    各列排序方向相同时用行值比较 (a, b) < (x, y)，可以直接走复合索引；
+    方向不同时展开为 a < x OR (a = x AND b > y) ...
+    """
+    def after(column, descending, value):
+        return column < value if descending != reverse else column > value
+
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        columns = tuple_(*[column for column, _ in keys])
+        return after(columns, directions.pop(), tuple_(*values))
+
+    conditions = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        conditions.append(and_(*equal, after(column, descending, values[i])))
+    return or_(*conditions)
+
+
+def estimate_count(query):
+    """
+    查询结果的总数
+
+    PostgreSQL 上先取 EXPLAIN 的估算行数，低于 EXACT_COUNT_THRESHOLD 时再精确计数；
+    其他数据库直接精确计数。
+
+    Args:
+        query: 查询对象（未分页）
+
+    Returns:
+        tuple: (总数, 是否为估算值)
+    """
+    if db.engine.dialect.name == 'postgresql':
+        compiled = query.statement.compile(
+            dialect=db.engine.dialect,
+            compile_kwargs={'render_postcompile': True}
+        )
+        plan = db.session.connection().exec_driver_sql(
+            'EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimated = int(plan[0]['Plan']['Plan Rows'])
+        if estimated >= EXACT_COUNT_THRESHOLD:
+            return estimated, True
+    return query.order_by(None).count(), False
+
+
+class KeysetPagination:
+    """
+    游标分页结果（模板中代替 Flask-SQLAlchemy 的 Pagination 使用）
+
+    Attributes:
+        items: 当前页的记录
+        per_page: 每页条数
+        total: 总数（estimated 为 True 时是估算值）
+        estimated: 总数是否为估算值
+        next_cursor / prev_cursor: 下一页/上一页的游标，None 表示没有
+    """
+
+    def __init__(self, items, per_page, total, estimated, next_cursor, prev_cursor):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.estimated = estimated
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def keyset_paginate(query, keys, after=None, before=None, per_page=DEFAULT_PER_PAGE, count=True):
+    """
+    按排序键游标分页
+
+    Args:
+        query: 查询对象（不要带 order_by，排序由 keys 决定）
+        keys: 排序键 [(列或表达式, 是否降序)]，最后一个键必须唯一（如主键），各键的值不能为空
+        after: 取该游标之后的一页（“下一页”）
+        before: 取该游标之前的一页（“上一页”），同时给出时以 after 为准
+        per_page: 每页条数
+        count: 是否统计总数（见 estimate_count）
+
+    Returns:
+        KeysetPagination
+    """
+    total, estimated = estimate_count(query) if count else (None, False)
+
+    def fetch(cursor, reverse):
+        # 排序键作为附加列一起查出，用来生成翻页游标
+        page_query = query.add_columns(*[column.label(f'_keyset_{i}') for i, (column, _) in enumerate(keys)])
+        if cursor is not None:
+            page_query = page_query.filter(_seek(keys, cursor, reverse))
+        page_query = page_query.order_by(*[
+            column.desc() if descending != reverse else column.asc() for column, descending in keys
+        ])
+        rows = page_query.limit(per_page + 1).all()
+        return [(row[0], tuple(row[1:])) for row in rows]
+
+    after_values = decode_cursor(after, len(keys)) if after else None
+    before_values = decode_cursor(before, len(keys)) if before and after_values is None else None
+
+    if before_values is not None:
+        rows = fetch(before_values, reverse=True)
+        if len(rows) > per_page:
+            rows = rows[:per_page][::-1]
+            return KeysetPagination(
+                [item for item, _ in rows], per_page, total, estimated,
+                encode_cursor(rows[-1][1]), encode_cursor(rows[0][1])
+            )
+        # 已回到第一页，按第一页重新取满一页
+        after_values = None
+
+    rows = fetch(after_values, reverse=False)
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    return KeysetPagination(
+        [item for item, _ in rows], per_page, total, estimated,
+        encode_cursor(rows[-1][1]) if has_next else None,
+        encode_cursor(rows[0][1]) if after_values is not None and rows else None
+    )
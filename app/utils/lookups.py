@@ -0,0 +1,60 @@
+"""
+筛选下拉框选项（学期、政治面貌、请假类型）
+
+列表页面每次渲染都要取这些选项，原来各自执行一次 SELECT DISTINCT 扫描整张表。
+这里把结果缓存在 lookups 命名空间中：学生、课程、请假记录的写操作提交后
+调用 cache.invalidate('lookups') 使其失效，期间的页面渲染不再访问数据库。
+"""
+from app import cache, db
+from app.models import Course, LeaveRecord, Student
+
+
+# 选项只在写操作后变化（写操作会主动失效），过期时间可以设得较长
+LOOKUP_TTL = 3600
+
+
+@cache.memoize('lookups', ttl=LOOKUP_TTL)
+def get_semesters():
+    """
+    所有课程的学期（新学期在前）
+
+    Returns:
+        list: 学期名称列表
+    """
+    rows = db.session.query(Course.semester)\
+        .distinct()\
+        .filter(Course.semester.isnot(None))\
+        .order_by(Course.semester.desc())\
+        .all()
+    return [row[0] for row in rows]
+
+
+@cache.memoize('lookups', ttl=LOOKUP_TTL)
+def get_political_statuses():
+    """
+    学生中出现过的政治面貌
+
+    Returns:
+        list: 政治面貌列表（按名称排序）
+    """
+    rows = db.session.query(Student.political_status)\
+        .distinct()\
+        .filter(Student.political_status.isnot(None))\
+        .order_by(Student.political_status)\
+        .all()
+    return [row[0] for row in rows]
+
+
+@cache.memoize('lookups', ttl=LOOKUP_TTL)
+def get_leave_types():
+    """
+    请假记录中出现过的请假类型
+
+    Returns:
+        list: 请假类型列表（按名称排序）
+    """
+    rows = db.session.query(LeaveRecord.leave_type)\
+        .distinct()\
+        .order_by(LeaveRecord.leave_type)\
+        .all()
+    return [row[0] for row in rows]
@@ -0,0 +1,249 @@
+"""
+课程上课时间解析辅助函数
+
+课表文本（上课时间字符串、ICS事件描述）的正则都在模块加载时编译一次；
+解析结果按原始字符串用 LRU 缓存，同一学期的课表文本大量重复，重复解析直接命中缓存。
+缓存的返回值都是不可变的元组，调用方不能修改。
+"""
+import re
+from datetime import time
+from functools import lru_cache
+
+
+# 节次时间定义
+DEFAULT_PERIOD_TIMES = {
+    1: (time(8, 0),  time(8, 45)),
+    2: (time(8, 55), time(9, 40)),
+    3: (time(10, 0), time(10, 45)),
+    4: (time(10, 55), time(11, 40)),
+    5: (time(12, 20), time(13, 5)),   # ✅ 新增：中午第一节
+    6: (time(13, 10), time(13, 50)),  # ✅ 新增：中午第二节
+    7: (time(14, 0),  time(14, 45)),
+    8: (time(14, 55), time(15, 40)),
+    9: (time(16, 0),  time(16, 45)),
+    10: (time(16, 55), time(17, 40)),
+    11: (time(19, 0), time(19, 45)),
+    12: (time(19, 55), time(20, 40)),
+}
+
+
+# 星期映射（周一为0）
+CN_WEEKDAY_MAP = {
+    '一': 0, '二': 1, '三': 2, '四': 3, '五': 4, '六': 5, '日': 6, '天': 6
+}
+
+# 节次按顺序排列：[(节次, 开始秒数, 结束秒数)]
+_PERIOD_SECONDS = [
+    (period, start.hour * 3600 + start.minute * 60, end.hour * 3600 + end.minute * 60)
+    for period, (start, end) in sorted(DEFAULT_PERIOD_TIMES.items())
+]
+
+# 解析结果缓存的条目数
+PARSE_CACHE_SIZE = 4096
+
+# 多个时间段之间的分隔符
+_PART_SEPARATOR_RE = re.compile(r'[;,/]|，')
+# 周X + 时间格式（如：周一 08:00-09:40）
+_CLOCK_TIME_RE = re.compile(r'周([一二三四五六日天])\s+(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})')
+# 周X + 节次格式（如：周一3-4节、周一第3-4节、周一3,4节）
+_PERIOD_RE = re.compile(
+    r'周([一二三四五六日天])\s*(?:第)?\s*([0-9]{1,2}(?:-[0-9]{1,2})?|[0-9]{1,2}\s*[,-]\s*[0-9]{1,2})\s*(?:节|节课)?'
+)
+
+# ICS事件描述中的字段
+_COURSE_CODE_RE = re.compile(r'课程代码:\s*(\w+)')
+_TEACHER_RE = re.compile(r'教师:\s*([^\s]+)')
+_WEEK_RE = re.compile(r'周次:\s*(\d+)')
+# 课程名称后的课程性质标识
+_COURSE_TYPE_RE = re.compile(r'[（(](必修课|选修课|限选课)[）)]')
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_course_time(course_time_str):
+    """
+    解析课程时间字符串（按字符串缓存），支持多种格式：
+    - "周一3-4节"
+    - "周一 3-4节"
+    - "周一3,4节"
+    - "周一 08:00-09:40" (需要转换为节次)
+
+    Returns:
+        tuple: ((星期, 开始节次, 结束节次), ...)
+    """
+    if not course_time_str:
+        return ()
+    
+    results = []
+    s = course_time_str.strip()
+    
+    # 支持多种分隔符分割多个时间段
+    parts = _PART_SEPARATOR_RE.split(s)
+    
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        
+        # 优先匹配模式2: 周X + 时间格式 (如: 周一 08:00-09:40, 周二 08:20-09:50)
+        # 这个格式更精确，应该优先匹配
+        m2 = _CLOCK_TIME_RE.search(part)
+        if m2:
+            cn_week = m2.group(1)
+            start_h = int(m2.group(2))
+            start_m = int(m2.group(3))
+            end_h = int(m2.group(4))
+            end_m = int(m2.group(5))
+            
+            weekday = CN_WEEKDAY_MAP.get(cn_week)
+            if weekday is not None:
+                # 将时间转换为节次
+                start_period = time_to_period(start_h, start_m)
+                end_period = time_to_period(end_h, end_m)
+                
+                # 如果开始节次和结束节次都找到了，添加到结果中
+                if start_period and end_period:
+                    # 确保开始节次 <= 结束节次
+                    if start_period <= end_period:
+                        results.append((weekday, start_period, end_period))
+                    else:
+                        # 如果开始节次 > 结束节次，可能是时间解析错误，使用开始节次作为结束节次
+                        results.append((weekday, start_period, start_period))
+                elif start_period:
+                    # 如果只找到了开始节次，使用开始节次作为结束节次
+                    results.append((weekday, start_period, start_period))
+                elif end_period:
+                    # 如果只找到了结束节次，使用结束节次作为开始节次
+                    results.append((weekday, end_period, end_period))
+            continue
+        
+        # 模式1: 周X + 节次格式 (如: 周一3-4节, 周一 3-4节, 周一3,4节, 周一第3-4节)
+        # 注意：这个模式不应该匹配包含冒号的时间格式
+        # 修改正则表达式，确保不匹配时间格式（不包含冒号）
+        if ':' not in part:  # 如果包含冒号，说明是时间格式，跳过模式1
+            m1 = _PERIOD_RE.search(part)
+            if m1:
+                cn_week = m1.group(1)
+                period_part = m1.group(2).replace(' ', '').replace('，', ',')
+                weekday = CN_WEEKDAY_MAP.get(cn_week)
+                if weekday is not None:
+                    try:
+                        # 处理 "3-4" 或 "3,4" 格式
+                        if '-' in period_part:
+                            period_parts = period_part.split('-')
+                            start_p = int(period_parts[0])
+                            end_p = int(period_parts[1])
+                        elif ',' in period_part:
+                            periods = [int(p.strip()) for p in period_part.split(',') if p.strip().isdigit()]
+                            if periods:
+                                start_p = min(periods)
+                                end_p = max(periods)
+                            else:
+                                continue
+                        else:
+                            start_p = end_p = int(period_part)
+                        
+                        # 验证节次范围（1-12）
+                        if 1 <= start_p <= 12 and 1 <= end_p <= 12 and start_p <= end_p:
+                            results.append((weekday, start_p, end_p))
+                    except (ValueError, IndexError):
+                        continue
+    
+    return tuple(results)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def time_to_period(hour, minute):
+    """
+    将时间转换为节次
+    返回节次数，如果不在任何节次范围内返回None
+    
+    改进逻辑：
+    1. 如果时间在节次的时间范围内，直接返回该节次
+    2. 如果时间在节次开始时间前后15分钟内，返回该节次
+    3. 如果时间超过节次结束时间，但在下一个节次开始之前（间隔内），返回当前节次
+    4. 对于边界情况，优先匹配时间上最接近的节次
+    """
+    try:
+        t = time(hour, minute)
+    except ValueError:
+        return None
+    
+    t_seconds = t.hour * 3600 + t.minute * 60
+    
+    # 按节次顺序检查（1-12）
+    for i, (period, start_seconds, end_seconds) in enumerate(_PERIOD_SECONDS):
+        
+        # 情况1: 时间在节次的时间范围内
+        if start_seconds <= t_seconds <= end_seconds:
+            return period
+        
+        # 情况2: 时间在节次开始时间前后15分钟内（允许提前或延后）
+        if abs(t_seconds - start_seconds) <= 900:  # 15分钟 = 900秒
+            return period
+        
+        # 情况3: 时间超过节次结束时间，但在下一个节次开始之前
+        # 计算到下一个节次开始的时间
+        if i < len(_PERIOD_SECONDS) - 1:
+            next_period, next_start_seconds, _ = _PERIOD_SECONDS[i + 1]
+            
+            # 如果时间在结束时间和下一个节次开始之间
+            if end_seconds < t_seconds < next_start_seconds:
+                # 计算距离结束时间和下一个开始时间的距离
+                diff_to_end = t_seconds - end_seconds
+                diff_to_next_start = next_start_seconds - t_seconds
+                
+                # 如果更接近当前节次的结束时间（在间隔的前半段），返回当前节次
+                # 否则返回下一个节次
+                if diff_to_end <= diff_to_next_start:
+                    return period
+                else:
+                    return next_period
+        else:
+            # 最后一个节次，如果时间超过结束时间但在合理范围内（20分钟内）
+            if t_seconds > end_seconds and (t_seconds - end_seconds) <= 1200:
+                return period
+    
+    # 如果没有精确匹配，找最接近的节次（按开始时间）
+    best_match = None
+    min_diff = float('inf')
+    
+    for period, start_seconds, _ in _PERIOD_SECONDS:
+        diff = abs(t_seconds - start_seconds)
+        if diff < min_diff:
+            min_diff = diff
+            best_match = period
+    
+    # 只有在1小时内才返回，否则返回None
+    if min_diff <= 3600:
+        return best_match
+    
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_event_description(description):
+    """
+    从ICS事件描述中提取课程代码、教师和周次（按字符串缓存）
+
+    Args:
+        description: 事件描述（如：课程代码: 010345\\n教师: 王丽芳\\n周次: 10）
+
+    Returns:
+        tuple: (课程代码, 教师, 周次)，缺少的字段为 None
+    """
+    if not description:
+        return None, None, None
+    course_code_match = _COURSE_CODE_RE.search(description)
+    teacher_match = _TEACHER_RE.search(description)
+    week_match = _WEEK_RE.search(description)
+    return (
+        course_code_match.group(1) if course_code_match else None,
+        teacher_match.group(1) if teacher_match else None,
+        int(week_match.group(1)) if week_match else None
+    )
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def clean_course_name(summary):
+    """去掉课程名称中的必修/选修/限选标识（按字符串缓存）"""
+    return _COURSE_TYPE_RE.sub('', summary).strip()
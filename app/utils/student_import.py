@@ -0,0 +1,126 @@
+"""
+Excel学生名单导入
+
+以只读模式（read_only）逐行读取工作表，每 IMPORT_CHUNK_SIZE 行为一批：
+先校验，再一次 IN 查询取出本批已存在的学号，最后用 INSERT ... ON CONFLICT DO UPDATE 写入。
+校验失败的行连同原始数据写入错误明细表，导入结束后可下载。
+全部批次在同一个事务中写入，由调用方提交或回滚。
+"""
+from app import db
+from app.models import Student
+from app.utils.db import upsert_insert
+
+
+# 每批校验和写入的行数
+IMPORT_CHUNK_SIZE = 1000
+
+# 错误明细表的列：[(表头, 列宽)]
+ERROR_COLUMNS = [('行号', 8), ('学号', 15), ('姓名', 12), ('政治面貌', 12), ('联系电话', 15), ('错误原因', 30)]
+
+# 导入时更新的列（已存在的学生保留原创建时间）
+UPDATE_COLUMNS = ('student_name', 'political_status', 'phone')
+
+
+def _cell_text(row, index):
+    """读取单元格文本（超出列数或为空时返回空字符串）"""
+    value = row[index] if index < len(row) else None
+    return str(value).strip() if value is not None else ''
+
+
+def validate_row(row):
+    """
+    校验一行数据
+
+    Args:
+        row: 单元格值元组（学号, 姓名, 政治面貌, 联系电话）
+
+    Returns:
+        tuple: (学生字段dict, None) 或 (None, 错误原因)
+    """
+    if len(row) < 4:
+        return None, '数据列数不足'
+
+    student_id = _cell_text(row, 0)
+    student_name = _cell_text(row, 1)
+    political_status = _cell_text(row, 2)
+    phone = _cell_text(row, 3)
+
+    if not student_id:
+        return None, '学号为空'
+    if not student_name:
+        return None, '姓名为空'
+    if not phone:
+        return None, '联系电话为空'
+
+    return {
+        'student_id': student_id,
+        'student_name': student_name,
+        'political_status': political_status or None,
+        'phone': phone
+    }, None
+
+
+def _upsert_students(students):
+    """批量写入学生（学号已存在则更新姓名、政治面貌和电话）"""
+    stmt = upsert_insert(Student.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Student.__table__.c.student_id],
+        set_={column: stmt.excluded[column] for column in UPDATE_COLUMNS}
+    )
+    db.session.execute(stmt, students)
+
+
+def import_student_rows(rows, error_sheet, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    分批导入学生数据（不提交事务）
+
+    Args:
+        rows: 可迭代的 (行号, 单元格值元组)，空行会被跳过
+        error_sheet: XlsxExport，写入校验失败的行
+        chunk_size: 每批行数
+
+    Returns:
+        dict: {'success', 'created', 'updated', 'errors'}
+    """
+    summary = {'success': 0, 'created': 0, 'updated': 0, 'errors': 0}
+    seen = set()  # 之前批次已写入的学号
+    chunk = []
+
+    def flush():
+        # 同一学号在一批内出现多次时以最后一行为准（同一条 INSERT 不能两次更新同一行）
+        students = {}
+        for row_num, row in chunk:
+            student, error = validate_row(row)
+            if error:
+                summary['errors'] += 1
+                error_sheet.row(
+                    [row_num] + [_cell_text(row, i) for i in range(4)] + [error],
+                    styles={5: 'export_text'}
+                )
+                continue
+            students[student['student_id']] = student
+            summary['success'] += 1
+        if not students:
+            return
+
+        new_ids = set(students) - seen
+        existing = {
+            student_id for student_id, in
+            db.session.query(Student.student_id).filter(Student.student_id.in_(list(new_ids)))
+        } if new_ids else set()
+        summary['created'] += len(new_ids - existing)
+        summary['updated'] += len(students) - len(new_ids - existing)
+        seen.update(students)
+        _upsert_students(list(students.values()))
+
+    for row_num, row in rows:
+        # 跳过空行
+        if not any(value is not None and str(value).strip() for value in row):
+            continue
+        chunk.append((row_num, row))
+        if len(chunk) >= chunk_size:
+            flush()
+            chunk = []
+    if chunk:
+        flush()
+    return summary
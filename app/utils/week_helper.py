@@ -2,6 +2,7 @@
 周次计算辅助函数
 """
 from datetime import date, timedelta
+from functools import lru_cache
 
 
 # 第一周的开始日期：2025年9月1日
@@ -71,6 +72,63 @@ def get_current_week():
     return get_week_number(date.today())
 
 
+# 周次位掩码最多记录到第62周（保证能存入 BIGINT）
+MAX_MASK_WEEK = 62
+
+
+@lru_cache(maxsize=1024)
+def compile_week_range(week_range_str):
+    """
+    将周次范围字符串编译为整数位掩码（第n周对应第n位），按字符串缓存
+
+    Args:
+        week_range_str: 周次范围字符串（如：1-8,13,15,17 或 9-16）
+
+    Returns:
+        int: 周次位掩码；未设置范围时返回None（表示每周都上课）
+    """
+    if not week_range_str:
+        return None
+
+    mask = 0
+    for part in week_range_str.split(','):
+        part = part.strip()
+        try:
+            if '-' in part:
+                # 范围格式：1-8
+                start, end = part.split('-')
+                weeks = range(int(start), int(end) + 1)
+            else:
+                # 单个周次：13
+                weeks = (int(part),)
+        except ValueError:
+            continue
+
+        for week in weeks:
+            if 1 <= week <= MAX_MASK_WEEK:
+                mask |= 1 << week
+
+    return mask
+
+
+def week_in_mask(week_number, mask):
+    """
+    判断周次是否在位掩码中
+
+    Args:
+        week_number: 周次（1-20）
+        mask: compile_week_range 返回的位掩码，None表示每周都上课
+
+    Returns:
+        bool: True表示该周上课
+    """
+    if mask is None:
+        return True
+    if not week_number or not 1 <= week_number <= MAX_MASK_WEEK:
+        return False
+    return bool(mask >> week_number & 1)
+
+
 def is_in_week_range(week_number, week_range_str):
     """
     判断指定周次是否在周次范围内
@@ -82,30 +140,8 @@ def is_in_week_range(week_number, week_range_str):
     Returns:
         bool: True表示在范围内，False表示不在范围内
     """
-    if not week_range_str:
-        return True  # 如果没有设置范围，默认所有周都上课
-    
-    # 解析周次范围
-    week_set = set()
-    parts = week_range_str.split(',')
-    
-    for part in parts:
-        part = part.strip()
-        if '-' in part:
-            # 范围格式：1-8
-            try:
-                start, end = part.split('-')
-                week_set.update(range(int(start), int(end) + 1))
-            except ValueError:
-                continue
-        else:
-            # 单个周次：13
-            try:
-                week_set.add(int(part))
-            except ValueError:
-                continue
-    
-    return week_number in week_set
+    # 没有设置范围时默认所有周都上课
+    return week_in_mask(week_number, compile_week_range(week_range_str))
 
 
 def format_week_range(week_range_str):
@@ -16,6 +16,20 @@ class Config:
     # Flask密钥（用于会话管理等，内网使用可简单设置）
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-for-internal-use'
 
+    # 缓存配置（memory: 进程内缓存；redis: 多进程共享缓存，需要安装redis并设置CACHE_REDIS_URL）
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'memory'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    CACHE_DEFAULT_TTL = 30  # 默认缓存秒数
+    CACHE_TTLS = {
+        'dashboard:get_basic_stats': 10,  # 今日统计刷新较快
+        'dashboard:get_chart_data': 60,
+    }
+
+    # 后台导出任务配置（大数据量导出在线程池中生成，文件保存在导出目录，过期后自动清理）
+    EXPORT_JOB_DIR = os.environ.get('EXPORT_JOB_DIR')  # 为空时使用系统临时目录下的 attendance_exports
+    EXPORT_JOB_WORKERS = 2  # 同时生成的导出任务数
+    EXPORT_JOB_TTL = 600  # 导出文件保留秒数，期间相同条件的导出直接复用
+
     # 分页配置（每页显示记录数）
     PER_PAGE = 10
 
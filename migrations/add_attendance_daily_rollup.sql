@@ -0,0 +1,25 @@
+-- 新建attendance_daily_rollup表的迁移脚本
+-- 用途: 按 日期+课程 预先汇总考勤人数，数据概览和历史查询不再扫描原始考勤记录
+
+CREATE TABLE IF NOT EXISTS attendance_daily_rollup (
+    attendance_date DATE NOT NULL,
+    course_id VARCHAR(20) NOT NULL REFERENCES course(course_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    total INT NOT NULL DEFAULT 0,
+    present INT NOT NULL DEFAULT 0,
+    leave INT NOT NULL DEFAULT 0,
+    absent INT NOT NULL DEFAULT 0,
+    update_time TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (attendance_date, course_id)
+);
+
+-- 添加注释
+COMMENT ON TABLE attendance_daily_rollup IS '考勤日汇总（按日期+课程）';
+COMMENT ON COLUMN attendance_daily_rollup.total IS '考勤记录总数';
+COMMENT ON COLUMN attendance_daily_rollup.present IS '到课人数';
+COMMENT ON COLUMN attendance_daily_rollup.leave IS '请假人数';
+COMMENT ON COLUMN attendance_daily_rollup.absent IS '旷课人数';
+
+-- 添加索引
+CREATE INDEX IF NOT EXISTS ix_attendance_daily_rollup_course ON attendance_daily_rollup (course_id, attendance_date);
+
+-- 根据已有考勤记录生成汇总请执行: flask rebuild-rollups
@@ -0,0 +1,27 @@
+-- 为attendance表添加考勤热点查询索引的迁移脚本
+-- 用途: 考勤日历/记录页按 (course_id, attendance_date)、数据概览按 (attendance_date, attendance_type)、
+--       学生详情按 student_id、最近活动按 create_time 查询
+-- 注意: CREATE INDEX CONCURRENTLY 不能在事务中执行，请用 psql 直接运行本文件（不要加 -1/--single-transaction）
+-- 唯一约束 uq_attendance_student_course_date 见 add_attendance_unique_key.sql，需先执行
+
+-- 课程+日期（覆盖考勤状态，日统计可只读索引）
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attendance_course_date
+    ON attendance (course_id, attendance_date) INCLUDE (attendance_type);
+
+-- 日期+状态
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attendance_date_type
+    ON attendance (attendance_date, attendance_type);
+
+-- 学生+日期
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attendance_student_date
+    ON attendance (student_id, attendance_date);
+
+-- 创建时间
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attendance_create_time
+    ON attendance (create_time);
+
+-- 更新统计信息
+ANALYZE attendance;
+
+-- 查看修改结果
+SELECT indexname, indexdef FROM pg_indexes WHERE tablename = 'attendance';
@@ -0,0 +1,17 @@
+-- 为attendance表添加 (student_id, course_id, attendance_date) 唯一约束
+-- 用途: 支持考勤批量保存（INSERT ... ON CONFLICT）
+
+-- 清理重复的考勤记录（保留每组中最新的一条）
+DELETE FROM attendance a
+USING attendance b
+WHERE a.student_id = b.student_id
+  AND a.course_id = b.course_id
+  AND a.attendance_date = b.attendance_date
+  AND a.attendance_id < b.attendance_id;
+
+-- 添加唯一约束
+ALTER TABLE attendance
+    ADD CONSTRAINT uq_attendance_student_course_date UNIQUE (student_id, course_id, attendance_date);
+
+-- 查看修改结果
+SELECT conname FROM pg_constraint WHERE conrelid = 'attendance'::regclass;
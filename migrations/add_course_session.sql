@@ -0,0 +1,22 @@
+-- 新建course_session表的迁移脚本
+-- 用途: 保存由course_time解析出的星期和节次，按星期查课程时走索引而不是 LIKE '周X%'
+
+CREATE TABLE IF NOT EXISTS course_session (
+    session_id SERIAL PRIMARY KEY,
+    course_id VARCHAR(20) NOT NULL REFERENCES course(course_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    weekday SMALLINT NOT NULL,
+    start_period SMALLINT NOT NULL,
+    end_period SMALLINT NOT NULL
+);
+
+-- 添加注释
+COMMENT ON TABLE course_session IS '课程上课时段（由course_time解析）';
+COMMENT ON COLUMN course_session.weekday IS '星期（0=周一 ... 6=周日）';
+COMMENT ON COLUMN course_session.start_period IS '开始节次';
+COMMENT ON COLUMN course_session.end_period IS '结束节次';
+
+-- 添加索引
+CREATE INDEX IF NOT EXISTS ix_course_session_course_id ON course_session (course_id);
+CREATE INDEX IF NOT EXISTS ix_course_session_weekday ON course_session (weekday, start_period);
+
+-- 回填已有课程的上课时段请执行: flask rebuild-course-sessions
@@ -0,0 +1,26 @@
+-- 新建leave_day表的迁移脚本
+-- 用途: 把请假记录按天展开，“某天有哪些人请假”和日期区间重叠查询按日期主键直接定位，
+--       不再对 leave_start_date <= X AND leave_end_date >= Y 做范围扫描
+
+CREATE TABLE IF NOT EXISTS leave_day (
+    leave_date DATE NOT NULL,
+    leave_id INT NOT NULL REFERENCES leave_record(leave_id) ON DELETE CASCADE,
+    student_id VARCHAR(20) NOT NULL,
+    PRIMARY KEY (leave_date, leave_id)
+);
+
+-- 添加注释
+COMMENT ON TABLE leave_day IS '请假日索引（请假期间每天一行）';
+COMMENT ON COLUMN leave_day.leave_date IS '请假日期';
+COMMENT ON COLUMN leave_day.student_id IS '学生学号（冗余，便于按日期直接查人）';
+
+-- 添加索引
+CREATE INDEX IF NOT EXISTS ix_leave_day_leave_id ON leave_day (leave_id);
+
+-- 回填已有请假记录
+INSERT INTO leave_day (leave_date, leave_id, student_id)
+SELECT d::date, leave_id, student_id
+FROM leave_record, generate_series(leave_start_date, leave_end_date, INTERVAL '1 day') AS d
+ON CONFLICT DO NOTHING;
+
+-- 之后也可以随时执行 flask rebuild-leave-days 重新生成
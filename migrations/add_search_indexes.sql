@@ -0,0 +1,44 @@
+-- 为学生、课程、请假记录列表添加搜索和分页索引的迁移脚本
+-- 用途: 列表页关键字搜索使用 ILIKE '%关键字%'，由 pg_trgm 三元组 GIN 索引加速；
+--       学生和请假记录列表按创建时间倒序游标分页，使用 (create_time, 主键) 复合索引
+-- 注意: CREATE INDEX CONCURRENTLY 不能在事务中执行，请用 psql 直接运行本文件（不要加 -1/--single-transaction）
+--       创建扩展需要数据库的 CREATE 权限（PostgreSQL 13 起 pg_trgm 为受信任扩展，库的所有者即可创建）
+--       中文关键字的三元组依赖数据库的 LC_CTYPE 支持 UTF-8（如 zh_CN.UTF-8、C.UTF-8），LC_CTYPE=C 时中文字符不会产生三元组
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 学生：学号、姓名、联系电话
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_student_id_trgm
+    ON student USING gin (student_id gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_student_name_trgm
+    ON student USING gin (student_name gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_student_phone_trgm
+    ON student USING gin (phone gin_trgm_ops);
+
+-- 课程：课程代码、课程名称、教师姓名
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_course_id_trgm
+    ON course USING gin (course_id gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_course_name_trgm
+    ON course USING gin (course_name gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_course_teacher_name_trgm
+    ON course USING gin (teacher_name gin_trgm_ops);
+
+-- 游标分页的排序索引
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_student_create_time
+    ON student (create_time, student_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leave_record_create_time
+    ON leave_record (create_time, leave_id);
+
+-- 更新统计信息（估算总数依赖统计信息）
+ANALYZE student;
+ANALYZE course;
+ANALYZE leave_record;
+
+-- 查看修改结果
+SELECT tablename, indexname, indexdef FROM pg_indexes
+WHERE tablename IN ('student', 'course', 'leave_record') ORDER BY tablename, indexname;
@@ -0,0 +1,13 @@
+-- 为course表添加week_mask字段的迁移脚本
+-- 用途: 将上课周次范围预编译为位掩码，支持在SQL中按周次筛选课程
+
+-- 添加week_mask字段（第n周对应第n位，NULL表示每周上课）
+ALTER TABLE course ADD COLUMN IF NOT EXISTS week_mask BIGINT;
+
+-- 添加注释
+COMMENT ON COLUMN course.week_mask IS '上课周次位掩码（第n周对应第n位，空表示每周上课）';
+
+-- 添加索引
+CREATE INDEX IF NOT EXISTS ix_course_week_mask ON course (week_mask);
+
+-- 回填已有课程的位掩码请执行: flask backfill-week-mask
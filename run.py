@@ -1,4 +1,8 @@
 import os
+from datetime import datetime
+
+import click
+
 from app import create_app, db
 from app.models import Student, Course, Attendance, LeaveRecord
 
@@ -47,6 +51,79 @@ def recreate_user_table():
             print("默认管理员用户已创建 (用户名: admin, 密码: admin123)")
 
 
+# 注册命令：回填课程周次位掩码（执行 migrations/add_week_mask_to_course.sql 后使用）
+@app.cli.command("backfill-week-mask")
+def backfill_week_mask():
+    """根据week_range重新计算所有课程的week_mask"""
+    with app.app_context():
+        from app.utils.week_helper import compile_week_range
+        courses = Course.query.all()
+        for course in courses:
+            course.week_mask = compile_week_range(course.week_range)
+        db.session.commit()
+        print(f"已回填 {len(courses)} 门课程的周次位掩码")
+
+
+# 注册命令：重建课程上课时段（执行 migrations/add_course_session.sql 后使用）
+@app.cli.command("rebuild-course-sessions")
+def rebuild_course_sessions_command():
+    """根据course_time重新生成course_session表"""
+    with app.app_context():
+        from app.utils.course_schedule import find_unparsed_courses, rebuild_course_sessions
+        count = rebuild_course_sessions()
+        db.session.commit()
+        print(f"已生成 {count} 条课程上课时段")
+        unparsed = find_unparsed_courses()
+        if unparsed:
+            print(f"以下 {len(unparsed)} 门课程的上课时间无法解析（考勤页面按“周X”开头匹配，课表中不显示）：")
+            for course_id, course_time in unparsed:
+                print(f"  {course_id}: {course_time!r}")
+
+
+# 注册命令：重建考勤日汇总表
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """根据attendance表重新计算attendance_daily_rollup"""
+    with app.app_context():
+        from app.models import AttendanceDailyRollup
+        from app.utils.attendance_rollup import refresh_rollups
+        refresh_rollups()
+        db.session.commit()
+        print(f"已重建 {AttendanceDailyRollup.query.count()} 条考勤日汇总")
+
+
+# 注册命令：重建请假日索引表（执行 migrations/add_leave_day.sql 后也可使用）
+@app.cli.command("rebuild-leave-days")
+def rebuild_leave_days_command():
+    """根据leave_record重新生成leave_day表"""
+    with app.app_context():
+        from app.utils.leave_days import refresh_leave_days
+        count = refresh_leave_days()
+        db.session.commit()
+        print(f"已生成 {count} 条请假日记录")
+
+
+# 注册命令：把请假记录同步为请假考勤（用于回填历史数据）
+@app.cli.command("reconcile-leaves")
+@click.option("--start", "start_str", help="开始日期（YYYY-MM-DD），默认最早的请假日期")
+@click.option("--end", "end_str", help="结束日期（YYYY-MM-DD），默认最晚的请假日期")
+def reconcile_leaves_command(start_str, end_str):
+    """根据leave_day和课程安排批量写入请假考勤"""
+    with app.app_context():
+        from sqlalchemy import func
+        from app.models import LeaveDay
+        from app.utils.leave_reconcile import reconcile_leaves
+        first_day, last_day = db.session.query(func.min(LeaveDay.leave_date), func.max(LeaveDay.leave_date)).one()
+        start_date = datetime.strptime(start_str, "%Y-%m-%d").date() if start_str else first_day
+        end_date = datetime.strptime(end_str, "%Y-%m-%d").date() if end_str else last_day
+        if not start_date or not end_date:
+            print("没有请假记录（如刚执行迁移，请先执行 flask rebuild-leave-days）")
+            return
+        result = reconcile_leaves(start_date, end_date)
+        db.session.commit()
+        print(f"{start_date} 至 {end_date}：恢复 {result['reverted']} 条自动请假考勤，写入 {result['applied']} 条请假考勤")
+
+
 # 注册命令：添加测试数据（可选，方便测试）
 @app.cli.command("add-test-data")
 def add_test_data():
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+考勤表索引基准测试脚本
+
+在独立的 bench_attendance schema 中生成数百万条考勤数据，
+分别在“只有主键和唯一约束”和“添加热点索引后”两种情况下
+输出各热点查询的执行计划和耗时，用于对比索引效果。
+需要连接 PostgreSQL（使用 config.py 中的 DATABASE_URL），不会改动业务表。
+
+用法：
+python test/bench_attendance_indexes.py --rows 3000000
+python test/bench_attendance_indexes.py --rows 500000 --keep   # 保留测试数据
+"""
+import argparse
+import sys
+import os
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+
+from app import create_app, db
+
+
+SCHEMA = 'bench_attendance'
+
+# 与 migrations/add_attendance_indexes.sql 保持一致
+INDEX_DDL = [
+    f'CREATE INDEX ix_attendance_course_date ON {SCHEMA}.attendance (course_id, attendance_date) INCLUDE (attendance_type)',
+    f'CREATE INDEX ix_attendance_date_type ON {SCHEMA}.attendance (attendance_date, attendance_type)',
+    f'CREATE INDEX ix_attendance_student_date ON {SCHEMA}.attendance (student_id, attendance_date)',
+    f'CREATE INDEX ix_attendance_create_time ON {SCHEMA}.attendance (create_time)',
+]
+
+# 热点查询（名称, SQL）
+HOT_QUERIES = [
+    ('考勤日历：某天各课程按状态统计', f"""
+        SELECT course_id, attendance_type, count(*) FROM {SCHEMA}.attendance
+        WHERE attendance_date = DATE '2025-10-13' AND course_id IN ('C0001', 'C0002', 'C0003', 'C0004')
+        GROUP BY course_id, attendance_type"""),
+    ('记录页：某课程某天的全部记录', f"""
+        SELECT * FROM {SCHEMA}.attendance
+        WHERE course_id = 'C0007' AND attendance_date = DATE '2025-10-13'"""),
+    ('数据概览：最近7天按日期和状态统计', f"""
+        SELECT attendance_date, attendance_type, count(*) FROM {SCHEMA}.attendance
+        WHERE attendance_date BETWEEN DATE '2025-10-07' AND DATE '2025-10-13'
+        GROUP BY attendance_date, attendance_type"""),
+    ('学生详情：某学生最近5条考勤', f"""
+        SELECT * FROM {SCHEMA}.attendance
+        WHERE student_id = 'S000123' ORDER BY attendance_date DESC LIMIT 5"""),
+    ('最近活动：按创建时间取最新10条', f"""
+        SELECT * FROM {SCHEMA}.attendance ORDER BY create_time DESC LIMIT 10"""),
+]
+
+
+def seed(rows, class_size, days):
+    """生成测试数据"""
+    db.session.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+    db.session.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+    db.session.execute(text(f"""
+        CREATE TABLE {SCHEMA}.attendance (
+            attendance_id SERIAL PRIMARY KEY,
+            student_id VARCHAR(20) NOT NULL,
+            course_id VARCHAR(20) NOT NULL,
+            attendance_date DATE NOT NULL,
+            attendance_type VARCHAR(20) NOT NULL,
+            late_minutes INT DEFAULT 0,
+            attendance_note VARCHAR(200),
+            create_time TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_bench_attendance UNIQUE (student_id, course_id, attendance_date)
+        )"""))
+
+    # 每行对应唯一的 (学生, 日期, 课程) 组合：每门课 class_size 名学生、days 天考勤
+    db.session.execute(text(f"""
+        INSERT INTO {SCHEMA}.attendance
+            (student_id, course_id, attendance_date, attendance_type, late_minutes, attendance_note, create_time)
+        SELECT
+            'S' || lpad((g % :class_size)::text, 6, '0'),
+            'C' || lpad((g / (:class_size * :days))::text, 4, '0'),
+            DATE '2025-09-01' + ((g / :class_size) % :days)::int,
+            (ARRAY['到课', '到课', '到课', '到课', '到课', '到课', '到课', '到课', '请假', '旷课'])[1 + g % 10],
+            0,
+            '',
+            TIMESTAMPTZ '2025-09-01 08:00' + g * INTERVAL '1 second'
+        FROM generate_series(0, :rows - 1) AS g"""), {'rows': rows, 'class_size': class_size, 'days': days})
+    db.session.execute(text(f'ANALYZE {SCHEMA}.attendance'))
+    db.session.commit()
+
+
+def run_queries(label):
+    """输出每个热点查询的执行计划摘要，返回 {名称: 耗时毫秒}"""
+    print('=' * 60)
+    print(label)
+    print('=' * 60)
+    timings = {}
+    for name, sql in HOT_QUERIES:
+        plan = db.session.execute(text(f'EXPLAIN (ANALYZE, BUFFERS) {sql}')).scalars().all()
+        started = time.perf_counter()
+        db.session.execute(text(sql)).all()
+        timings[name] = (time.perf_counter() - started) * 1000
+        print(f'▶ {name}: {timings[name]:.2f} ms')
+        for line in plan:
+            print(f'    {line}')
+        print()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='考勤表索引基准测试')
+    parser.add_argument('--rows', type=int, default=3000000, help='生成的考勤记录条数')
+    parser.add_argument('--class-size', type=int, default=300, help='每门课程的学生人数')
+    parser.add_argument('--days', type=int, default=100, help='每门课程的考勤天数')
+    parser.add_argument('--keep', action='store_true', help='测试结束后保留测试数据')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print('✗ 该基准测试需要 PostgreSQL 数据库')
+            return
+
+        print(f'正在生成 {args.rows} 条考勤数据...')
+        started = time.perf_counter()
+        seed(args.rows, args.class_size, args.days)
+        print(f'✓ 数据生成完成，用时 {time.perf_counter() - started:.1f} 秒\n')
+
+        before = run_queries('索引添加前（仅主键和唯一约束）')
+
+        for ddl in INDEX_DDL:
+            db.session.execute(text(ddl))
+        db.session.execute(text(f'ANALYZE {SCHEMA}.attendance'))
+        db.session.commit()
+
+        after = run_queries('索引添加后')
+
+        print('=' * 60)
+        print('耗时对比')
+        print('=' * 60)
+        for name, _ in HOT_QUERIES:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            print(f'{name}: {before[name]:.2f} ms → {after[name]:.2f} ms（{speedup:.1f}x）')
+
+        if not args.keep:
+            db.session.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+            db.session.commit()
+            print('\n✓ 已清理测试数据')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+课表文本解析基准测试脚本
+
+生成10万条课表文本（上课时间字符串和ICS事件描述，按全校课表的重复程度抽样），
+比较以下几种方式的吞吐量：
+- 上课时间：不使用缓存（parse_course_time.__wrapped__） / 使用LRU缓存
+- 事件描述：逐条内联 re.search（改造前的写法） / 预编译正则 / 预编译正则 + LRU缓存
+不需要数据库。
+
+用法：
+python test/bench_schedule_parser.py
+python test/bench_schedule_parser.py --strings 200000 --distinct 5000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils import schedule_helper
+from app.utils.schedule_helper import clean_course_name, parse_course_time, parse_event_description
+
+
+WEEKDAYS = '一二三四五六日'
+CLOCK_SLOTS = ['08:00-09:40', '08:20-09:50', '10:00-11:40', '14:00-15:40', '16:00-17:40', '19:00-20:40']
+
+
+def build_corpus(size, distinct, seed=0):
+    """生成 (上课时间列表, 事件描述列表, 课程名称列表)，每类 size 条，约 distinct 种不同取值"""
+    rng = random.Random(seed)
+    course_times = []
+    descriptions = []
+    summaries = []
+    for n in range(distinct):
+        weekday = WEEKDAYS[n % 7]
+        start = n % 11 + 1
+        course_times.append(rng.choice([
+            f'周{weekday}{start}-{start + 1}节',
+            f'周{weekday} 第{start}-{start + 1}节',
+            f'周{weekday} {CLOCK_SLOTS[n % len(CLOCK_SLOTS)]}',
+            f'周{weekday}{start},{start + 1}节;周{WEEKDAYS[(n + 2) % 7]}{start}-{start + 1}节',
+        ]))
+        descriptions.append(f'课程代码: {n:06d}\\n教师: 教师{n % 300}\\n鄠邑校区 教学楼{n % 40}\\n周次: {n % 18 + 1}')
+        summaries.append(f'课程{n}（{rng.choice(["必修课", "选修课", "限选课"])}）')
+
+    def sample(values):
+        return [rng.choice(values) for _ in range(size)]
+
+    return sample(course_times), sample(descriptions), sample(summaries)
+
+
+def legacy_description(description, summary):
+    """改造前 import_ics 中的写法：每个事件内联调用 re.search / re.sub"""
+    course_code_match = re.search(r'课程代码:\s*(\w+)', description)
+    teacher_match = re.search(r'教师:\s*([^\s]+)', description)
+    week_match = re.search(r'周次:\s*(\d+)', description)
+    course_name = re.sub(r'[（(](必修课|选修课|限选课)[）)]', '', summary).strip()
+    return (
+        course_code_match.group(1) if course_code_match else None,
+        teacher_match.group(1) if teacher_match else None,
+        int(week_match.group(1)) if week_match else None,
+        course_name
+    )
+
+
+def measure(name, func, corpus):
+    """运行一遍并输出吞吐量，返回每秒条数"""
+    started = time.perf_counter()
+    for item in corpus:
+        func(*item)
+    elapsed = time.perf_counter() - started
+    rate = len(corpus) / elapsed
+    print(f'  {name:<28}{elapsed:8.3f}s  {rate:12,.0f} 条/秒')
+    return rate
+
+
+def clear_caches():
+    for func in (parse_course_time, schedule_helper.time_to_period, parse_event_description, clean_course_name):
+        func.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='课表文本解析基准测试')
+    parser.add_argument('--strings', type=int, default=100000, help='每类文本的条数')
+    parser.add_argument('--distinct', type=int, default=2000, help='每类文本的不同取值数')
+    args = parser.parse_args()
+
+    course_times, descriptions, summaries = build_corpus(args.strings, args.distinct)
+    print(f'语料：每类 {args.strings} 条，约 {args.distinct} 种不同取值')
+
+    print('上课时间 parse_course_time：')
+    clear_caches()
+    uncached = measure('不使用缓存', parse_course_time.__wrapped__, [(s,) for s in course_times])
+    clear_caches()
+    cached = measure('LRU缓存', parse_course_time, [(s,) for s in course_times])
+    print(f'  加速比 {cached / uncached:.1f}x，{parse_course_time.cache_info()}')
+
+    print('ICS事件描述（课程代码/教师/周次 + 课程名称）：')
+    events = list(zip(descriptions, summaries))
+    legacy = measure('内联 re.search', legacy_description, events)
+    clear_caches()
+    measure('预编译正则', lambda d, s: (
+        parse_event_description.__wrapped__(d), clean_course_name.__wrapped__(s)
+    ), events)
+    clear_caches()
+    cached = measure('预编译正则 + LRU缓存', lambda d, s: (
+        parse_event_description(d), clean_course_name(s)
+    ), events)
+    print(f'  加速比 {cached / legacy:.1f}x，{parse_event_description.cache_info()}')
+
+
+if __name__ == '__main__':
+    main()
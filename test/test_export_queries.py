@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+导出和详情页面查询次数测试脚本
+
+在内存 SQLite 数据库中分别准备少量和大量数据，统计每个请求执行的SQL条数，
+条数不随数据行数增长才算通过（防止逐行懒加载学生、课程造成 N+1 查询）。
+
+用法：
+python test/test_export_queries.py
+"""
+import io
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Course, Student, Attendance, LeaveRecord
+from app.utils.export_jobs import ExportJob
+from config import Config
+
+
+# 每个请求允许的最多SQL条数（与数据行数无关）
+MAX_QUERIES = 12
+
+
+class QueryCountConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    LOGIN_DISABLED = True
+    TESTING = True
+
+
+@contextmanager
+def count_queries():
+    """统计上下文中执行的SQL条数"""
+    counter = {'count': 0}
+
+    def before_cursor_execute(*args):
+        counter['count'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed(student_count):
+    """准备一门课程、若干学生、今天和历史的考勤记录以及请假记录"""
+    db.drop_all()
+    db.create_all()
+    db.session.add(Course(course_id='C1', course_name='测试课程', teacher_name='教师',
+                          course_time='周一 3-4节', course_place='教室', semester='2025-2026-1'))
+    for i in range(student_count):
+        student_id = f'S{i:04d}'
+        db.session.add(Student(student_id=student_id, student_name=f'学生{i}', phone='1'))
+        for attendance_date in (date(2025, 9, 1), date.today()):
+            db.session.add(Attendance(student_id=student_id, course_id='C1', attendance_date=attendance_date,
+                                      attendance_type='到课', late_minutes=0, attendance_note=''))
+        db.session.add(LeaveRecord(student_id=student_id, leave_type='病假', leave_start_date=date(2025, 9, 1),
+                                   leave_end_date=date(2025, 9, 2), leave_days=2, leave_reason='测试'))
+    db.session.commit()
+
+
+def request_query_counts(app, student_count):
+    """返回 {请求: SQL条数}"""
+    from app.routes.course import _render_course_attendance
+    from app.routes.leave import _render_leave_export
+
+    with app.app_context():
+        seed(student_count)
+        client = app.test_client()
+        urls = [
+            '/course/export_attendance?course_id=C1&date=2025-09-01',
+            '/course/export_attendance?course_id=C1&date=2025-09-01&format=csv',
+            '/leave/export?leave_type=病假',
+            '/leave/export?leave_type=病假&format=csv',
+            '/course/detail/C1',
+            '/course/today',
+        ]
+        counts = {}
+        for url in urls:
+            db.session.expunge_all()
+            with count_queries() as counter:
+                response = client.get(url)
+                response.get_data()  # 流式响应在读取时才执行查询
+            assert response.status_code == 200, f'{url} 返回 {response.status_code}'
+            counts[url] = counter['count']
+
+        # 后台导出任务的生成函数
+        for name, render, params in [
+            ('后台任务：课程考勤', _render_course_attendance, {'course_id': 'C1', 'format': 'xlsx'}),
+            ('后台任务：请假记录', _render_leave_export, {'format': 'csv'}),
+        ]:
+            db.session.expunge_all()
+            job = ExportJob(name, params, 'export', 'application/octet-stream', name)
+            with count_queries() as counter:
+                render(job, io.BytesIO())
+            counts[name] = counter['count']
+        return counts
+
+
+def test_export_query_counts_are_constant():
+    """导出和详情页面的SQL条数不随数据量增长"""
+    app = create_app(QueryCountConfig)
+    small = request_query_counts(app, 3)
+    large = request_query_counts(app, 40)
+
+    for name in small:
+        print(f'{name}: {small[name]} / {large[name]} 条SQL')
+        assert large[name] == small[name], f'{name} 的查询次数随数据量增长（{small[name]} → {large[name]}）'
+        assert large[name] <= MAX_QUERIES, f'{name} 执行了 {large[name]} 条SQL'
+
+
+if __name__ == '__main__':
+    test_export_query_counts_are_constant()
+    print('✓ 导出查询次数测试通过')
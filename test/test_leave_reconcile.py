@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+请假考勤同步测试脚本
+
+在内存 SQLite 数据库中准备课程、学生和请假记录，检查请假添加、修改、删除后同步的请假考勤：
+只改写默认的到课记录，教师标记的状态和备注保持不变，撤销后恢复为请假前的状态；
+PostgreSQL 特有的类型问题通过按 psycopg2 方言编译SQL检查。
+
+用法：
+python test/test_leave_reconcile.py
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy.dialects.postgresql import psycopg2
+
+from app import create_app, db
+from app.models import Attendance, Course, LeaveRecord, Student
+from app.utils.attendance_writer import materialize_default_roster
+from app.utils.leave_reconcile import AUTO_LEAVE_NOTE, AUTO_LEAVE_REPLACED_NOTE, _calendar, _leave_sessions
+from app.utils.week_helper import get_week_date_range
+from config import Config
+
+
+# 学期外的一周（第20周之后），周一为 2026-03-02
+OUT_OF_SEMESTER_MONDAY = date(2026, 3, 2)
+
+# 第2~5周的周一（课程每周一上课）
+MONDAYS = [get_week_date_range(week)[0] for week in range(2, 6)]
+
+
+class ReconcileConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+def seed():
+    """准备一门每周一上课的课程和两名学生"""
+    db.drop_all()
+    db.create_all()
+    db.session.add(Course(course_id='C1', course_name='测试课程', teacher_name='教师',
+                          course_time='周一 3-4节', course_place='教室', semester='2025-2026-2', week_range='1-16'))
+    db.session.add(Student(student_id='S1', student_name='学生1', phone='1'))
+    db.session.add(Student(student_id='S2', student_name='学生2', phone='1'))
+    db.session.commit()
+
+
+def add_leave(student_id, start_date, end_date):
+    """添加请假记录并同步（与 leave.add 相同的步骤）"""
+    from app.routes.leave import _sync_leave
+
+    leave = LeaveRecord(student_id=student_id, leave_type='病假', leave_start_date=start_date,
+                        leave_end_date=end_date, leave_days=(end_date - start_date).days + 1, leave_reason='测试')
+    db.session.add(leave)
+    db.session.flush()
+    _sync_leave(leave.leave_id, (student_id, start_date, end_date))
+    db.session.commit()
+    return leave
+
+
+def edit_leave(leave, start_date, end_date):
+    """修改请假日期并同步（与 leave.edit 相同的步骤）"""
+    from app.routes.leave import _sync_leave
+
+    old_scope = (leave.student_id, leave.leave_start_date, leave.leave_end_date)
+    leave.leave_start_date, leave.leave_end_date = start_date, end_date
+    leave.leave_days = (end_date - start_date).days + 1
+    db.session.flush()
+    _sync_leave(leave.leave_id, old_scope, (leave.student_id, start_date, end_date))
+    db.session.commit()
+
+
+def delete_leave(leave):
+    """删除请假记录并同步（与 leave.delete 相同的步骤）"""
+    from app.routes.leave import _sync_leave
+
+    scope = (leave.student_id, leave.leave_start_date, leave.leave_end_date)
+    db.session.delete(leave)
+    db.session.flush()
+    _sync_leave(leave.leave_id, scope)
+    db.session.commit()
+
+
+def mark(student_id, attendance_date, attendance_type, note):
+    """教师手动标记的考勤"""
+    db.session.add(Attendance(student_id=student_id, course_id='C1', attendance_date=attendance_date,
+                              attendance_type=attendance_type, late_minutes=0, attendance_note=note))
+    db.session.commit()
+
+
+def seed_marked_weeks():
+    """
+    第2~5周周一的考勤：
+    第2周打开过考勤页面（全员默认到课）；第3周教师标记 S1 旷课；
+    第4周 S1 到课但填写了备注；第5周还没有考勤
+    """
+    seed()
+    materialize_default_roster('C1', MONDAYS[0])
+    db.session.commit()
+    mark('S1', MONDAYS[1], '旷课', '未到')
+    mark('S1', MONDAYS[2], '到课', '带病上课')
+
+
+def attendance_rows():
+    """当前的全部考勤：{(学号, 课程, 日期): (状态, 备注)}"""
+    return {
+        (row.student_id, row.course_id, row.attendance_date): (row.attendance_type, row.attendance_note)
+        for row in Attendance.query
+    }
+
+
+def test_calendar_week_bit_is_bigint_on_postgresql():
+    """学期外的日历 week_bit 全为 NULL，编译到 PostgreSQL 时仍须是 BIGINT（否则 bigint & text 报错）"""
+    app = create_app(ReconcileConfig)
+    with app.app_context():
+        calendar = _calendar(OUT_OF_SEMESTER_MONDAY, date(2026, 3, 8))
+        sql = str(_leave_sessions(calendar).compile(dialect=psycopg2.dialect()))
+        assert sql.count('AS BIGINT) AS week_bit') == 7, sql
+
+
+def test_reconcile_out_of_semester_window():
+    """学期外的请假也按星期写入请假考勤，只写请假的学生"""
+    app = create_app(ReconcileConfig)
+    with app.app_context():
+        seed()
+        add_leave('S1', OUT_OF_SEMESTER_MONDAY, date(2026, 3, 8))
+        assert attendance_rows() == {('S1', 'C1', OUT_OF_SEMESTER_MONDAY): ('请假', AUTO_LEAVE_NOTE)}
+
+
+def test_leave_marks_only_default_rows():
+    """请假只改写默认的到课记录和没有记录的课，教师标记的状态和备注保持不变，其他学生不受影响"""
+    app = create_app(ReconcileConfig)
+    with app.app_context():
+        seed_marked_weeks()
+        add_leave('S1', MONDAYS[0], MONDAYS[3])
+        assert attendance_rows() == {
+            ('S1', 'C1', MONDAYS[0]): ('请假', AUTO_LEAVE_REPLACED_NOTE),
+            ('S2', 'C1', MONDAYS[0]): ('到课', ''),
+            ('S1', 'C1', MONDAYS[1]): ('旷课', '未到'),
+            ('S1', 'C1', MONDAYS[2]): ('到课', '带病上课'),
+            ('S1', 'C1', MONDAYS[3]): ('请假', AUTO_LEAVE_NOTE),
+        }
+
+
+def test_edit_and_delete_restore_prior_state():
+    """缩短和删除请假后，考勤恢复为请假前的状态，不留下多余的记录"""
+    app = create_app(ReconcileConfig)
+    with app.app_context():
+        seed_marked_weeks()
+        before = attendance_rows()
+        leave = add_leave('S1', MONDAYS[0], MONDAYS[3])
+
+        # 缩短为只请第5周：第2周恢复为默认到课
+        edit_leave(leave, MONDAYS[3], MONDAYS[3] + timedelta(days=1))
+        assert attendance_rows() == {**before, ('S1', 'C1', MONDAYS[3]): ('请假', AUTO_LEAVE_NOTE)}
+
+        # 改为只请第2周：第5周自动写入的记录被删除
+        edit_leave(leave, MONDAYS[0], MONDAYS[0])
+        assert attendance_rows() == {**before, ('S1', 'C1', MONDAYS[0]): ('请假', AUTO_LEAVE_REPLACED_NOTE)}
+
+        delete_leave(leave)
+        assert attendance_rows() == before
+
+
+if __name__ == '__main__':
+    test_calendar_week_bit_is_bigint_on_postgresql()
+    test_reconcile_out_of_semester_window()
+    test_leave_marks_only_default_rows()
+    test_edit_and_delete_restore_prior_state()
+    print('✓ 请假考勤同步测试通过')
@@ -12,6 +12,8 @@ from app.utils.week_helper import (
     get_week_date_range, 
     get_current_week,
     is_in_week_range,
+    compile_week_range,
+    week_in_mask,
     format_week_range,
     FIRST_WEEK_START
 )
@@ -90,10 +92,37 @@ def test_is_in_week_range():
     print()
 
 
+def test_compile_week_range():
+    """测试周次位掩码"""
+    print("=" * 60)
+    print("测试4：周次位掩码")
+    print("=" * 60)
+    
+    test_cases = [
+        # (范围字符串, 期望上课的周次, 描述)
+        ("1-8", {1, 2, 3, 4, 5, 6, 7, 8}, "连续范围"),
+        ("1-8,13,15,17", {1, 2, 3, 4, 5, 6, 7, 8, 13, 15, 17}, "组合范围"),
+        ("9-16", set(range(9, 17)), "后半学期"),
+        ("3, x, 5", {3, 5}, "忽略无法解析的部分"),
+    ]
+    
+    for range_str, expected, description in test_cases:
+        mask = compile_week_range(range_str)
+        result = {week for week in range(1, 21) if week_in_mask(week, mask)}
+        status = "✅" if result == expected else "❌"
+        print(f"{status} {description}: '{range_str}' → mask={mask}")
+    
+    # 未设置范围时返回None，表示每周都上课
+    status = "✅" if compile_week_range(None) is None and week_in_mask(5, None) else "❌"
+    print(f"{status} 未设置范围: None → 每周上课")
+    
+    print()
+
+
 def test_format_week_range():
     """测试周次范围格式化"""
     print("=" * 60)
-    print("测试4：周次范围格式化")
+    print("测试5：周次范围格式化")
     print("=" * 60)
     
     test_cases = [
@@ -116,7 +145,7 @@ def test_format_week_range():
 def test_course_scenario():
     """测试实际课程场景"""
     print("=" * 60)
-    print("测试5：实际课程场景")
+    print("测试6：实际课程场景")
     print("=" * 60)
     
     print(f"学期第一周开始日期: {FIRST_WEEK_START}")
@@ -148,7 +177,7 @@ def test_course_scenario():
 def test_edge_cases():
     """测试边界情况"""
     print("=" * 60)
-    print("测试6：边界情况")
+    print("测试7：边界情况")
     print("=" * 60)
     
     # 测试第20周（学期最后一周）
@@ -178,6 +207,7 @@ def main():
         test_week_number_calculation()
         test_week_date_range()
         test_is_in_week_range()
+        test_compile_week_range()
         test_format_week_range()
         test_course_scenario()
         test_edge_cases()